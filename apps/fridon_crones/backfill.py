@@ -0,0 +1,224 @@
+import asyncio
+import datetime
+import logging
+
+import polars as pl
+
+from apps.fridon_crones.metrics import provider_request
+from apps.fridon_crones.pipeline import IngestionExecutor
+from apps.fridon_crones.rollups import ohlcv_frame, with_date_column
+from libs.repositories import IndicatorsRepository, OhlcvRepository
+from libs.repositories.redis import RedisRepository
+from libs.technical_analysis.batch import calculate_ta_indicators_batch
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class Backfill:
+    """
+    Seeds OHLCV and indicator tables as a bounded producer/consumer pipeline.
+
+    fetch (concurrent provider calls) -> indicators (process pool) -> write
+    (batched Delta commits). Queues between the stages are bounded, so peak
+    memory depends on the chunk sizes and not on how many coins are seeded.
+
+    Every (interval, coin) gets a checkpoint in the `backfill_checkpoint_<interval>`
+    Redis hash. Coins marked done are skipped on the next run; coins whose
+    write was interrupted are written with a merge so nothing is duplicated.
+    """
+
+    def __init__(
+        self,
+        data_provider,
+        executor: IngestionExecutor,
+        coins: list[str],
+        interval_to_days: dict[str, int],
+        fetch_chunk_size: int = 20,
+        fetch_concurrency: int = 3,
+        queue_size: int = 2,
+        write_batch_rows: int = 50_000,
+    ):
+        self.data_provider = data_provider
+        self.executor = executor
+        self.coins = coins
+        self.interval_to_days = interval_to_days
+        self.fetch_chunk_size = fetch_chunk_size
+        self.fetch_concurrency = fetch_concurrency
+        self.queue_size = queue_size
+        self.write_batch_rows = write_batch_rows
+
+    async def run(self, interval_names: list[str]) -> None:
+        for interval_name in interval_names:
+            start_time = datetime.datetime.now()
+            await self.backfill_interval(interval_name)
+            logger.info(
+                f"Backfill for {interval_name} finished. Time taken: {datetime.datetime.now() - start_time}"
+            )
+
+    async def backfill_interval(self, interval_name: str) -> None:
+        checkpoint_repository = RedisRepository(
+            table_name=f"backfill_checkpoint_{interval_name}"
+        )
+        checkpoints = dict(await checkpoint_repository.all())
+        pending_coins = [
+            coin
+            for coin in self.coins
+            if checkpoints.get(coin, {}).get("status") != "done"
+        ]
+        interrupted_coins = {
+            coin
+            for coin in pending_coins
+            if checkpoints.get(coin, {}).get("status") == "started"
+        }
+        logger.info(
+            f"Backfilling {interval_name}: {len(pending_coins)} pending, "
+            f"{len(self.coins) - len(pending_coins)} already seeded, "
+            f"{len(interrupted_coins)} interrupted."
+        )
+        if not pending_coins:
+            return
+
+        fetched_queue = asyncio.Queue(maxsize=self.queue_size)
+        computed_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def _produce() -> None:
+            await self._fetch(interval_name, pending_coins, fetched_queue)
+            await fetched_queue.put(_DONE)
+
+        tasks = [
+            asyncio.create_task(_produce()),
+            asyncio.create_task(self._compute(fetched_queue, computed_queue)),
+            asyncio.create_task(
+                self._write(
+                    interval_name,
+                    computed_queue,
+                    checkpoint_repository,
+                    interrupted_coins,
+                )
+            ),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch(
+        self, interval_name: str, coins: list[str], fetched_queue: asyncio.Queue
+    ) -> None:
+        provider_interval = "30m" if interval_name == "raw" else interval_name
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+
+        async def _fetch_chunk(coin_chunk: list[str]) -> None:
+            async with semaphore:
+                logger.info(f"Fetching {provider_interval} history for {coin_chunk}")
+                try:
+                    with provider_request("get_historical_ohlcv", len(coin_chunk)):
+                        raw_data = await self.data_provider.get_historical_ohlcv(
+                            coin_chunk,
+                            interval=provider_interval,
+                            days=self.interval_to_days[provider_interval],
+                            output_format="dict",
+                        )
+                except Exception as e:
+                    logger.error(f"Error fetching history for {coin_chunk}: {e}")
+                    return
+                if not raw_data:
+                    logger.warning(f"No history fetched for {coin_chunk}")
+                    return
+                df = ohlcv_frame(raw_data)
+                await fetched_queue.put(df)
+
+        await asyncio.gather(
+            *[
+                _fetch_chunk(coins[i : i + self.fetch_chunk_size])
+                for i in range(0, len(coins), self.fetch_chunk_size)
+            ]
+        )
+
+    async def _compute(
+        self, fetched_queue: asyncio.Queue, computed_queue: asyncio.Queue
+    ) -> None:
+        while (ohlcv_df := await fetched_queue.get()) is not _DONE:
+            try:
+                indicators_df = await self.executor.run_cpu(
+                    calculate_ta_indicators_batch, ohlcv_df, return_last_one=False
+                )
+            except Exception as e:
+                logger.error(f"Error calculating indicators: {e}")
+                continue
+            await computed_queue.put((with_date_column(ohlcv_df), indicators_df))
+        await computed_queue.put(_DONE)
+
+    async def _write(
+        self,
+        interval_name: str,
+        computed_queue: asyncio.Queue,
+        checkpoint_repository: RedisRepository,
+        interrupted_coins: set[str],
+    ) -> None:
+        ohlcv_repository = OhlcvRepository(table_name=f"ohlcv_{interval_name}")
+        indicators_repository = IndicatorsRepository(
+            table_name=f"indicators_{interval_name}"
+        )
+        ohlcv_buffer: list[pl.DataFrame] = []
+        indicators_buffer: list[pl.DataFrame] = []
+        buffered_rows = 0
+
+        async def _flush() -> None:
+            nonlocal buffered_rows
+            ohlcv_df = pl.concat(ohlcv_buffer, how="vertical_relaxed")
+            indicators_df = pl.concat(indicators_buffer, how="vertical_relaxed")
+            ohlcv_buffer.clear()
+            indicators_buffer.clear()
+            buffered_rows = 0
+
+            coins = ohlcv_df["coin"].unique().to_list()
+            now = datetime.datetime.now(datetime.UTC).isoformat()
+            await checkpoint_repository.write_many(
+                {coin: {"status": "started", "updated_at": now} for coin in coins}
+            )
+
+            use_merge = any(coin in interrupted_coins for coin in coins)
+            for repository, df in (
+                (ohlcv_repository, ohlcv_df),
+                (indicators_repository, indicators_df),
+            ):
+                for offset in range(0, df.shape[0], self.write_batch_rows):
+                    batch_df = df.slice(offset, self.write_batch_rows)
+                    if use_merge:
+                        await self.executor.run_io(repository.upsert, batch_df)
+                    else:
+                        await self.executor.run_io(repository.write, batch_df)
+
+            last_timestamps = ohlcv_df.group_by("coin").agg(
+                pl.max("timestamp"), pl.len().alias("rows")
+            )
+            now = datetime.datetime.now(datetime.UTC).isoformat()
+            await checkpoint_repository.write_many(
+                {
+                    row["coin"]: {
+                        "status": "done",
+                        "last_timestamp": row["timestamp"],
+                        "rows": row["rows"],
+                        "updated_at": now,
+                    }
+                    for row in last_timestamps.iter_rows(named=True)
+                }
+            )
+            logger.info(
+                f"Wrote {ohlcv_df.shape[0]} ohlcv and {indicators_df.shape[0]} indicator rows for {len(coins)} coins ({interval_name})."
+            )
+
+        while (item := await computed_queue.get()) is not _DONE:
+            ohlcv_df, indicators_df = item
+            ohlcv_buffer.append(ohlcv_df)
+            indicators_buffer.append(indicators_df)
+            buffered_rows += ohlcv_df.shape[0]
+            if buffered_rows >= self.write_batch_rows:
+                await _flush()
+
+        if ohlcv_buffer:
+            await _flush()
@@ -0,0 +1,51 @@
+import asyncio
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+import polars as pl
+
+from apps.fridon_crones.rollups import ohlcv_frame, with_date_column
+from libs.data_providers import DummyOHLCVProvider
+from libs.technical_analysis.batch import calculate_ta_indicators_batch
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+@contextmanager
+def peak_rss_growth(result: dict, interval: float = 0.002) -> Iterator[None]:
+    """
+    Samples RSS while the block runs (Linux only) and keeps the largest peak
+    above the RSS right before it in `result["peak_rss_mb"]`.
+    """
+    baseline = peak = rss_mb()
+    done = threading.Event()
+
+    def _sample() -> None:
+        nonlocal peak
+        while not done.wait(interval):
+            peak = max(peak, rss_mb())
+
+    sampler = threading.Thread(target=_sample, daemon=True)
+    sampler.start()
+    try:
+        yield
+    finally:
+        done.set()
+        sampler.join()
+        result["peak_rss_mb"] = max(result.get("peak_rss_mb", 0.0), max(peak, rss_mb()) - baseline)
+
+
+def generate_tables(coins: int, days: int) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """30m OHLCV bars from DummyOHLCVProvider and their indicators, ending now."""
+    symbols = [f"COIN{i}" for i in range(coins)]
+    records = asyncio.run(
+        DummyOHLCVProvider().get_historical_ohlcv(symbols, interval="30m", days=days, output_format="dict")
+    )
+    ohlcv_df = ohlcv_frame(records)
+    indicators_df = calculate_ta_indicators_batch(ohlcv_df, return_last_one=False)
+    return with_date_column(ohlcv_df), indicators_df
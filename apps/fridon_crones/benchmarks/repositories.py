@@ -0,0 +1,181 @@
+"""
+Latency and memory of the repository read and write paths on generated
+multi-month raw tables, across table sizes and layouts.
+
+    python -m apps.fridon_crones.benchmarks.repositories [--coins 193] [--days 30 90]
+        [--layouts date legacy unpartitioned] [--repeats 5] [--root DIR_OR_URI] [--compact]
+
+Tables are seeded from DummyOHLCVProvider 30m bars and their indicators in
+backfill-sized commits, under --root (a temporary directory by default; an
+s3:// root with DELTA_S3_ENDPOINT_URL set targets MinIO and the like). Each
+size and layout is measured in a fresh process; RSS is sampled while each
+operation runs (Linux only). --compact stores the indicators as float32.
+The append-mode upsert and the versioned read
+after it show what append-plus-dedupe trades against MERGE.
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Callable
+
+import polars as pl
+import pyarrow.compute as pc
+from deltalake import DeltaTable
+
+from apps.fridon_crones.benchmarks.common import generate_tables, peak_rss_growth
+from libs.repositories import IndicatorsRepository, OhlcvRepository, time_range_filter, time_range_partitions
+
+MERGE_PREDICATE = "s.timestamp == t.timestamp AND s.coin == t.coin"
+
+# partition_columns, cluster_columns
+LAYOUTS = {
+    "date": (["date"], ["coin", "timestamp"]),
+    "legacy": (["date", "timestamp"], []),
+    "unpartitioned": ([], ["coin", "timestamp"]),
+}
+
+SEED_BATCH_ROWS = 50_000
+
+
+def _seed(repository: OhlcvRepository | IndicatorsRepository, df: pl.DataFrame) -> None:
+    for offset in range(0, df.shape[0], SEED_BATCH_ROWS):
+        repository.write(df.slice(offset, SEED_BATCH_ROWS))
+
+
+def _next_tick(indicators_df: pl.DataFrame) -> pl.DataFrame:
+    """The bar after the last one of every coin, as the ingestion job merges it."""
+    return (
+        indicators_df.group_by("coin")
+        .agg(pl.all().last())
+        .with_columns(pl.col("timestamp") + 30 * 60 * 1000)
+        .with_columns(
+            pl.from_epoch("timestamp", time_unit="ms").dt.strftime("%Y-%m-%d").alias("date")
+        )
+        .select(indicators_df.columns)
+    )
+
+
+def _measure(operation: Callable[[], object], repeats: int) -> tuple[float, float]:
+    durations = []
+    memory: dict = {}
+    for _ in range(repeats):
+        with peak_rss_growth(memory):
+            start = time.perf_counter()
+            operation()
+            durations.append(time.perf_counter() - start)
+    return statistics.median(durations), memory["peak_rss_mb"]
+
+
+def _run_layout(
+    layout: str, ohlcv_path: str, indicators_path: str, storage_root: str, repeats: int, compact: bool
+) -> dict:
+    partition_columns, cluster_columns = LAYOUTS[layout]
+    ohlcv_repository = OhlcvRepository(
+        table_name="ohlcv_raw",
+        storage_root=storage_root,
+        partition_columns=partition_columns,
+        cluster_columns=cluster_columns,
+    )
+    indicators_repository = IndicatorsRepository(
+        table_name="indicators_raw",
+        storage_root=storage_root,
+        partition_columns=partition_columns,
+        cluster_columns=cluster_columns,
+        compact=compact,
+    )
+    indicators_df = pl.read_ipc(indicators_path, memory_map=True)
+
+    start = time.perf_counter()
+    _seed(ohlcv_repository, pl.read_ipc(ohlcv_path, memory_map=True))
+    _seed(indicators_repository, indicators_df)
+    seed_seconds = time.perf_counter() - start
+    add_actions = DeltaTable(
+        indicators_repository.s3_path, storage_options=indicators_repository.storage_options
+    ).get_add_actions()
+
+    three_days_ago = int((datetime.now(UTC) - timedelta(days=3)).timestamp() * 1000)
+    tick_df = _next_tick(indicators_df)
+    operations: dict[str, Callable[[], object]] = {
+        "read last 3 days": lambda: indicators_repository.read(
+            filters=time_range_filter(three_days_ago), order_by="timestamp"
+        ),
+        "read one coin": lambda: indicators_repository.read(
+            filters=pc.field("coin") == "COIN0", order_by="timestamp"
+        ),
+        "read ohlcv columns": lambda: ohlcv_repository.read(
+            columns=["coin", "timestamp", "close"], order_by="timestamp"
+        ),
+        "get_last_records 50": lambda: indicators_repository.get_last_records(
+            number_of_points=50, last_n=True
+        ),
+        "get_the_latest_records": lambda: indicators_repository.get_the_latest_records(last_n=True),
+        "scan mean RSI per coin, 3 days": lambda: indicators_repository.scan(
+            filters=time_range_filter(three_days_ago), partition_hints=time_range_partitions(three_days_ago)
+        ).group_by("coin").agg(pl.col("RSI_14").mean()).collect(),
+    }
+    results = {name: _measure(operation, repeats) for name, operation in operations.items()}
+
+    indicators_repository.latest_snapshot().rebuild(indicators_repository)
+    results["get_the_latest_records snapshot"] = _measure(
+        lambda: indicators_repository.get_the_latest_records(last_n=True), repeats
+    )
+    results["update one tick"] = _measure(
+        lambda: indicators_repository.update(tick_df, predicate=MERGE_PREDICATE), repeats
+    )
+    # Switches the table to versioned rows, so it goes last.
+    indicators_repository.upsert_mode = "append"
+    results["upsert one tick, append"] = _measure(lambda: indicators_repository.upsert(tick_df), repeats)
+    results["read last 3 days, versioned"] = _measure(operations["read last 3 days"], repeats)
+    return {
+        "layout": layout,
+        "rows": indicators_df.shape[0],
+        "files": add_actions.num_rows,
+        "table_mb": pc.sum(add_actions["size_bytes"]).as_py() / 1024 / 1024,
+        "seed_seconds": seed_seconds,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, default=193)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 90])
+    parser.add_argument("--layouts", nargs="+", choices=list(LAYOUTS), default=list(LAYOUTS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--root", help="Storage root for the generated tables.")
+    parser.add_argument("--compact", action="store_true", help="Store the indicators as float32.")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as workdir:
+        root = args.root or os.path.join(workdir, "tables")
+        for days in args.days:
+            ohlcv_path = os.path.join(workdir, f"ohlcv_{days}d.arrow")
+            indicators_path = os.path.join(workdir, f"indicators_{days}d.arrow")
+            ohlcv_df, indicators_df = generate_tables(args.coins, days)
+            ohlcv_df.write_ipc(ohlcv_path)
+            indicators_df.write_ipc(indicators_path)
+            del ohlcv_df, indicators_df
+
+            for layout in args.layouts:
+                storage_root = f"{root.rstrip('/')}/{days}d-{layout}-{int(time.time())}"
+                with context.Pool(1) as pool:
+                    result = pool.apply(
+                        _run_layout,
+                        (layout, ohlcv_path, indicators_path, storage_root, args.repeats, args.compact),
+                    )
+                print(
+                    f"\n{days} days, {args.coins} coins, {result['rows']} rows, layout {layout}: "
+                    f"{result['files']} files ({result['table_mb']:.1f} MB), seeded in {result['seed_seconds']:.1f}s"
+                )
+                print(f"{'operation':<34} {'median s':>10} {'peak MB':>10}")
+                for name, (median_seconds, peak_rss_mb) in result["results"].items():
+                    print(f"{name:<34} {median_seconds:>10.3f} {peak_rss_mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Seed-sized indicator writes and merges through the Arrow path of
+DeltaRepository, against the pandas round trip it replaced.
+
+    python -m apps.fridon_crones.benchmarks.write_path [--coins 193] [--days 3] [--repeats 3]
+
+Every variant runs in a fresh process that memory-maps the same input. RSS
+is sampled while each operation runs (Linux only), and its peak above the
+RSS right before is what the operation itself allocated.
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+import polars as pl
+from deltalake import DeltaTable, write_deltalake
+
+from apps.fridon_crones.benchmarks.common import generate_tables, peak_rss_growth
+from libs.repositories import IndicatorsRepository
+
+MERGE_PREDICATE = "s.timestamp == t.timestamp AND s.coin == t.coin"
+
+VARIANTS = ["pandas-write", "arrow-write", "pandas-merge", "arrow-merge"]
+
+
+def _pandas_write(repository: IndicatorsRepository, df: pl.DataFrame) -> None:
+    write_deltalake(
+        repository.s3_path,
+        repository._cluster(df).to_pandas(),
+        schema=repository.table_schema,
+        partition_by=repository.partition_columns,
+        mode="append",
+    )
+
+
+def _pandas_merge(repository: IndicatorsRepository, df: pl.DataFrame) -> None:
+    DeltaTable(repository.s3_path).merge(
+        source=repository._cluster(df).to_pandas(), predicate=MERGE_PREDICATE, source_alias="s", target_alias="t"
+    ).when_matched_update_all().when_not_matched_insert_all().execute()
+
+
+def _run_variant(variant: str, input_path: str, repeats: int) -> dict:
+    df = pl.read_ipc(input_path, memory_map=True)
+    durations = []
+    memory: dict = {}
+    for repeat in range(repeats):
+        with tempfile.TemporaryDirectory() as root:
+            repository = IndicatorsRepository(table_name=f"indicators_{repeat}", storage_root=root)
+            if variant.endswith("merge"):
+                repository.write(df)
+
+            with peak_rss_growth(memory):
+                start = time.perf_counter()
+                if variant == "pandas-write":
+                    _pandas_write(repository, df)
+                elif variant == "arrow-write":
+                    repository.write(df)
+                elif variant == "pandas-merge":
+                    _pandas_merge(repository, df)
+                else:
+                    repository.update(df, predicate=MERGE_PREDICATE)
+                durations.append(time.perf_counter() - start)
+    return {
+        "variant": variant,
+        "rows": df.shape[0],
+        "median_seconds": statistics.median(durations),
+        "peak_rss_mb": memory["peak_rss_mb"],
+    }
+
+
+def build_input(coins: int, days: int, path: str) -> int:
+    _, indicators_df = generate_tables(coins, days)
+    indicators_df.write_ipc(path)
+    return indicators_df.shape[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coins", type=int, default=193)
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        input_path = os.path.join(workdir, "indicators.arrow")
+        rows = build_input(args.coins, args.days, input_path)
+        print(f"{rows} indicator rows, {args.repeats} repeats per variant\n")
+        print(f"{'variant':<14} {'median s':>10} {'peak MB':>10}")
+
+        context = multiprocessing.get_context("spawn")
+        for variant in VARIANTS:
+            with context.Pool(1) as pool:
+                result = pool.apply(_run_variant, (variant, input_path, args.repeats))
+            print(
+                f"{result['variant']:<14} {result['median_seconds']:>10.3f} {result['peak_rss_mb']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
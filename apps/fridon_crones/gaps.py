@@ -0,0 +1,297 @@
+import asyncio
+import datetime
+import logging
+
+import polars as pl
+import pyarrow.compute as pc
+
+from apps.fridon_crones.metrics import provider_request
+from apps.fridon_crones.pipeline import IngestionExecutor
+from apps.fridon_crones.rollups import (
+    INTERVAL_DURATIONS_MS,
+    OHLCV_COLUMNS,
+    bucket_start,
+    bucket_start_expr,
+    ohlcv_frame,
+    with_date_column,
+)
+from libs.repositories import IndicatorsRepository, OhlcvRepository, time_range_filter, time_range_partitions
+from libs.technical_analysis.batch import calculate_ta_indicators_batch
+
+logger = logging.getLogger(__name__)
+
+
+def _empty_ohlcv() -> pl.DataFrame:
+    return pl.DataFrame(
+        schema={
+            "coin": pl.String,
+            "timestamp": pl.Int64,
+            **{column: pl.Float64 for column in OHLCV_COLUMNS[2:]},
+        }
+    )
+
+
+def find_missing_buckets(
+    stored_df: pl.DataFrame,
+    coins: list[str],
+    interval_name: str,
+    start: int,
+    end: int,
+) -> pl.DataFrame:
+    """Bucket timestamps in [start, end) that have no stored bar, per coin."""
+    duration = INTERVAL_DURATIONS_MS[interval_name]
+    first = bucket_start(start, interval_name)
+    if first < start:
+        first += duration
+
+    expected = pl.DataFrame({"coin": coins}, schema={"coin": pl.String}).join(
+        pl.DataFrame({"timestamp": pl.int_range(first, end, duration, eager=True)}),
+        how="cross",
+    )
+    return expected.join(
+        stored_df.select(pl.col("coin").cast(pl.String), pl.col("timestamp").cast(pl.Int64)),
+        on=["coin", "timestamp"],
+        how="anti",
+    )
+
+
+def collapse_gaps(missing_df: pl.DataFrame, interval_name: str) -> pl.DataFrame:
+    """Collapses missing bucket timestamps into per-coin [start, end] ranges."""
+    duration = INTERVAL_DURATIONS_MS[interval_name]
+    return (
+        missing_df.unique()
+        .sort("coin", "timestamp")
+        .with_columns(
+            (pl.col("timestamp").diff() != duration)
+            .fill_null(True)
+            .cum_sum()
+            .over("coin")
+            .alias("_run")
+        )
+        .group_by("coin", "_run")
+        .agg(
+            pl.min("timestamp").alias("start"),
+            pl.max("timestamp").alias("end"),
+            pl.len().alias("bars"),
+        )
+        .drop("_run")
+        .sort("coin", "start")
+    )
+
+
+class GapScanner:
+    """
+    Finds and fills holes in the `ohlcv_<interval>` tables, e.g. after the
+    container was down for a few ticks.
+
+    Stored timestamps are compared with the expected bucket timestamps of every
+    closed bucket in the lookback window. The first scan covers the whole
+    window, later ones only what was closed since the previous completed
+    catch-up, so an interrupted one is redone. A range whose fetch failed
+    stays unverified from its start and is scanned again on the next
+    catch-up. Higher intervals also refetch buckets that were rolled up over
+    a raw gap.
+
+    Missing ranges are fetched in bulk, one provider call per distinct range
+    and coin chunk, and indicators are recomputed only from the first gap of
+    each coin onwards.
+    """
+
+    def __init__(
+        self,
+        data_provider,
+        executor: IngestionExecutor,
+        coins: list[str],
+        interval_to_days: dict[str, int],
+        fetch_chunk_size: int = 20,
+        fetch_concurrency: int = 3,
+        warmup_points: int = 200,
+    ):
+        self.data_provider = data_provider
+        self.executor = executor
+        self.coins = coins
+        self.interval_to_days = interval_to_days
+        self.fetch_chunk_size = fetch_chunk_size
+        self.fetch_concurrency = fetch_concurrency
+        self.warmup_points = warmup_points
+        self.verified_until: dict[str, int] = {}
+
+    async def catch_up(
+        self, interval_names: list[str], now: int
+    ) -> dict[str, pl.DataFrame]:
+        """Returns the bars written per interval; empty frames when nothing was missing."""
+        filled = {}
+        raw_missing = None
+        if "raw" in interval_names:
+            raw_missing = await self.scan("raw", now)
+            filled["raw"], unfilled_from = await self.fill("raw", raw_missing)
+            self._verify("raw", now, unfilled_from)
+
+        higher_intervals = [name for name in interval_names if name != "raw"]
+        results = await asyncio.gather(
+            *[
+                self._catch_up_interval(interval_name, now, raw_missing)
+                for interval_name in higher_intervals
+            ]
+        )
+        filled.update(zip(higher_intervals, results))
+        return filled
+
+    async def _catch_up_interval(
+        self, interval_name: str, now: int, raw_missing: pl.DataFrame | None
+    ) -> pl.DataFrame:
+        missing = await self.scan(interval_name, now)
+        if raw_missing is not None and not raw_missing.is_empty():
+            # Buckets rolled up while raw bars were missing are incomplete.
+            end = bucket_start(now, interval_name)
+            missing = pl.concat(
+                [
+                    missing,
+                    raw_missing.select(
+                        "coin", bucket_start_expr(interval_name).alias("timestamp")
+                    ).filter(pl.col("timestamp") < end),
+                ]
+            ).unique()
+        filled, unfilled_from = await self.fill(interval_name, missing)
+        self._verify(interval_name, now, unfilled_from)
+        return filled
+
+    def _verify(self, interval_name: str, now: int, unfilled_from: int | None) -> None:
+        verified_until = bucket_start(now, interval_name)
+        if unfilled_from is not None:
+            verified_until = min(verified_until, unfilled_from)
+            logger.warning(
+                f"{interval_name} gaps from {unfilled_from} were not fetched; they are scanned again next time."
+            )
+        self.verified_until[interval_name] = verified_until
+
+    async def scan(self, interval_name: str, now: int) -> pl.DataFrame:
+        provider_interval = "30m" if interval_name == "raw" else interval_name
+        lookback_start = now - self.interval_to_days[provider_interval] * 24 * 60 * 60 * 1000
+        start = max(lookback_start, self.verified_until.get(interval_name, lookback_start))
+        end = bucket_start(now, interval_name)
+        if start >= end:
+            return pl.DataFrame(schema={"coin": pl.String, "timestamp": pl.Int64})
+
+        repository = OhlcvRepository(table_name=f"ohlcv_{interval_name}")
+        try:
+            stored_df = await self.executor.run_io(
+                repository.read,
+                filters=time_range_filter(start, end, closed="left"),
+                partition_hints=time_range_partitions(start, end, closed="left"),
+                columns=["coin", "timestamp"],
+                order_by="timestamp",
+            )
+        except FileNotFoundError:
+            stored_df = pl.DataFrame(schema={"coin": pl.String, "timestamp": pl.Int64})
+
+        missing = find_missing_buckets(stored_df, self.coins, interval_name, start, end)
+        if not missing.is_empty():
+            logger.warning(
+                f"Found {missing.shape[0]} missing {interval_name} bars for "
+                f"{missing['coin'].n_unique()} coins."
+            )
+        return missing
+
+    async def fill(
+        self, interval_name: str, missing: pl.DataFrame
+    ) -> tuple[pl.DataFrame, int | None]:
+        """
+        Fetches and writes the missing bars. Returns them, with the start of
+        the earliest range whose fetch failed, or None if every fetch went
+        through (bars the provider does not have count as filled).
+        """
+        if missing.is_empty():
+            return with_date_column(_empty_ohlcv()), None
+
+        gaps = collapse_gaps(missing, interval_name)
+        fetched_df, unfilled_from = await self._fetch(interval_name, gaps)
+        fetched_df = fetched_df.join(missing, on=["coin", "timestamp"], how="semi")
+        logger.info(
+            f"Fetched {fetched_df.shape[0]} of {missing.shape[0]} missing {interval_name} bars."
+        )
+        if fetched_df.is_empty():
+            return with_date_column(fetched_df), unfilled_from
+
+        ohlcv_df = with_date_column(fetched_df)
+        ohlcv_repository = OhlcvRepository(table_name=f"ohlcv_{interval_name}")
+        await self.executor.run_io(ohlcv_repository.upsert, ohlcv_df)
+        await self._recompute_indicators(interval_name, ohlcv_repository, ohlcv_df)
+        return ohlcv_df, unfilled_from
+
+    async def _fetch(
+        self, interval_name: str, gaps: pl.DataFrame
+    ) -> tuple[pl.DataFrame, int | None]:
+        provider_interval = "30m" if interval_name == "raw" else interval_name
+        duration = INTERVAL_DURATIONS_MS[interval_name]
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+
+        # After an outage most coins miss the same range, so they share a call.
+        ranges = gaps.group_by("start", "end").agg(pl.col("coin")).sort("start")
+
+        async def _fetch_range(coins: list[str], start: int, end: int) -> list[dict] | None:
+            async with semaphore:
+                try:
+                    with provider_request("get_historical_ohlcv_by_start_end", len(coins)):
+                        return await self.data_provider.get_historical_ohlcv_by_start_end(
+                            coins,
+                            provider_interval,
+                            datetime.datetime.fromtimestamp(start / 1000, datetime.UTC),
+                            # Providers differ on whether the end is inclusive.
+                            datetime.datetime.fromtimestamp(
+                                (end + duration) / 1000, datetime.UTC
+                            ),
+                            output_format="dict",
+                        ) or []
+                except Exception as e:
+                    logger.error(f"Error fetching {interval_name} gap for {coins}: {e}")
+                    return None
+
+        calls = [
+            (row["coin"][i : i + self.fetch_chunk_size], row["start"], row["end"])
+            for row in ranges.iter_rows(named=True)
+            for i in range(0, len(row["coin"]), self.fetch_chunk_size)
+        ]
+        results = await asyncio.gather(*[_fetch_range(*call) for call in calls])
+        unfilled_from = min(
+            (start for (_, start, _), result in zip(calls, results) if result is None), default=None
+        )
+        records = [record for result in results if result for record in result]
+        if not records:
+            return _empty_ohlcv(), unfilled_from
+        return ohlcv_frame(records).unique(subset=["coin", "timestamp"], keep="last"), unfilled_from
+
+    async def _recompute_indicators(
+        self,
+        interval_name: str,
+        ohlcv_repository: OhlcvRepository,
+        filled_df: pl.DataFrame,
+    ) -> None:
+        first_gaps = filled_df.group_by("coin").agg(pl.min("timestamp").alias("first_gap"))
+        coins = first_gaps["coin"].to_list()
+        warmup_start = (
+            first_gaps["first_gap"].min()
+            - self.warmup_points * INTERVAL_DURATIONS_MS[interval_name]
+        )
+        history_df = await self.executor.run_io(
+            ohlcv_repository.read,
+            filters=time_range_filter(warmup_start) & pc.field("coin").isin(coins),
+            partition_hints=time_range_partitions(warmup_start, coins=coins),
+            columns=OHLCV_COLUMNS,
+            order_by="timestamp",
+        )
+        indicators_df = await self.executor.run_cpu(
+            calculate_ta_indicators_batch, history_df, return_last_one=False
+        )
+        indicators_df = (
+            indicators_df.join(first_gaps, on="coin")
+            .filter(pl.col("timestamp") >= pl.col("first_gap"))
+            .drop("first_gap")
+        )
+        if indicators_df.is_empty():
+            return
+        indicators_repository = IndicatorsRepository(table_name=f"indicators_{interval_name}")
+        await self.executor.run_io(indicators_repository.upsert, indicators_df)
+        logger.info(
+            f"Recomputed {indicators_df.shape[0]} {interval_name} indicator rows for {len(coins)} coins."
+        )
@@ -0,0 +1,64 @@
+import logging
+import os
+import time
+
+import polars as pl
+
+from libs.repositories.hot_window import HotWindowRepository
+
+logger = logging.getLogger(__name__)
+
+
+class HotWindow:
+    """
+    The last `size` indicator rows (bars included) per coin and interval,
+    kept in memory and published to Redis after every tick so readers skip
+    the Delta scan.
+    """
+
+    def __init__(self, size: int | None = None):
+        self.size = size or int(os.environ.get("CRONES_HOT_WINDOW_SIZE", 50))
+        self.frames: dict[str, pl.DataFrame] = {}
+        self.repositories: dict[str, HotWindowRepository] = {}
+
+    def needs_bootstrap(self, interval_name: str) -> bool:
+        return interval_name not in self.frames
+
+    def bootstrap(self, interval_name: str, history_df: pl.DataFrame) -> None:
+        self.frames[interval_name] = self._trim(history_df)
+        logger.info(
+            f"Hot window for {interval_name} bootstrapped with {history_df.shape[0]} rows."
+        )
+
+    def update(self, interval_name: str, indicators_df: pl.DataFrame) -> pl.DataFrame:
+        current = self.frames.get(interval_name)
+        if current is not None and not current.is_empty():
+            indicators_df = pl.concat([current, indicators_df], how="vertical_relaxed")
+        self.frames[interval_name] = self._trim(indicators_df)
+        return self.frames[interval_name]
+
+    def reset(self, interval_name: str) -> None:
+        self.frames.pop(interval_name, None)
+
+    async def publish(self, interval_name: str) -> None:
+        df = self.frames.get(interval_name)
+        if df is None or df.is_empty():
+            return
+        version = int(time.time() * 1000)
+        repository = self.repositories.get(interval_name)
+        if repository is None:
+            repository = self.repositories[interval_name] = HotWindowRepository(interval=interval_name)
+        await repository.publish(df, version)
+        logger.info(
+            f"Published hot window for {interval_name}: {df.shape[0]} rows, version {version}."
+        )
+
+    def _trim(self, df: pl.DataFrame) -> pl.DataFrame:
+        if df.is_empty():
+            return df
+        return (
+            df.unique(subset=["coin", "timestamp"], keep="last", maintain_order=True)
+            .sort("coin", "timestamp")
+            .group_by("coin", maintain_order=True)
+            .tail(self.size)
+        )
@@ -3,19 +3,32 @@ import datetime
 import logging
 import os
 
-import aiocron
 import polars as pl
 import pyarrow.compute as pc
-
-from libs.internals.indicators import calculate_ta_indicators
-from libs.repositories import IndicatorsRepository, OhlcvRepository
+from fridonai_core.crons.registry import ensure_cron_registry
+
+from apps.fridon_crones.backfill import Backfill
+from apps.fridon_crones.gaps import GapScanner
+from apps.fridon_crones.hot_window import HotWindow
+from apps.fridon_crones.metrics import TickReport, provider_request, start_metrics_server
+from apps.fridon_crones.pipeline import (
+    IngestionExecutor,
+    Stage,
+    advance_indicator_states_task,
+    run_stages,
+)
+from apps.fridon_crones.rollups import OHLCV_COLUMNS, RollupEngine, ohlcv_frame, with_date_column
+from apps.fridon_crones.scheduler import OverrunSafeScheduler, TickContext
+from apps.fridon_crones.sharding import ShardCoordinator
+import libs.repositories.crons  # noqa: F401  registers the Delta maintenance cron
+from libs.repositories import IndicatorsRepository, OhlcvRepository, time_range_filter, time_range_partitions
+from libs.repositories.redis import RedisRepository
+from libs.technical_analysis.incremental import IndicatorState
 
 if os.environ.get("DATA_PROVIDER") == "binance":
-    from libs.data_providers import BinanceCoinPriceDataProvider as DataProvider
-elif os.environ.get("DATA_PROVIDER") == "coinpaprika":
-    from libs.data_providers import CoinPaprikaCoinPriceDataProvider as DataProvider
+    from libs.data_providers import BinanceOHLCVProvider as DataProvider
 else:
-    from libs.data_providers import DummyCoinPriceDataProvider as DataProvider
+    from libs.data_providers import DummyOHLCVProvider as DataProvider
 
 
 logging.basicConfig(level=logging.INFO)
@@ -23,6 +36,44 @@ logger = logging.getLogger(__name__)
 
 interval_names = ["raw", "1h", "4h", "1d"] #, "1w"]
 
+# Intervals shed when a tick is behind schedule; their bars are deferred.
+OPTIONAL_INTERVALS = ["4h", "1d", "1w"]
+
+# Seconds each kind of stage may take, on top of the tick deadline.
+STAGE_BUDGETS = {
+    "fetch": 180,
+    "catch_up": 300,
+    "rollup": 120,
+    "write_ohlcv": 300,
+    "compute_indicators": 300,
+    "write_indicators": 300,
+    "publish_hot_window": 60,
+}
+
+# Bars replayed to build the indicator state of a coin that has none yet.
+STATE_BOOTSTRAP_POINTS = 200
+
+# Days of history seeded per provider interval, also the gap scan lookback.
+INTERVAL_TO_DAYS = {
+    "30m": 3,
+    "1h": 5,
+    "4h": 22,
+    "1d": 80,
+    "1w": 400,
+}
+
+indicator_states: dict[str, dict[str, IndicatorState]] = {}
+
+deferred_rollups: dict[str, pl.DataFrame] = {}
+
+executor = IngestionExecutor()
+
+shard_coordinator = ShardCoordinator()
+
+hot_window = HotWindow()
+
+rollup_engine = RollupEngine([name for name in interval_names if name != "raw"])
+
 COINS = [
     "BTC",
     "ETH",
@@ -146,306 +197,424 @@ COINS = [
     "IMX",
     "SSV",
     "AI",
-    # "BAR",
-    # "GAS",
-    # "KAVA",
-    # "DYM",
-    # "JUV",
-    # "ETC",
-    # "CITY",
-    # "XAI",
-    # "ASTR",
-    # "CVP",
-    # "VIDT",
-    # "ACM",
-    # "MASK",
-    # "ENS",
-    # "RSR",
-    # "ARK",
-    # "APE",
-    # "AUDIO",
-    # "PORTAL",
-    # "REI",
-    # "CAKE",
-    # "REZ",
-    # "MINA",
-    # "VET",
-    # "ORN",
-    # "ALGO",
-    # "VANRY",
-    # "AST",
-    # "HIGH",
-    # "GMT",
-    # "AEVO",
-    # "LEVER",
-    # "FIO",
-    # "EOS",
-    # "AXS",
-    # "SNT",
-    # "AXL",
-    # "UNFI",
-    # "COS",
-    # "REEF",
-    # "XLM",
-    # "TRU",
-    # "AMP",
-    # "TNSR",
-    # "EPX",
-    # "COTI",
-    # "THETA",
-    # "VIC",
-    # "RAD",
-    # "CYBER",
-    # "RARE",
-    # "EDU",
-    # "EGLD",
-    # "UMA",
-    # "LISTA",
-    # "LPT",
-    # "FOR",
-    # "ACE",
-    # "NEO",
-    # "BAKE",
-    # "SYN",
-    # "FRONT",
-    # "SNX",
-    # "KDA",
-    # "TWT",
-    # "DODO",
-    # "ONG",
-    # "CTXC",
-    # "FLOW",
-    # "RDNT",
-    # "VIB",
-    # "SLF",
-    # "PYR",
+    "BAR",
+    "GAS",
+    "KAVA",
+    "DYM",
+    "JUV",
+    "ETC",
+    "CITY",
+    "XAI",
+    "ASTR",
+    "CVP",
+    "VIDT",
+    "ACM",
+    "MASK",
+    "ENS",
+    "RSR",
+    "ARK",
+    "APE",
+    "AUDIO",
+    "PORTAL",
+    "REI",
+    "CAKE",
+    "REZ",
+    "MINA",
+    "VET",
+    "ORN",
+    "ALGO",
+    "VANRY",
+    "AST",
+    "HIGH",
+    "GMT",
+    "AEVO",
+    "LEVER",
+    "FIO",
+    "EOS",
+    "AXS",
+    "SNT",
+    "AXL",
+    "UNFI",
+    "COS",
+    "REEF",
+    "XLM",
+    "TRU",
+    "AMP",
+    "TNSR",
+    "EPX",
+    "COTI",
+    "THETA",
+    "VIC",
+    "RAD",
+    "CYBER",
+    "RARE",
+    "EDU",
+    "EGLD",
+    "UMA",
+    "LISTA",
+    "LPT",
+    "FOR",
+    "ACE",
+    "NEO",
+    "BAKE",
+    "SYN",
+    "FRONT",
+    "SNX",
+    "KDA",
+    "TWT",
+    "DODO",
+    "ONG",
+    "CTXC",
+    "FLOW",
+    "RDNT",
+    "VIB",
+    "SLF",
+    "PYR",
 ]
 
+gap_scanner = GapScanner(
+    data_provider=DataProvider(),
+    executor=executor,
+    coins=COINS,
+    interval_to_days=INTERVAL_TO_DAYS,
+)
 
-async def data_ingestion_job():
-    logger.info(f"\n\nStarting data ingestion job. {datetime.datetime.now(datetime.UTC).isoformat()}\n\n")
-    await update_ohlcv_data()
-    await update_indicators_data()
 
+async def data_ingestion_job(context: TickContext | None = None):
+    logger.info(f"\n\nStarting data ingestion job. {datetime.datetime.now(datetime.UTC).isoformat()}\n\n")
+    report = TickReport("data_ingestion")
+    try:
+        await run_ingestion_tick(context)
+    finally:
+        report.finish()
+
+
+async def run_ingestion_tick(context: TickContext | None = None):
+    deadline = context.deadline if context is not None else None
+    active_intervals = [
+        interval_name
+        for interval_name in interval_names
+        if not (context is not None and context.behind and interval_name in OPTIONAL_INTERVALS)
+    ]
+    if len(active_intervals) < len(interval_names):
+        logger.warning(
+            f"Behind schedule, deferring {sorted(set(interval_names) - set(active_intervals))}."
+        )
 
-async def update_ohlcv_data():
     data_provider = DataProvider()
-    raw_data = await data_provider.get_current_ohlcv(COINS, interval="30m")
-    current_time = datetime.datetime.fromtimestamp(raw_data[0]["timestamp"] // 1000)
-    raw_repository = OhlcvRepository(table_name="ohlcv_raw")
-    df = pl.from_records(raw_data)
-
-    raw_repository.update(df, predicate="s.timestamp == t.timestamp")
-
-    for interval_name in interval_names[1:]:
-        interval_repository = OhlcvRepository(table_name=f"ohlcv_{interval_name}")
-        await update_interval_data(
-            interval_repository,
-            interval_name,
-            df,
-            current_time,
-        )
 
+    async def fetch_shard(coins: list[str]) -> list[dict]:
+        with provider_request("get_current_ohlcv", len(coins)):
+            return await data_provider.get_current_ohlcv(coins, interval="30m")
 
-async def update_interval_data(
-    repository: OhlcvRepository, 
-    interval_name: str, 
-    new_data_df: pl.DataFrame, 
-    current_time: datetime.datetime
-):
-    logger.info(f"Updating interval data for {interval_name}.")
     try:
-        existing_df = repository.get_last_records(number_of_points=1, last_n=True)
-        logger.info(f"Existing records for {interval_name}: {existing_df.shape[0]}")
-    except Exception as e:
-        logger.error(f"Error reading interval data for {interval_name}: {e}")
-        existing_df = pl.DataFrame()
-
-    if not existing_df.is_empty():
-        logger.info(f"Updating existing interval record for {interval_name}.")
-        updated_df = update_interval_record(existing_df, new_data_df)
-
-        repository.update(updated_df, predicate="s.timestamp == t.timestamp AND s.coin == t.coin")
+        raw_data = await asyncio.wait_for(
+            shard_coordinator.gather_coins(fetch_shard, COINS),
+            timeout=stage_budget("fetch", context),
+        )
+    except asyncio.TimeoutError:
+        logger.error("Fetching current bars ran out of its budget, skipping the tick.")
+        return
+    if not raw_data:
+        logger.warning("No OHLCV data fetched, skipping the tick.")
+        return
+
+    raw_df = ohlcv_frame(raw_data)
+    if context is not None and context.behind:
+        # Gaps stay unverified and are picked up by the next tick on time.
+        logger.warning("Behind schedule, skipping gap catch-up.")
     else:
-        logger.info(f"Creating new interval record for {interval_name}.")
-        new_interval_df = create_new_interval_record(
-            current_time, interval_name, new_data_df
+        try:
+            await asyncio.wait_for(
+                catch_up_gaps(raw_df["timestamp"].max()),
+                timeout=stage_budget("catch_up", context),
+            )
+        except asyncio.TimeoutError:
+            logger.error("Gap catch-up ran out of its budget, continuing with the tick.")
+
+    stages = [
+        Stage(
+            name="rollup",
+            run=lambda _: rollup_intervals(raw_df, active_intervals),
+            timeout=STAGE_BUDGETS["rollup"],
+        )
+    ]
+    for interval_name in active_intervals:
+        stages.extend(build_interval_stages(interval_name))
+    results = await run_stages(stages, deadline=deadline)
+
+    for interval_name in active_intervals:
+        computed = results.get(f"compute_indicators_{interval_name}")
+        if computed is not None and f"write_indicators_{interval_name}" not in results:
+            # The states never got committed and their bars may be missing from
+            # the table, rebuild them from the stored history on the next tick.
+            await discard_indicator_states(interval_name, computed[0]["coin"].unique().to_list())
+
+
+def stage_budget(stage_kind: str, context: TickContext | None) -> float:
+    if context is None:
+        return STAGE_BUDGETS[stage_kind]
+    return min(STAGE_BUDGETS[stage_kind], context.remaining())
+
+
+def build_interval_stages(interval_name: str) -> list[Stage]:
+    """
+    rollup -> write_ohlcv ------------------> write_indicators -> publish_hot_window
+           -> compute_indicators ----------/
+    The rollup is shared; intervals are independent of each other after it.
+    write_indicators also replaces the interval's latest-row snapshot.
+    """
+    ohlcv_repository = OhlcvRepository(table_name=f"ohlcv_{interval_name}")
+    indicators_repository = IndicatorsRepository(table_name=f"indicators_{interval_name}")
+    latest_repository = indicators_repository.latest_snapshot()
+
+    async def write_ohlcv(dependencies: dict) -> None:
+        new_bars_df = dependencies["rollup"][interval_name]
+        if new_bars_df.is_empty():
+            return
+        # compute_indicators reads the same frame concurrently and the Arrow
+        # export borrows it mutably, so the writer gets its own (cheap) clone.
+        await executor.run_io(ohlcv_repository.upsert, new_bars_df.clone())
+
+    async def compute_indicators(
+        dependencies: dict,
+    ) -> tuple[pl.DataFrame, dict[str, IndicatorState]]:
+        return await calculate_interval_indicators(
+            interval_name, ohlcv_repository, dependencies["rollup"][interval_name]
         )
-        repository.update(new_interval_df, predicate="s.timestamp == t.timestamp AND s.coin == t.coin")
-
-
-def update_interval_record(existing_df, new_data_df):
-    updated_df = existing_df.join(new_data_df, on=["coin"], how="left", suffix="_new")
-    updated_df = updated_df.with_columns(
-        [
-            pl.when(pl.col("high_new") > pl.col("high"))
-            .then(pl.col("high_new"))
-            .otherwise(pl.col("high"))
-            .alias("high"),
-            pl.when(pl.col("low_new") < pl.col("low"))
-            .then(pl.col("low_new"))
-            .otherwise(pl.col("low"))
-            .alias("low"),
-            pl.col("close_new").alias("close"),
-            (pl.col("volume") + pl.col("volume_new")).alias("volume"),
-        ]
-    )
-
-    updated_df = updated_df.drop(
-        [
-            "open_new",
-            "high_new",
-            "low_new",
-            "close_new",
-            "volume_new",
-            "timestamp_new",
-            "date_new",
-        ]
-    )
-    return updated_df
-
-
-def create_new_interval_record(
-    interval_start_time: datetime.datetime, 
-    interval_name: str, 
-    new_data_df: pl.DataFrame
-):
-    df = new_data_df
-
-    if df.shape[0] == 0:
-        logger.warning(f"No data to create new interval record for {interval_name}.")
-        return pl.DataFrame()
-
-    aggregated_df = df.group_by("coin").agg(
-        [
-            pl.first("open").alias("open"),
-            pl.max("high").alias("high"),
-            pl.min("low").alias("low"),
-            pl.last("close").alias("close"),
-            pl.sum("volume").alias("volume"),
-        ]
-    )
-
-    aggregated_df = aggregated_df.with_columns(
-        [
-            pl.lit(int(interval_start_time.timestamp() * 1000)).alias("timestamp"),
-            pl.lit(interval_start_time.strftime("%Y-%m-%d")).alias("date"),
-        ]
-    )
 
-    return aggregated_df
+    async def write_indicators(dependencies: dict) -> None:
+        indicators_df, advanced_states = dependencies[f"compute_indicators_{interval_name}"]
+        if indicators_df.is_empty():
+            logger.warning(f"No indicators data to write for {interval_name}.")
+            return
+        await executor.run_io(indicators_repository.upsert, indicators_df)
+        logger.info(f"Write indicators data for {interval_name}.")
+        # Only after the history commit, so the snapshot never runs ahead of it.
+        await executor.run_io(latest_repository.replace, indicators_df)
+        await commit_indicator_states(interval_name, advanced_states)
+
+    async def publish_hot_window(dependencies: dict) -> None:
+        indicators_df, _ = dependencies[f"compute_indicators_{interval_name}"]
+        if indicators_df.is_empty():
+            return
+        if hot_window.needs_bootstrap(interval_name):
+            try:
+                history_df = await executor.run_io(
+                    indicators_repository.get_last_records,
+                    number_of_points=hot_window.size,
+                    last_n=True,
+                )
+            except FileNotFoundError:
+                history_df = indicators_df.clear()
+            hot_window.bootstrap(interval_name, history_df)
+        hot_window.update(interval_name, indicators_df)
+        await hot_window.publish(interval_name)
+
+    return [
+        Stage(
+            name=f"write_ohlcv_{interval_name}",
+            run=write_ohlcv,
+            timeout=STAGE_BUDGETS["write_ohlcv"],
+            depends_on=["rollup"],
+        ),
+        Stage(
+            name=f"compute_indicators_{interval_name}",
+            run=compute_indicators,
+            timeout=STAGE_BUDGETS["compute_indicators"],
+            depends_on=["rollup"],
+        ),
+        Stage(
+            name=f"write_indicators_{interval_name}",
+            run=write_indicators,
+            timeout=STAGE_BUDGETS["write_indicators"],
+            depends_on=[
+                f"write_ohlcv_{interval_name}",
+                f"compute_indicators_{interval_name}",
+            ],
+        ),
+        Stage(
+            name=f"publish_hot_window_{interval_name}",
+            run=publish_hot_window,
+            timeout=STAGE_BUDGETS["publish_hot_window"],
+            depends_on=[
+                f"compute_indicators_{interval_name}",
+                f"write_indicators_{interval_name}",
+            ],
+        ),
+    ]
+
+
+async def rollup_intervals(
+    raw_df: pl.DataFrame, active_intervals: list[str]
+) -> dict[str, pl.DataFrame]:
+    """
+    Derives every higher interval from the raw bars without reading its table.
+    Bars of skipped intervals are held back and written with their next run,
+    so the final revision of a bucket closed meanwhile is not lost.
+    """
+    history_from = rollup_engine.needs_history(raw_df)
+    if history_from is not None:
+        raw_repository = OhlcvRepository(table_name="ohlcv_raw")
+        logger.info(f"Hydrating rollup buffer from {raw_repository.table_name} since {history_from}.")
+        try:
+            history_df = await executor.run_io(
+                raw_repository.read,
+                filters=time_range_filter(history_from),
+                partition_hints=time_range_partitions(history_from),
+                columns=OHLCV_COLUMNS,
+                order_by="timestamp",
+            )
+        except FileNotFoundError:
+            history_df = raw_df.clear()
+        rollup_engine.hydrate(history_df, history_from)
+
+    rollups = {"raw": with_date_column(raw_df)}
+    for interval_name, df in rollup_engine.update(raw_df).items():
+        deferred_df = deferred_rollups.pop(interval_name, None)
+        if deferred_df is not None:
+            df = (
+                pl.concat([deferred_df, df])
+                .unique(subset=["coin", "timestamp"], keep="last", maintain_order=True)
+                .sort("coin", "timestamp")
+            )
+        if interval_name not in active_intervals:
+            deferred_rollups[interval_name] = df
+            continue
+        logger.info(f"Rolled up {df.shape[0]} {interval_name} bars.")
+        rollups[interval_name] = df
+    return rollups
 
 
-async def update_indicators_data():
-    for interval_name in interval_names:
-        logger.info(f"Calculating indicators for {interval_name}.")
-        ohlcv_repository = OhlcvRepository(table_name=f"ohlcv_{interval_name}")
-        indicators_repository = IndicatorsRepository(table_name=f"indicators_{interval_name}")
-        update_indicators_df = pl.DataFrame()
-
-        last_coins_records_df = ohlcv_repository.get_last_records(
-            number_of_points=50, 
-            columns=[
-                "coin",
-                "timestamp",
-                "open",
-                "high",
-                "low",
-                "close",
-                "volume",
-            ],
-            last_n=True,                 
+async def catch_up_gaps(now: int) -> None:
+    try:
+        filled = await gap_scanner.catch_up(interval_names, now)
+    except Exception as e:
+        logger.error(f"Error catching up gaps: {e}")
+        return
+
+    for interval_name, filled_df in filled.items():
+        if filled_df.is_empty():
+            continue
+        # The stored history changed under these coins, replay it on the next tick.
+        hot_window.reset(interval_name)
+        await discard_indicator_states(interval_name, filled_df["coin"].unique().to_list())
+
+    raw_filled_df = filled.get("raw")
+    if raw_filled_df is not None and rollup_engine.covered_from is not None:
+        rollup_engine.hydrate(
+            raw_filled_df.filter(pl.col("timestamp") >= rollup_engine.covered_from),
+            rollup_engine.covered_from,
         )
-        logger.info(f"Fetched Last coins records for {interval_name}: {last_coins_records_df.shape[0]}, total coins: {len(COINS)}")
-        for coin in COINS:
-            last_coin_records_df = last_coins_records_df.filter(pl.col("coin") == coin)
-            try:
-                last_coin_records_indicators_df = calculate_ta_indicators(last_coin_records_df)
-            except Exception as e:
-                logger.error(f"Error calculating indicators for {coin}-{interval_name}: {e}")
-                continue
 
-            if update_indicators_df.is_empty():
-                update_indicators_df = last_coin_records_indicators_df
-            else:
-                update_indicators_df = pl.concat([update_indicators_df, last_coin_records_indicators_df], how="vertical_relaxed")
 
-        if not update_indicators_df.is_empty():
-            indicators_repository.update(update_indicators_df, predicate="s.timestamp == t.timestamp AND s.coin == t.coin")
-            logger.info(f"Write indicators data for {interval_name}.")
+async def load_indicator_states(interval_name: str) -> dict[str, IndicatorState]:
+    if interval_name not in indicator_states:
+        state_repository = RedisRepository(table_name=f"indicator_state_{interval_name}")
+        indicator_states[interval_name] = {
+            coin: IndicatorState.model_validate(value)
+            for coin, value in await state_repository.all()
+        }
+        logger.info(f"Loaded {len(indicator_states[interval_name])} indicator states for {interval_name}.")
+    return indicator_states[interval_name]
+
+
+async def commit_indicator_states(
+    interval_name: str, advanced_states: dict[str, IndicatorState]
+) -> None:
+    (await load_indicator_states(interval_name)).update(advanced_states)
+    state_repository = RedisRepository(table_name=f"indicator_state_{interval_name}")
+    await state_repository.write_many(
+        {coin: state.model_dump() for coin, state in advanced_states.items()}
+    )
+
 
+async def discard_indicator_states(interval_name: str, coins: list[str]) -> None:
+    states = await load_indicator_states(interval_name)
+    for coin in coins:
+        states.pop(coin, None)
+
+
+async def calculate_interval_indicators(
+    interval_name: str,
+    ohlcv_repository: OhlcvRepository,
+    new_bars_df: pl.DataFrame,
+) -> tuple[pl.DataFrame, dict[str, IndicatorState]]:
+    """
+    Advances copies of the interval's states; they are committed by
+    `commit_indicator_states` once the rows they produced are written.
+    """
+    logger.info(f"Calculating indicators for {interval_name}.")
+    new_bars_df = new_bars_df.filter(pl.col("coin").is_in(COINS)).select(OHLCV_COLUMNS)
+    if new_bars_df.is_empty():
+        logger.warning(f"No new bars for {interval_name}.")
+        return new_bars_df, {}
+
+    states = await load_indicator_states(interval_name)
+    coins = new_bars_df["coin"].unique().to_list()
+    missing_coins = [coin for coin in coins if coin not in states]
+    if missing_coins:
+        logger.info(f"Bootstrapping indicator states for {len(missing_coins)} coins from {ohlcv_repository.table_name}.")
+        history_df = await executor.run_io(
+            ohlcv_repository.get_last_records,
+            pc.field("coin").isin(missing_coins),
+            number_of_points=STATE_BOOTSTRAP_POINTS,
+            columns=OHLCV_COLUMNS,
+            last_n=True,
+        )
+        new_bars_df = pl.concat([history_df.select(OHLCV_COLUMNS), new_bars_df], how="vertical_relaxed")
+
+    shard_dfs = shard_coordinator.split(new_bars_df)
+    results = await asyncio.gather(
+        *[
+            executor.run_cpu(
+                advance_indicator_states_task,
+                {coin: states[coin] for coin in shard_df["coin"].unique() if coin in states},
+                shard_df,
+            )
+            for shard_df in shard_dfs
+        ]
+    )
+    advanced_states = {}
+    for shard_states, _ in results:
+        advanced_states.update(shard_states)
+    return (
+        pl.concat([indicators_df for _, indicators_df in results], how="vertical_relaxed"),
+        advanced_states,
+    )
 
 
 async def seed():
     logger.info("Start Seeding Prices and Indicators data.")
-    interval_to_days = {
-        "30m": 3,
-        "1h": 5,
-        "4h": 22,
-        "1d": 80,
-        "1w": 400,
-    }
-
-    data_provider = DataProvider()
+    backfill = Backfill(
+        data_provider=DataProvider(),
+        executor=executor,
+        coins=COINS,
+        interval_to_days=INTERVAL_TO_DAYS,
+    )
+    await backfill.run(interval_names)
     for interval_name in interval_names:
-        start_time = datetime.datetime.now()
-        logger.info(f"**************************************************")
-        logger.info(f"Seeding ohlcv data with indicators for {interval_name}.")
-        ohlcv_repository = OhlcvRepository(table_name=f"ohlcv_{interval_name}")
-        indicators_repository = IndicatorsRepository(
-            table_name=f"indicators_{interval_name}"
-        )
-        if interval_name == "raw":
-            interval_name = "30m"
-
-        
-        
-        
-        for i in range(0, len(COINS), 20):
-            coin_chunk = COINS[i:i+20]
-            logger.info(f"Handling coins {coin_chunk}")
-            raw_data, _ = await data_provider.get_historical_ohlcv(
-                coin_chunk, interval=interval_name, days=interval_to_days[interval_name]
+        indicators_repository = IndicatorsRepository(table_name=f"indicators_{interval_name}")
+        try:
+            await executor.run_io(
+                indicators_repository.latest_snapshot().rebuild, indicators_repository
             )
-            df = pl.from_records(raw_data)
-            logger.info(f"Records fetched: {df.shape[0]}")
-            ohlcv_repository.write(df)
-
-            seed_indicators_df = pl.DataFrame()
-            
-            for coin in coin_chunk:
-                coin_df = df.filter(pl.col("coin") == coin).select([
-                    "coin", "timestamp", "open", "high", "low", "close", "volume"
-                ])
-                try:
-                    df_indicators = calculate_ta_indicators(coin_df, return_last_one=False)
-                except Exception as e:
-                    logger.error(f"Error calculating indicators for {coin}: {e}")
-                    continue
-                if seed_indicators_df.is_empty():
-                    seed_indicators_df = df_indicators
-                else:
-                    seed_indicators_df = pl.concat([seed_indicators_df, df_indicators], how="vertical_relaxed")
-                    
-                if seed_indicators_df.shape[0] > 4000:
-                    logger.info(f"Number of records to update: {seed_indicators_df.shape[0]}")
-                    indicators_repository.write(seed_indicators_df)
-                    seed_indicators_df = pl.DataFrame()
-
-            if not seed_indicators_df.is_empty():
-                indicators_repository.write(seed_indicators_df)
-            else:
-                logger.warning("No indicators data to update.")
-
-        elapsed_time = datetime.datetime.now() - start_time
-        logger.info(f"Seeded indicators data for {interval_name} Finished. Time taken: {elapsed_time}")
+        except FileNotFoundError:
+            logger.warning(f"No {indicators_repository.table_name} table to snapshot.")
 
     logger.info("****************** Seeding Prices and Indicators data Finished. ******************")
 
 
 async def process(loop):
+    await start_metrics_server()
     await seed()
-    aiocron.crontab("0,30 * * * *", data_ingestion_job, loop=loop)
+    await catch_up_gaps(int(datetime.datetime.now(datetime.UTC).timestamp() * 1000))
+    OverrunSafeScheduler(
+        data_ingestion_job, schedule="0,30 * * * *", drain=executor.wait_for_io
+    ).start(loop)
+    # Maintenance shares the table locks with the ingestion stages, so it
+    # never commits concurrently with a merge into the same table.
+    loop.create_task(ensure_cron_registry().start_crons())
 
 def main():
     logger.info("Starting the scheduler.")
@@ -458,6 +627,7 @@ def main():
     except KeyboardInterrupt:
         logger.info("Shutting down.")
     finally:
+        executor.shutdown()
         loop.close()
 
 
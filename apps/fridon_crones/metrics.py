@@ -0,0 +1,109 @@
+import datetime
+import json
+import logging
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import polars as pl
+from aiohttp import web
+
+from libs.utils.metrics import diff_snapshots, metrics
+
+logger = logging.getLogger(__name__)
+
+STAGE_SECONDS = metrics.histogram(
+    "crones_stage_duration_seconds", "Ingestion stage latency."
+)
+STAGE_ROWS = metrics.counter(
+    "crones_stage_rows_total", "Rows returned by ingestion stages."
+)
+STAGE_FAILURES = metrics.counter(
+    "crones_stage_failures_total", "Ingestion stages that failed or were skipped."
+)
+PROVIDER_SECONDS = metrics.histogram(
+    "crones_provider_request_duration_seconds", "Data provider call latency."
+)
+PROVIDER_REQUESTS = metrics.counter(
+    "crones_provider_requests_total", "Data provider calls."
+)
+PROVIDER_SYMBOLS = metrics.counter(
+    "crones_provider_symbols_total", "Symbols requested from the data provider."
+)
+TICK_SECONDS = metrics.histogram(
+    "crones_tick_duration_seconds", "End-to-end ingestion tick latency."
+)
+
+
+def count_rows(result: Any) -> int:
+    if isinstance(result, pl.DataFrame):
+        return result.shape[0]
+    if isinstance(result, dict):
+        return sum(count_rows(value) for value in result.values())
+    if isinstance(result, (list, tuple)):
+        return sum(count_rows(value) for value in result)
+    return 0
+
+
+@contextmanager
+def provider_request(method: str, symbols: int) -> Iterator[None]:
+    PROVIDER_REQUESTS.inc(method=method)
+    PROVIDER_SYMBOLS.inc(symbols, method=method)
+    with PROVIDER_SECONDS.time(method=method):
+        yield
+
+
+class TickReport:
+    """Collects what moved in the metrics registry during one tick."""
+
+    last_summary: dict[str, Any] = {}
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.datetime.now(datetime.UTC)
+        self._before = metrics.snapshot()
+
+    def finish(self) -> dict[str, Any]:
+        duration = (datetime.datetime.now(datetime.UTC) - self.started_at).total_seconds()
+        TICK_SECONDS.observe(duration, job=self.name)
+        summary = {
+            "job": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": duration,
+            "metrics": diff_snapshots(self._before, metrics.snapshot()),
+        }
+        TickReport.last_summary = summary
+
+        logger.info(f"Tick summary: {json.dumps(summary)}")
+        summary_path = os.environ.get("CRONES_METRICS_SUMMARY_PATH")
+        if summary_path:
+            with open(summary_path, "a") as f:
+                f.write(json.dumps(summary) + "\n")
+        return summary
+
+
+async def _metrics_handler(_: web.Request) -> web.Response:
+    return web.Response(
+        body=metrics.render().encode(),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
+
+
+async def _summary_handler(_: web.Request) -> web.Response:
+    return web.json_response(TickReport.last_summary)
+
+
+async def start_metrics_server() -> web.AppRunner | None:
+    port = int(os.environ.get("CRONES_METRICS_PORT", 9108))
+    if not port:
+        return None
+    host = os.environ.get("CRONES_METRICS_HOST", "127.0.0.1")
+
+    app = web.Application()
+    app.router.add_get("/metrics", _metrics_handler)
+    app.router.add_get("/metrics/summary", _summary_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,196 @@
+import asyncio
+import datetime
+import functools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+import polars as pl
+from pydantic import BaseModel, ConfigDict, Field
+
+from apps.fridon_crones.metrics import STAGE_FAILURES, STAGE_ROWS, STAGE_SECONDS, count_rows
+from libs.technical_analysis.incremental import (
+    IndicatorState,
+    advance_indicator_states,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionExecutor:
+    """
+    Offloads work from the event loop: blocking Delta I/O goes to a bounded
+    thread pool, indicator math to a process pool.
+
+    Cancelling `run_io` only stops the wait, a write already running in the
+    pool keeps going until it commits; `wait_for_io` waits for those.
+    """
+
+    def __init__(self, io_workers: int | None = None, cpu_workers: int | None = None):
+        self.io_workers = io_workers or int(os.environ.get("CRONES_IO_WORKERS", 8))
+        self.cpu_workers = cpu_workers or int(
+            os.environ.get("CRONES_CPU_WORKERS", min(4, os.cpu_count() or 1))
+        )
+        self._io_executor: ThreadPoolExecutor | None = None
+        self._cpu_executor: ProcessPoolExecutor | None = None
+        self._io_in_flight: set[Future] = set()
+
+    @property
+    def io_executor(self) -> ThreadPoolExecutor:
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(
+                max_workers=self.io_workers, thread_name_prefix="delta-io"
+            )
+        return self._io_executor
+
+    @property
+    def cpu_executor(self) -> ProcessPoolExecutor:
+        if self._cpu_executor is None:
+            # polars is multi-threaded, forking it is not safe.
+            self._cpu_executor = ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._cpu_executor
+
+    async def run_io(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        future = self.io_executor.submit(functools.partial(func, *args, **kwargs))
+        self._io_in_flight.add(future)
+        future.add_done_callback(self._io_in_flight.discard)
+        return await asyncio.wrap_future(future)
+
+    async def wait_for_io(self) -> None:
+        in_flight = list(self._io_in_flight)
+        if not in_flight:
+            return
+        logger.warning(f"Waiting for {len(in_flight)} table operations of a cancelled run.")
+        await asyncio.wait([asyncio.wrap_future(future) for future in in_flight])
+
+    async def run_cpu(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.cpu_executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def shutdown(self) -> None:
+        if self._io_executor is not None:
+            self._io_executor.shutdown(wait=True)
+            self._io_executor = None
+        if self._cpu_executor is not None:
+            self._cpu_executor.shutdown(wait=True, cancel_futures=True)
+            self._cpu_executor = None
+
+
+class Stage(BaseModel):
+    """A unit of the ingestion pipeline, started once all its dependencies finish."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str
+    run: Callable[[dict[str, Any]], Awaitable[Any]]
+    depends_on: list[str] = Field(default_factory=list)
+    timeout: float | None = None
+
+
+class StageFailedError(Exception):
+    pass
+
+
+class StageTimeoutError(Exception):
+    pass
+
+
+async def run_stages(
+    stages: list[Stage], deadline: datetime.datetime | None = None
+) -> dict[str, Any]:
+    """
+    Runs stages concurrently, each as soon as its dependencies are done.
+
+    Every stage receives the results of its dependencies keyed by stage name.
+    A failed stage cancels nothing else, but the stages depending on it are
+    skipped; failures are logged and their results are left out.
+
+    A stage is cancelled after its own `timeout` or at the shared `deadline`,
+    whichever comes first.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        unknown = [name for name in stage.depends_on if name not in by_name]
+        if unknown:
+            raise ValueError(f"Stage {stage.name} depends on unknown stages {unknown}")
+
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def _run(stage: Stage) -> Any:
+        dependencies = {}
+        for name in stage.depends_on:
+            try:
+                dependencies[name] = await tasks[name]
+            except Exception as e:
+                raise StageFailedError(f"dependency {name} failed") from e
+
+        timeout = stage.timeout
+        if deadline is not None:
+            remaining = (deadline - datetime.datetime.now(datetime.UTC)).total_seconds()
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        start_time = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(stage.run(dependencies), timeout=timeout)
+        except asyncio.TimeoutError as e:
+            raise StageTimeoutError(f"ran out of its {timeout:.0f}s budget") from e
+        duration = time.perf_counter() - start_time
+        STAGE_SECONDS.observe(duration, stage=stage.name)
+        STAGE_ROWS.inc(count_rows(result), stage=stage.name)
+        logger.info(f"Stage {stage.name} finished in {duration:.2f}s.")
+        return result
+
+    for stage in _topological_order(stages):
+        tasks[stage.name] = asyncio.create_task(_run(stage), name=stage.name)
+
+    results = {}
+    for name, task in tasks.items():
+        try:
+            results[name] = await task
+        except StageFailedError as e:
+            STAGE_FAILURES.inc(stage=name, reason="skipped")
+            logger.warning(f"Stage {name} skipped: {e}")
+        except StageTimeoutError as e:
+            STAGE_FAILURES.inc(stage=name, reason="timeout")
+            logger.error(f"Stage {name} timed out: {e}")
+        except Exception as e:
+            STAGE_FAILURES.inc(stage=name, reason="failed")
+            logger.error(f"Stage {name} failed: {e}")
+    return results
+
+
+def _topological_order(stages: list[Stage]) -> list[Stage]:
+    by_name = {stage.name: stage for stage in stages}
+    ordered, visiting, visited = [], set(), set()
+
+    def _visit(stage: Stage) -> None:
+        if stage.name in visited:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Stage dependency cycle at {stage.name}")
+        visiting.add(stage.name)
+        for name in stage.depends_on:
+            _visit(by_name[name])
+        visiting.discard(stage.name)
+        visited.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        _visit(stage)
+    return ordered
+
+
+def advance_indicator_states_task(
+    states: dict[str, IndicatorState], df: pl.DataFrame
+) -> tuple[dict[str, IndicatorState], pl.DataFrame]:
+    """Process-pool entry point: the advanced states travel back with the rows."""
+    indicators_df = advance_indicator_states(states, df)
+    return states, indicators_df
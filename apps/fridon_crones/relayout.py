@@ -0,0 +1,53 @@
+"""
+Rewrites the OHLCV and indicator tables into the layout their repositories
+declare: one partition per date instead of per timestamp, rows clustered by
+coin and timestamp. Stop the crones job while it runs.
+
+    python -m apps.fridon_crones.relayout [--intervals raw 1h] [--dry-run]
+"""
+import argparse
+import logging
+
+from libs.repositories import IndicatorsRepository, OhlcvRepository
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INTERVALS = ["raw", "1h", "4h", "1d", "1w"]
+
+
+def relayout_tables(intervals: list[str], dry_run: bool = False) -> None:
+    repositories = [
+        repository
+        for interval_name in intervals
+        for repository in (
+            OhlcvRepository(table_name=f"ohlcv_{interval_name}"),
+            IndicatorsRepository(table_name=f"indicators_{interval_name}"),
+        )
+    ]
+    for repository in repositories:
+        try:
+            current_partition_columns = repository.current_partition_columns()
+        except FileNotFoundError:
+            logger.info(f"Table {repository.table_name} does not exist, skipping.")
+            continue
+
+        if dry_run:
+            logger.info(
+                f"Table {repository.table_name}: partitioned by {current_partition_columns}, "
+                f"target {repository.partition_columns} clustered by {repository.cluster_columns}."
+            )
+            continue
+        repository.relayout()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--intervals", nargs="+", choices=INTERVALS, default=INTERVALS)
+    parser.add_argument("--dry-run", action="store_true", help="Only report the current layouts.")
+    args = parser.parse_args()
+    relayout_tables(args.intervals, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
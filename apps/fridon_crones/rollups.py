@@ -0,0 +1,177 @@
+import logging
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["coin", "timestamp", "open", "high", "low", "close", "volume"]
+
+OHLCV_SCHEMA = {
+    "coin": pl.String,
+    "timestamp": pl.Int64,
+    **{column: pl.Float64 for column in OHLCV_COLUMNS[2:]},
+}
+
+INTERVAL_DURATIONS_MS = {
+    "raw": 30 * 60 * 1000,
+    "1h": 60 * 60 * 1000,
+    "4h": 4 * 60 * 60 * 1000,
+    "1d": 24 * 60 * 60 * 1000,
+    "1w": 7 * 24 * 60 * 60 * 1000,
+}
+
+# Weekly candles open on Monday 00:00 UTC; the epoch was a Thursday.
+INTERVAL_OFFSETS_MS = {"1w": 4 * 24 * 60 * 60 * 1000}
+
+
+def ohlcv_frame(records: list[dict]) -> pl.DataFrame:
+    """Provider records as typed OHLCV columns, built without schema inference."""
+    return pl.from_dicts(records, schema=OHLCV_SCHEMA, strict=False)
+
+
+def with_date_column(df: pl.DataFrame) -> pl.DataFrame:
+    return df.with_columns(
+        pl.from_epoch("timestamp", time_unit="ms").dt.strftime("%Y-%m-%d").alias("date")
+    )
+
+
+def bucket_start(timestamp: int, interval_name: str) -> int:
+    duration = INTERVAL_DURATIONS_MS[interval_name]
+    offset = INTERVAL_OFFSETS_MS.get(interval_name, 0)
+    return (timestamp - offset) // duration * duration + offset
+
+
+def bucket_start_expr(interval_name: str, column: str = "timestamp") -> pl.Expr:
+    duration = INTERVAL_DURATIONS_MS[interval_name]
+    offset = INTERVAL_OFFSETS_MS.get(interval_name, 0)
+    return (pl.col(column) - offset) // duration * duration + offset
+
+
+class RollupEngine:
+    """
+    Derives higher-timeframe bars from 30m raw bars, aligned to UTC bucket
+    boundaries.
+
+    The raw bars of every still-open bucket are kept in memory, keyed by
+    (coin, timestamp), so a re-sent raw bar replaces the old one instead of
+    being counted twice. Each update re-aggregates only the buckets touched by
+    the incoming bars, for all intervals in one grouped pass, and returns one
+    frame per interval ready to upsert. Once the newest bar crosses into a new
+    bucket for every interval, raw bars of the finished buckets are dropped.
+    """
+
+    def __init__(self, interval_names: list[str]):
+        self.interval_names = interval_names
+        self.buffer = pl.DataFrame(
+            schema={
+                "coin": pl.String,
+                "timestamp": pl.Int64,
+                **{column: pl.Float64 for column in OHLCV_COLUMNS[2:]},
+            }
+        )
+        self.covered_from: int | None = None
+
+    def window_start(self, timestamp: int) -> int:
+        return min(
+            bucket_start(timestamp, interval_name) for interval_name in self.interval_names
+        )
+
+    def needs_history(self, raw_df: pl.DataFrame) -> int | None:
+        """Returns the timestamp history must be loaded from before `update`, if any."""
+        if raw_df.is_empty():
+            return None
+        required_from = self.window_start(raw_df["timestamp"].min())
+        if self.covered_from is None or required_from < self.covered_from:
+            return required_from
+        return None
+
+    def hydrate(self, history_df: pl.DataFrame, covered_from: int) -> None:
+        self._merge(history_df)
+        self.covered_from = (
+            covered_from
+            if self.covered_from is None
+            else min(self.covered_from, covered_from)
+        )
+        logger.info(
+            f"Rollup buffer hydrated with {history_df.shape[0]} raw bars from {covered_from}."
+        )
+
+    def update(self, raw_df: pl.DataFrame) -> dict[str, pl.DataFrame]:
+        if raw_df.is_empty():
+            return {
+                interval_name: with_date_column(self.buffer.clear()).select(
+                    "coin", "timestamp", "date", *OHLCV_COLUMNS[2:]
+                )
+                for interval_name in self.interval_names
+            }
+
+        raw_df = self._normalize(raw_df)
+        self._merge(raw_df)
+
+        touched = pl.concat(
+            [
+                raw_df.select(
+                    pl.lit(interval_name).alias("interval"),
+                    "coin",
+                    bucket_start_expr(interval_name).alias("bucket"),
+                )
+                for interval_name in self.interval_names
+            ]
+        ).unique()
+
+        stacked = pl.concat(
+            [
+                self.buffer.with_columns(
+                    pl.lit(interval_name).alias("interval"),
+                    bucket_start_expr(interval_name).alias("bucket"),
+                )
+                for interval_name in self.interval_names
+            ]
+        )
+        rollups = (
+            stacked.join(touched, on=["interval", "coin", "bucket"], how="semi")
+            .sort("timestamp")
+            .group_by("interval", "coin", "bucket")
+            .agg(
+                pl.first("open"),
+                pl.max("high"),
+                pl.min("low"),
+                pl.last("close"),
+                pl.sum("volume"),
+            )
+            .rename({"bucket": "timestamp"})
+        )
+        rollups = with_date_column(rollups).select(
+            "interval", "coin", "timestamp", "date", *OHLCV_COLUMNS[2:]
+        )
+        by_interval = rollups.partition_by("interval", as_dict=True, include_key=False)
+
+        self._evict()
+
+        return {
+            interval_name: by_interval.get(
+                (interval_name,), rollups.drop("interval").clear()
+            ).sort("coin", "timestamp")
+            for interval_name in self.interval_names
+        }
+
+    def _normalize(self, df: pl.DataFrame) -> pl.DataFrame:
+        return df.select(
+            pl.col("coin").cast(pl.String),
+            pl.col("timestamp").cast(pl.Int64),
+            *[pl.col(column).cast(pl.Float64) for column in OHLCV_COLUMNS[2:]],
+        )
+
+    def _merge(self, df: pl.DataFrame) -> None:
+        self.buffer = (
+            pl.concat([self.buffer, self._normalize(df)])
+            .unique(subset=["coin", "timestamp"], keep="last", maintain_order=True)
+        )
+
+    def _evict(self) -> None:
+        if self.buffer.is_empty():
+            return
+        window_start = self.window_start(self.buffer["timestamp"].max())
+        self.buffer = self.buffer.filter(pl.col("timestamp") >= window_start)
+        if self.covered_from is not None:
+            self.covered_from = max(self.covered_from, window_start)
@@ -0,0 +1,141 @@
+import asyncio
+import datetime
+import logging
+import os
+from typing import Awaitable, Callable, Literal
+
+import aiocron
+from pydantic import BaseModel
+
+from libs.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TICK_LATENESS_SECONDS = metrics.histogram(
+    "crones_tick_lateness_seconds", "Delay between a tick's scheduled and actual start."
+)
+TICKS = metrics.counter("crones_ticks_total", "Scheduled ticks by outcome.")
+
+
+class TickContext(BaseModel):
+    scheduled_at: datetime.datetime
+    started_at: datetime.datetime
+    deadline: datetime.datetime
+    behind: bool = False
+
+    @property
+    def lateness(self) -> float:
+        return (self.started_at - self.scheduled_at).total_seconds()
+
+    def remaining(self) -> float:
+        return max(
+            (self.deadline - datetime.datetime.now(datetime.UTC)).total_seconds(), 0.0
+        )
+
+
+class OverrunSafeScheduler:
+    """
+    Fires `job` on a cron schedule, but never runs two ticks at once.
+
+    A tick that fires while the previous one is still running is either
+    coalesced (at most one run is queued and it takes the latest scheduled
+    time) or skipped. Every run gets a deadline one period after its
+    scheduled time, minus a safety margin, and is cancelled once the deadline
+    passes. A run is `behind` when it starts late or the previous one
+    overran, so the job can shed optional work.
+
+    Cancelling a run does not stop work it handed to threads, so a run first
+    awaits `drain`, which waits for that work, before it starts.
+    """
+
+    def __init__(
+        self,
+        job: Callable[[TickContext], Awaitable[None]],
+        schedule: str = "0,30 * * * *",
+        period: datetime.timedelta = datetime.timedelta(minutes=30),
+        overlap_policy: Literal["coalesce", "skip"] | None = None,
+        deadline_margin: datetime.timedelta | None = None,
+        behind_threshold: datetime.timedelta | None = None,
+        drain: Callable[[], Awaitable[None]] | None = None,
+    ):
+        self.job = job
+        self.drain = drain
+        self.schedule = schedule
+        self.period = period
+        self.overlap_policy = overlap_policy or os.environ.get(
+            "CRONES_OVERLAP_POLICY", "coalesce"
+        )
+        self.deadline_margin = deadline_margin or datetime.timedelta(
+            seconds=int(os.environ.get("CRONES_DEADLINE_MARGIN_SECONDS", 60))
+        )
+        self.behind_threshold = behind_threshold or period / 4
+        self._running = False
+        self._pending: datetime.datetime | None = None
+        self._last_overran = False
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        aiocron.crontab(self.schedule, self.fire, loop=loop)
+
+    async def fire(self) -> None:
+        scheduled_at = self._scheduled_time(datetime.datetime.now(datetime.UTC))
+        if self._running:
+            if self.overlap_policy == "coalesce":
+                if self._pending is not None:
+                    TICKS.inc(outcome="coalesced")
+                self._pending = scheduled_at
+                logger.warning(
+                    f"Tick {scheduled_at.isoformat()} queued, the previous run is still going."
+                )
+            else:
+                TICKS.inc(outcome="skipped")
+                logger.warning(
+                    f"Tick {scheduled_at.isoformat()} skipped, the previous run is still going."
+                )
+            return
+
+        self._running = True
+        try:
+            while scheduled_at is not None:
+                await self._run(scheduled_at)
+                scheduled_at, self._pending = self._pending, None
+        finally:
+            self._running = False
+
+    async def _run(self, scheduled_at: datetime.datetime) -> None:
+        if self.drain is not None:
+            await self.drain()
+        started_at = datetime.datetime.now(datetime.UTC)
+        context = TickContext(
+            scheduled_at=scheduled_at,
+            started_at=started_at,
+            deadline=scheduled_at + self.period - self.deadline_margin,
+        )
+        context.behind = (
+            self._last_overran
+            or started_at - scheduled_at > self.behind_threshold
+        )
+        TICK_LATENESS_SECONDS.observe(context.lateness)
+        if context.behind:
+            logger.warning(
+                f"Tick {scheduled_at.isoformat()} is behind: started {context.lateness:.0f}s late, "
+                f"previous run overran: {self._last_overran}."
+            )
+
+        try:
+            await asyncio.wait_for(self.job(context), timeout=context.remaining())
+            self._last_overran = False
+            TICKS.inc(outcome="completed")
+        except asyncio.TimeoutError:
+            self._last_overran = True
+            TICKS.inc(outcome="timed_out")
+            logger.error(f"Tick {scheduled_at.isoformat()} ran past its deadline and was cancelled.")
+        except Exception as e:
+            self._last_overran = False
+            TICKS.inc(outcome="failed")
+            logger.error(f"Tick {scheduled_at.isoformat()} failed: {e}")
+
+    def _scheduled_time(self, now: datetime.datetime) -> datetime.datetime:
+        period = self.period.total_seconds()
+        return datetime.datetime.fromtimestamp(
+            now.timestamp() // period * period, datetime.UTC
+        )
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import os
+import zlib
+from typing import Any, Awaitable, Callable
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+
+def shard_of(coin: str, shard_count: int) -> int:
+    # crc32 rather than hash(): str hashes are salted per process.
+    return zlib.crc32(coin.encode()) % shard_count
+
+
+class ShardCoordinator:
+    """
+    Splits the coin universe into stable hash shards so that fetching and
+    indicator math run as independent units, one per worker.
+
+    Shard outputs come back to the coordinator, which concatenates them, so
+    every table still gets a single commit per tick.
+    """
+
+    def __init__(self, shard_count: int | None = None):
+        # One shard per CPU worker unless configured otherwise.
+        self.shard_count = shard_count or int(
+            os.environ.get(
+                "CRONES_SHARDS",
+                os.environ.get("CRONES_CPU_WORKERS", min(4, os.cpu_count() or 1)),
+            )
+        )
+
+    def assign(self, coins: list[str]) -> list[list[str]]:
+        shards = [[] for _ in range(self.shard_count)]
+        for coin in coins:
+            shards[shard_of(coin, self.shard_count)].append(coin)
+        return [shard for shard in shards if shard]
+
+    def split(self, df: pl.DataFrame) -> list[pl.DataFrame]:
+        if df.is_empty():
+            return []
+        coins = df["coin"].unique().to_list()
+        mapping = {coin: shard_of(coin, self.shard_count) for coin in coins}
+        return (
+            df.with_columns(
+                pl.col("coin").replace_strict(mapping, return_dtype=pl.Int64).alias("_shard")
+            )
+            .partition_by("_shard", include_key=False, maintain_order=True)
+        )
+
+    async def gather_coins(
+        self,
+        func: Callable[..., Awaitable[list[Any]]],
+        coins: list[str],
+        *args,
+        **kwargs,
+    ) -> list[Any]:
+        """
+        Calls `func(shard_coins, ...)` for every shard concurrently and joins the
+        returned lists. A failed shard is logged and left out, the rest of the
+        tick goes on; the gap scanner picks its bars up later.
+        """
+        shards = self.assign(coins)
+        results = await asyncio.gather(
+            *[func(shard, *args, **kwargs) for shard in shards],
+            return_exceptions=True,
+        )
+        joined = []
+        for shard, result in zip(shards, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Shard of {len(shard)} coins failed: {result}")
+                continue
+            joined.extend(result or [])
+        return joined
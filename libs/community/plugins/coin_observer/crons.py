@@ -38,7 +38,7 @@ class CoinObserverCron(BaseCron):
         #         indicators_repository = IndicatorsRepository(
         #             table_name=f"indicators_{interval}"
         #         )
-        #         latest_records = indicators_repository.get_the_latest_records(
+        #         latest_records = await indicators_repository.aget_the_latest_records(
         #             eval(filter_expression)
         #         )
         #         if len(latest_records) != 0:
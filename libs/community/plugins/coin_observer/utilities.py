@@ -5,6 +5,7 @@ from fridonai_core.plugins.utilities.base import BaseUtility
 
 from libs.community.plugins.coin_observer.helpers.llm import get_filter_generator_chain
 from libs.community.plugins.coin_observer.schemas import CoinObserverRecord
+from libs.repositories.hot_window import HotWindowRepository
 from libs.repositories.indicators import IndicatorsRepository
 from libs.repositories.redis import RedisRepository
 
@@ -77,7 +78,11 @@ class CoinObserverUtility(BaseUtility):
         print(filter_expression)
 
         try:
-            indicators_repository.get_the_latest_records(eval(filter_expression))
+            latest_records = await HotWindowRepository(
+                interval=interval
+            ).get_the_latest_records(eval(filter_expression))
+            if latest_records is None:
+                await indicators_repository.aget_the_latest_records(eval(filter_expression))
             return filter_expression
         except Exception as e:
             print(e)
@@ -15,6 +15,7 @@ from libs.data_providers import (
     BirdeyeOHLCVProvider,
     CompositeCoinDataProvider,
 )
+from libs.repositories.hot_window import HotWindowRepository
 from libs.repositories.indicators import IndicatorsRepository
 
 from libs.community.plugins.coin_technical_chart_searcher.helper import (
@@ -228,10 +229,14 @@ class CoinTechnicalIndicatorsSearchUtility(BaseUtility):
 
         print("Filter expression: ", filter_expression)
 
-        latest_records = indicators_repository.get_the_latest_records(
-            eval(filter_expression),
-            last_n=True,
-        )
+        latest_records = await HotWindowRepository(
+            interval=interval
+        ).get_the_latest_records(eval(filter_expression))
+        if latest_records is None:
+            latest_records = await indicators_repository.aget_the_latest_records(
+                eval(filter_expression),
+                last_n=True,
+            )
 
         if len(latest_records) == 0:
             return "No coins found"
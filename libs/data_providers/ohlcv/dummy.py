@@ -5,6 +5,8 @@ from typing import List, Literal, Union, Dict, Any
 
 from libs.data_providers.ohlcv.base import BaseOHLCVProvider
 
+INTERVAL_HOURS = {"30m": 0.5, "1h": 1, "4h": 4, "1d": 24, "1w": 168}
+
 
 class DummyOHLCVProvider(BaseOHLCVProvider):
     """
@@ -40,7 +42,12 @@ class DummyOHLCVProvider(BaseOHLCVProvider):
         """
         Generate random OHLCV data for a list of symbols within a specific time range.
         """
-        interval_hours = {"1h": 1, "4h": 4, "1d": 24, "1w": 168}
+        interval_hours = INTERVAL_HOURS
+        # Exchanges open candles on interval boundaries.
+        interval_seconds = interval_hours[interval] * 3600
+        start_time = start_time - timedelta(
+            seconds=start_time.timestamp() % interval_seconds
+        )
         hours_diff = (end_time - start_time).total_seconds() / 3600
         num_intervals = int(hours_diff / interval_hours[interval])
 
@@ -109,6 +116,22 @@ class DummyOHLCVProvider(BaseOHLCVProvider):
             symbols, interval, start_time, end_time, output_format
         )
 
+    async def get_current_ohlcv(
+        self,
+        symbols: List[str],
+        interval: Literal["1h", "4h", "1d", "1w"],
+        category: Literal["spot", "futures"] = "spot",
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate a random open candle per symbol for the current interval.
+        """
+        now = datetime.now()
+        interval_length = timedelta(hours=INTERVAL_HOURS[interval])
+        start_time = now - timedelta(seconds=now.timestamp() % interval_length.total_seconds())
+        return await self.get_historical_ohlcv_by_start_end(
+            symbols, interval, start_time, start_time + interval_length, output_format="dict"
+        )
+
     async def get_current_price(self, symbols: List[str]) -> Dict[str, float]:
         """
         Generate random current prices for a list of symbols.
@@ -1,5 +1,5 @@
-from libs.repositories.delta import DeltaRepository
+from libs.repositories.delta import AsOf, DeltaRepository, time_range_filter, time_range_partitions
 from libs.repositories.ohlcv import OhlcvRepository
-from libs.repositories.indicators import IndicatorsRepository
+from libs.repositories.indicators import IndicatorsRepository, LatestIndicatorsRepository
 
-__all__ = ["DeltaRepository", "OhlcvRepository", "IndicatorsRepository"]
+__all__ = ["AsOf", "DeltaRepository", "OhlcvRepository", "IndicatorsRepository", "LatestIndicatorsRepository", "time_range_filter", "time_range_partitions"]
@@ -0,0 +1,60 @@
+import asyncio
+import functools
+import logging
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from libs.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TABLE_IO_WAIT_SECONDS = metrics.histogram(
+    "delta_table_io_wait_seconds", "Time async repository calls wait for a table slot."
+)
+
+_io_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("DELTA_IO_WORKERS", 8)), thread_name_prefix="delta-io"
+)
+
+_table_concurrency = int(os.environ.get("DELTA_TABLE_CONCURRENCY", 4))
+
+# asyncio semaphores belong to one event loop.
+_semaphores: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+] = weakref.WeakKeyDictionary()
+
+
+def _table_semaphore(table_name: str) -> asyncio.Semaphore:
+    loop_semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    if table_name not in loop_semaphores:
+        loop_semaphores[table_name] = asyncio.Semaphore(_table_concurrency)
+    return loop_semaphores[table_name]
+
+
+async def run_table_io(table_name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a blocking repository call on the shared Delta I/O pool, at most
+    DELTA_TABLE_CONCURRENCY at a time per table.
+
+    Cancelling the caller drops a call that has not started yet. One already
+    running finishes in the background and keeps its table slot until then,
+    so the limit always counts the threads actually touching the table.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _table_semaphore(table_name)
+    with TABLE_IO_WAIT_SECONDS.time(table=table_name):
+        await semaphore.acquire()
+    try:
+        future = _io_executor.submit(functools.partial(func, *args, **kwargs))
+    except BaseException:
+        semaphore.release()
+        raise
+
+    def _release(_) -> None:
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(semaphore.release)
+
+    future.add_done_callback(_release)
+    return await asyncio.wrap_future(future)
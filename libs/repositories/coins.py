@@ -1,10 +1,15 @@
+import logging
+
 import polars as pl
+import pyarrow as pa
 import pyarrow.compute as pc
 from pyarrow.compute import Expression
 from datetime import datetime, timedelta, UTC
 
-from libs.repositories.delta import DeltaRepository
+from libs.repositories.aio import run_table_io
+from libs.repositories.delta import AsOf, DeltaRepository, PartitionFilters, time_range_filter, time_range_partitions
 
+logger = logging.getLogger(__name__)
 
 
 class CoinsRepository(DeltaRepository):
@@ -15,6 +20,7 @@ class CoinsRepository(DeltaRepository):
         "1d": timedelta(days=1),
         "1w": timedelta(days=7),
     }
+    key_columns: list[str] = ["coin", "timestamp"]
 
     @property
     def interval(self) -> str:
@@ -49,23 +55,333 @@ class CoinsRepository(DeltaRepository):
             number_of_points=None,
         )
 
-    def get_the_latest_records(self, filters: Expression = None, columns: list[str] = None, last_n: bool = False) -> pl.DataFrame:
-        df = self.get_last_records(filters, number_of_points=1, columns=columns, last_n=last_n)
-        return df.sort("timestamp").group_by("coin").agg(pl.all().last())
-
-    def get_last_records(self, filters: Expression = None, number_of_points: int = 50, columns: list[str] = None, last_n: bool = False) -> pl.DataFrame:
+    def get_coins_last_records(
+        self,
+        coins: list[str],
+        number_of_points: int = 50,
+        filters: Expression | None = None,
+        columns: list[str] | None = None,
+        as_dict: bool = False,
+    ) -> pl.DataFrame | dict[str, pl.DataFrame]:
+        """
+        `get_coin_last_records` for several coins in one scan: the last
+        `number_of_points` rows of each coin, sorted by coin and timestamp.
+        """
         delta = self.interval_to_delta[self.interval]
+        end_time = self._window_end()
+        df = self.get_coins_records_in_time_range(
+            coins, end_time - delta * number_of_points, end_time, filters=filters, columns=columns
+        )
+        return self._by_coin(df.group_by("coin", maintain_order=True).tail(number_of_points), coins, as_dict)
 
-        now = datetime.now(UTC)
-        if now.minute >= 30:
-            end_time = now.replace(minute=30, second=0, microsecond=0)
+    def get_coins_records_in_time_range(
+        self,
+        coins: list[str],
+        start: datetime,
+        end: datetime,
+        filters: Expression | None = None,
+        columns: list[str] | None = None,
+        as_dict: bool = False,
+    ) -> pl.DataFrame | dict[str, pl.DataFrame]:
+        """
+        `get_coin_records_in_time_range` for several coins in one scan. A
+        single frame sorted by coin and timestamp, or one frame per coin
+        (empty for coins without rows) with `as_dict`.
+        """
+        coins_filter = pc.field("coin").isin(coins)
+        read_columns = list(dict.fromkeys(["coin", "timestamp", *columns])) if columns else None
+        df = self.get_records_in_time_range(
+            start,
+            end,
+            filters=coins_filter if filters is None else coins_filter & filters,
+            number_of_points=None,
+            columns=read_columns,
+            partition_hints=time_range_partitions(coins=coins),
+        )
+        return self._by_coin(df.sort("coin", "timestamp", maintain_order=True), coins, as_dict)
+
+    @staticmethod
+    def _by_coin(
+        df: pl.DataFrame, coins: list[str], as_dict: bool
+    ) -> pl.DataFrame | dict[str, pl.DataFrame]:
+        if not as_dict:
+            return df
+        frames = {key[0]: frame for key, frame in df.partition_by("coin", as_dict=True).items()}
+        return {coin: frames.get(coin, df.clear()) for coin in coins}
+
+    def get_the_latest_records(
+        self, filters: Expression = None, columns: list[str] = None, last_n: bool = False, as_of: AsOf | None = None
+    ) -> pl.DataFrame:
+        end_time = self._window_end(as_of)
+        latest = self.read_latest(
+            1,
+            filters=filters,
+            columns=columns,
+            since=end_time - self.interval_to_delta[self.interval],
+            until=end_time,
+            as_of=as_of,
+        )
+        if not last_n:
+            latest = latest.sort("timestamp", maintain_order=True).tail(1)
+        if columns is not None:
+            return latest.select(["coin", *[column for column in columns if column != "coin"]])
+        return latest.select("coin", pl.exclude("coin"))
+
+    def read_latest(
+        self,
+        k: int = 1,
+        filters: Expression | None = None,
+        columns: list[str] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        as_of: AsOf | None = None,
+    ) -> pl.DataFrame:
+        """
+        The latest `k` rows of every coin, newest files first. Each round
+        scans one time window, so files whose timestamp statistics fall
+        outside it are never opened; the window doubles for the coins still
+        short of `k` rows.
+
+        The coins are known from the partition values or the coin statistics
+        of the files, none are read for it. The scan stops at `since` (else
+        the oldest file), or once no file left holds a coin short of `k`
+        rows. Statistics name every coin of a file holding one, but only the
+        first and last coin of a mixed one; with mixed files, other coins
+        whose rows all predate the windows read are only found within `since`.
+        """
+        read_columns = list(dict.fromkeys(["coin", "timestamp", *columns])) if columns else None
+        with self._table_as_of(as_of) as dt:
+            if dt is None:
+                raise FileNotFoundError(
+                    f"Table {self.table_name} does not exist at {self.s3_path}"
+                )
+            actions = dt.get_add_actions(flatten=True)
+        if actions.num_rows == 0 or actions["max.timestamp"].null_count:
+            # No statistics to walk the files by.
+            df = self.read(
+                filters=self._time_filter(since, until, filters),
+                columns=read_columns,
+                order_by="timestamp",
+                as_of=as_of,
+                partition_hints=self._time_partitions(since, until),
+            )
+            return df.group_by("coin", maintain_order=True).tail(k).sort("coin", "timestamp")
+
+        file_bounds = self._file_bounds(actions)
+        upper = file_bounds["max"].max()
+        if until is not None:
+            upper = min(upper, int(until.timestamp() * 1000))
+        oldest = file_bounds["min"].min()
+        if since is not None:
+            oldest = max(oldest, int(since.timestamp() * 1000))
+
+        window = int(self.interval_to_delta[self.interval].total_seconds() * 1000) * k
+        lower, closed = max(upper - window, oldest), "both"
+        exact = file_bounds["coin_min"].null_count() == 0 and (
+            "partition.coin" in actions.schema.names
+            or (file_bounds["coin_min"] == file_bounds["coin_max"]).all()
+        )
+        # With mixed files and `since`, every file back to it is read instead.
+        coins = (
+            self._matching_coins(
+                set(file_bounds["coin_min"].drop_nulls()) | set(file_bounds["coin_max"].drop_nulls()),
+                filters,
+            )
+            if exact or since is None
+            else None
+        )
+        found: pl.DataFrame | None = None
+        complete: list[str] = []
+        scanned = pl.repeat(False, file_bounds.shape[0], eager=True)
+        while True:
+            round_filters = time_range_filter(lower, upper, closed=closed)
+            if filters is not None:
+                round_filters &= filters
+            if complete:
+                round_filters &= ~pc.field("coin").isin(complete)
+            scanned |= (file_bounds["max"] >= lower) & (file_bounds["min"] <= upper)
+
+            df = self.read(
+                filters=round_filters,
+                columns=read_columns,
+                order_by="timestamp",
+                as_of=as_of,
+                partition_hints=time_range_partitions(lower, upper, closed=closed),
+            )
+            found = df if found is None else pl.concat([df, found], how="vertical_relaxed")
+            found = found.group_by("coin", maintain_order=True).tail(k)
+            counts = found.group_by("coin").len()
+            complete = counts.filter(pl.col("len") >= k)["coin"].to_list()
+
+            if lower <= oldest:
+                break
+            if coins is not None:
+                short = (coins | set(found["coin"])) - set(complete)
+                if not self._may_hold(file_bounds.filter(pl.col("min") < lower), short):
+                    break
+            window *= 2
+            upper, lower, closed = lower, max(lower - window, oldest), "left"
+
+        logger.info(
+            f"Table {self.table_name}: latest {k} rows of {found['coin'].n_unique()} coins read "
+            f"from {scanned.sum()} of {actions.num_rows} files."
+        )
+        return found.sort("coin", "timestamp")
+
+    @staticmethod
+    def _file_bounds(actions: pa.RecordBatch) -> pl.DataFrame:
+        """Timestamp and coin range of every file, null where unknown."""
+        names = actions.schema.names
+        if "partition.coin" in names:
+            coin_min = coin_max = actions["partition.coin"]
+        elif "min.coin" in names:
+            coin_min, coin_max = actions["min.coin"], actions["max.coin"]
         else:
-            end_time = now.replace(minute=0, second=0, microsecond=0)
+            coin_min = coin_max = pa.nulls(actions.num_rows, pa.string())
+        return pl.from_arrow(
+            pa.table(
+                {
+                    "min": actions["min.timestamp"],
+                    "max": actions["max.timestamp"],
+                    "coin_min": coin_min,
+                    "coin_max": coin_max,
+                }
+            )
+        )
+
+    @staticmethod
+    def _matching_coins(coins: set[str], filters: Expression | None) -> set[str]:
+        """The `coins` matching `filters`, all of them when it is not on coins alone."""
+        if filters is None or not coins:
+            return coins
+        try:
+            return set(pa.table({"coin": sorted(coins)}).filter(filters)["coin"].to_pylist())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return coins
+
+    @staticmethod
+    def _may_hold(file_bounds: pl.DataFrame, coins: set[str]) -> bool:
+        """Whether any of the files may hold rows of `coins`."""
+        if not coins or file_bounds.is_empty():
+            return False
+        return not (
+            file_bounds.join(pl.DataFrame({"coin": sorted(coins)}), how="cross")
+            .filter(
+                pl.col("coin_min").is_null()
+                | ((pl.col("coin_min") <= pl.col("coin")) & (pl.col("coin") <= pl.col("coin_max")))
+            )
+            .is_empty()
+        )
+
+    def _time_filter(self, since: datetime | None, until: datetime | None, filters: Expression | None) -> Expression:
+        expression = time_range_filter(
+            int(since.timestamp() * 1000) if since is not None else None,
+            int(until.timestamp() * 1000) if until is not None else None,
+        )
+        return expression if filters is None else filters & expression
+
+    def _time_partitions(self, since: datetime | None, until: datetime | None) -> PartitionFilters:
+        return time_range_partitions(
+            int(since.timestamp() * 1000) if since is not None else None,
+            int(until.timestamp() * 1000) if until is not None else None,
+        )
+
+    def _window_end(self, as_of: AsOf | None = None) -> datetime:
+        now = datetime.now(UTC) if as_of is None else self.as_of_time(as_of).astimezone(UTC)
+        if now.minute >= 30:
+            return now.replace(minute=30, second=0, microsecond=0)
+        return now.replace(minute=0, second=0, microsecond=0)
+
+    def get_last_records(
+        self,
+        filters: Expression = None,
+        number_of_points: int = 50,
+        columns: list[str] = None,
+        last_n: bool = False,
+        as_of: AsOf | None = None,
+    ) -> pl.DataFrame:
+        """
+        The records of the last `number_of_points` intervals, or with `as_of`
+        of those before it, as the table was then.
+        """
+        delta = self.interval_to_delta[self.interval]
+        end_time = self._window_end(as_of)
 
         return self.get_records_in_time_range(
             end_time - delta * number_of_points, 
             end_time, 
             filters=filters, 
             number_of_points=number_of_points if not last_n else None, 
-            columns=columns
+            columns=columns,
+            as_of=as_of,
+        )
+
+    async def aget_coin_latest_record(self, coin_name: str, filters = None, columns: list[str] = None) -> pl.DataFrame:
+        return await run_table_io(self.table_name, self.get_coin_latest_record, coin_name, filters, columns)
+
+    async def aget_coin_last_records(self, coin_name: str, number_of_points: int = 50, filters = None, columns: list[str] = None) -> pl.DataFrame:
+        return await run_table_io(
+            self.table_name, self.get_coin_last_records, coin_name, number_of_points, filters, columns
+        )
+
+    async def aget_coins_last_records(
+        self,
+        coins: list[str],
+        number_of_points: int = 50,
+        filters: Expression | None = None,
+        columns: list[str] | None = None,
+        as_dict: bool = False,
+    ) -> pl.DataFrame | dict[str, pl.DataFrame]:
+        return await run_table_io(
+            self.table_name, self.get_coins_last_records, coins, number_of_points, filters, columns, as_dict
+        )
+
+    async def aget_coins_records_in_time_range(
+        self,
+        coins: list[str],
+        start: datetime,
+        end: datetime,
+        filters: Expression | None = None,
+        columns: list[str] | None = None,
+        as_dict: bool = False,
+    ) -> pl.DataFrame | dict[str, pl.DataFrame]:
+        return await run_table_io(
+            self.table_name, self.get_coins_records_in_time_range, coins, start, end, filters, columns, as_dict
+        )
+
+    async def aget_the_latest_records(
+        self, filters: Expression = None, columns: list[str] = None, last_n: bool = False, as_of: AsOf | None = None
+    ) -> pl.DataFrame:
+        return await run_table_io(self.table_name, self.get_the_latest_records, filters, columns, last_n, as_of)
+
+    async def aget_last_records(
+        self,
+        filters: Expression = None,
+        number_of_points: int = 50,
+        columns: list[str] = None,
+        last_n: bool = False,
+        as_of: AsOf | None = None,
+    ) -> pl.DataFrame:
+        return await run_table_io(
+            self.table_name, self.get_last_records, filters, number_of_points, columns, last_n, as_of
+        )
+
+    async def aread_latest(
+        self,
+        k: int = 1,
+        filters: Expression | None = None,
+        columns: list[str] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        as_of: AsOf | None = None,
+    ) -> pl.DataFrame:
+        return await run_table_io(
+            self.table_name,
+            self.read_latest,
+            k,
+            filters=filters,
+            columns=columns,
+            since=since,
+            until=until,
+            as_of=as_of,
         )
@@ -0,0 +1,38 @@
+import asyncio
+import logging
+import os
+
+from fridonai_core.crons import BaseCron
+from fridonai_core.crons.registry import ensure_cron_registry
+
+from libs.repositories.indicators import IndicatorsRepository, LatestIndicatorsRepository
+from libs.repositories.maintenance import DeltaMaintenance
+from libs.repositories.ohlcv import OhlcvRepository
+
+logger = logging.getLogger(__name__)
+
+registry = ensure_cron_registry()
+
+
+@registry.register
+class DeltaMaintenanceCron(BaseCron):
+    name: str = "Delta Maintenance"
+    # Between the :00 and :30 ingestion ticks.
+    schedule: str = os.environ.get("DELTA_MAINTENANCE_SCHEDULE", "15 */6 * * *")
+    intervals: list[str] = ["raw", "1h", "4h", "1d", "1w"]
+    maintenance: DeltaMaintenance = DeltaMaintenance()
+
+    async def _process(self) -> None:
+        for interval_name in self.intervals:
+            for repository in (
+                OhlcvRepository(table_name=f"ohlcv_{interval_name}"),
+                IndicatorsRepository(table_name=f"indicators_{interval_name}"),
+                # Replaced every tick, vacuuming keeps its old files bounded.
+                LatestIndicatorsRepository(table_name=f"indicators_latest_{interval_name}"),
+            ):
+                try:
+                    await asyncio.to_thread(self.maintenance.run, repository)
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    logger.error(f"Error maintaining table {repository.table_name}: {e}")
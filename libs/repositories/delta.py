@@ -1,27 +1,124 @@
-from datetime import datetime
+from datetime import UTC, datetime
+import functools
 import logging
+import operator
 import os
-from typing import Any, Literal
+from contextlib import contextmanager
+from typing import Any, Iterator, Literal
 
 import polars as pl
 import pyarrow as pa
 import pyarrow.compute as pc
-from deltalake import DeltaTable, write_deltalake
+from deltalake import ColumnProperties, DeltaTable, WriterProperties, write_deltalake
 from pyarrow.compute import Expression
+from pyarrow.dataset import Dataset, FileSystemDataset
 from pydantic import BaseModel, Field
 from pydantic.config import ConfigDict
 
+from libs.repositories.aio import run_table_io
+from libs.repositories.file_cache import file_cache
+from libs.repositories.table_cache import table_cache
+from libs.utils.metrics import metrics
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DELTA_OPERATION_SECONDS = metrics.histogram(
+    "delta_operation_duration_seconds", "Delta table read, write and merge latency."
+)
+DELTA_BYTES = metrics.counter(
+    "delta_bytes_total", "Arrow bytes read from or written to Delta tables."
+)
+DELTA_ROWS = metrics.counter(
+    "delta_rows_total", "Rows read from or written to Delta tables."
+)
+DELTA_MERGE_ROWS = metrics.counter(
+    "delta_merge_rows_total", "Target rows inserted or updated by Delta merges."
+)
+DELTA_SCAN_FILES = metrics.counter(
+    "delta_scan_files_total", "Data files of scanned tables, by whether they were pruned or read."
+)
+
+
+TableData = pl.DataFrame | pa.Table | pa.RecordBatch | pa.RecordBatchReader
+
+# A table version, or the wall-clock time whose newest version to read.
+AsOf = int | datetime
+
+# Write version of every row in tables upserted by appending.
+VERSION_COLUMN = "_version"
+
+
+def time_range_filter(
+    start: int | None = None, end: int | None = None, *, closed: Literal["both", "left"] = "both"
+) -> Expression:
+    """
+    Timestamp bounds in ms, plus the `date` bounds they imply, so tables
+    partitioned by date skip whole partitions instead of opening every file.
+    """
+    expression = pc.scalar(True)
+    if start is not None:
+        start_date = datetime.fromtimestamp(start / 1000, UTC).strftime("%Y-%m-%d")
+        expression &= (pc.field("timestamp") >= start) & (pc.field("date") >= start_date)
+    if end is not None:
+        end_date = datetime.fromtimestamp(end / 1000, UTC).strftime("%Y-%m-%d")
+        before_end = pc.field("timestamp") <= end if closed == "both" else pc.field("timestamp") < end
+        expression &= before_end & (pc.field("date") <= end_date)
+    return expression
+
+
+PartitionFilters = list[tuple[str, str, Any]]
+
+
+def time_range_partitions(
+    start: int | None = None,
+    end: int | None = None,
+    *,
+    closed: Literal["both", "left"] = "both",
+    coins: list[str] | None = None,
+) -> PartitionFilters:
+    """
+    Partition predicates implied by `time_range_filter` with the same
+    bounds, plus a coin list, as `partition_hints` for `read`: whichever of
+    `date`, `timestamp` and `coin` the table is partitioned by, its files
+    outside the range are never listed. Values are strings, as deltalake
+    expects; it compares them as the column's type.
+    """
+    hints: PartitionFilters = []
+    if start is not None:
+        hints.append(("date", ">=", datetime.fromtimestamp(start / 1000, UTC).strftime("%Y-%m-%d")))
+        hints.append(("timestamp", ">=", str(start)))
+    if end is not None:
+        hints.append(("date", "<=", datetime.fromtimestamp(end / 1000, UTC).strftime("%Y-%m-%d")))
+        hints.append(("timestamp", "<=" if closed == "both" else "<", str(end)))
+    if coins is not None:
+        hints.append(("coin", "in", coins))
+    return hints
+
 
 def _initialize_storage_options() -> dict[str, str]:
-    return {
+    storage_options = {
         # "AWS_ACCESS_KEY_ID": os.getenv("AWS_ACCESS_KEY_ID", ""),
         # "AWS_SECRET_ACCESS_KEY": os.getenv("AWS_SECRET_ACCESS_KEY", ""),
         "AWS_S3_ALLOW_UNSAFE_RENAME": "true",
         # "AWS_REGION": os.getenv("AWS_DEFAULT_REGION", ""),
     }
+    # S3-compatible stand-ins such as MinIO.
+    endpoint_url = os.getenv("DELTA_S3_ENDPOINT_URL")
+    if endpoint_url:
+        storage_options["AWS_ENDPOINT_URL"] = endpoint_url
+        storage_options["AWS_ALLOW_HTTP"] = str(endpoint_url.startswith("http://")).lower()
+    return storage_options
+
+
+def _env_optional_int(name: str) -> int | None:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def _initialize_storage_root() -> str:
+    # A local directory or any object store URI deltalake understands.
+    return os.getenv("DELTA_STORAGE_ROOT") or f"s3://{os.getenv('S3_BUCKET_NAME')}"
 
 
 class DeltaRepository(BaseModel):
@@ -30,16 +127,171 @@ class DeltaRepository(BaseModel):
     table_schema: pa.Schema = Field(...)
     table_name: str = Field(...)
     partition_columns: list[str] = Field(...)
+    cluster_columns: list[str] = Field(default_factory=list)
+    # Identify a row for `upsert`.
+    key_columns: list[str] = Field(default_factory=list)
+    upsert_mode: Literal["merge", "append"] = Field(
+        default_factory=lambda: os.getenv("DELTA_UPSERT_MODE", "merge")
+    )
     storage_options: dict[str, str] = Field(default_factory=_initialize_storage_options)
+    storage_root: str = Field(default_factory=_initialize_storage_root)
+    # Parquet options of the files written; deltalake's defaults when unset.
+    parquet_compression: Literal[
+        "UNCOMPRESSED", "SNAPPY", "GZIP", "BROTLI", "LZ4", "ZSTD", "LZ4_RAW"
+    ] | None = Field(default_factory=lambda: os.getenv("DELTA_PARQUET_COMPRESSION") or None)
+    parquet_compression_level: int | None = Field(
+        default_factory=lambda: _env_optional_int("DELTA_PARQUET_COMPRESSION_LEVEL")
+    )
+    parquet_row_group_rows: int | None = Field(
+        default_factory=lambda: _env_optional_int("DELTA_PARQUET_ROW_GROUP_ROWS")
+    )
+    # Only these columns are dictionary encoded; all of them when unset.
+    dictionary_columns: list[str] | None = None
 
     @property
     def s3_path(self) -> str:
-        return f"s3://{os.getenv('S3_BUCKET_NAME')}/{self.table_name}"
+        return f"{self.storage_root.rstrip('/')}/{self.table_name}"
 
     def _check_table_exists(self) -> bool:
-        return DeltaTable.is_deltatable(
-            self.s3_path, storage_options=self.storage_options
+        with table_cache.table(self.s3_path, self.storage_options) as dt:
+            return dt is not None
+
+    def _cluster(self, df: pl.DataFrame) -> pl.DataFrame:
+        return df.sort(self.cluster_columns) if self.cluster_columns else df
+
+    def _schema(self, versioned: bool, dt: DeltaTable | None = None) -> pa.Schema:
+        """
+        `table_schema`, with the column types of `dt` when given: a table
+        keeps the types it was created with, so changing `table_schema`
+        only affects new tables until `relayout` rewrites the old ones.
+        """
+        schema = self.table_schema
+        if dt is not None:
+            existing = dt.schema().to_pyarrow()
+            schema = pa.schema(
+                [existing.field(field.name) if field.name in existing.names else field for field in schema]
+            )
+        if not versioned:
+            return schema
+        return schema.append(pa.field(VERSION_COLUMN, pa.int64()))
+
+    def writer_properties(self) -> WriterProperties:
+        return WriterProperties(
+            compression=self.parquet_compression,
+            compression_level=self.parquet_compression_level,
+            max_row_group_size=self.parquet_row_group_rows,
+            default_column_properties=(
+                ColumnProperties(dictionary_enabled=False) if self.dictionary_columns is not None else None
+            ),
+            column_properties=(
+                {column: ColumnProperties(dictionary_enabled=True) for column in self.dictionary_columns}
+                if self.dictionary_columns
+                else None
+            ),
+        )
+
+    @staticmethod
+    def _is_versioned(dt: DeltaTable) -> bool:
+        return VERSION_COLUMN in dt.schema().to_pyarrow().names
+
+    @staticmethod
+    def _next_version(dt: DeltaTable | None) -> int:
+        """
+        The version of the rows written in the next commit: its Delta table
+        version, or above every version already stored if that is higher.
+        """
+        if dt is None:
+            return 0
+        actions = dt.get_add_actions(flatten=True)
+        stored = (
+            pc.max(actions[f"max.{VERSION_COLUMN}"]).as_py()
+            if f"max.{VERSION_COLUMN}" in actions.schema.names
+            else None
         )
+        return max(dt.version() + 1, stored + 1 if stored is not None else 0)
+
+    def _to_arrow(
+        self,
+        data: TableData,
+        operation: str,
+        version: int | None = None,
+        dt: DeltaTable | None = None,
+    ) -> pa.Table | pa.RecordBatchReader:
+        """
+        Arrow data in `table_schema` column order and types (those of `dt`
+        when given), handed to the writer without a pandas round trip.
+        Polars frames are exported zero-copy; only columns whose type differs
+        from the schema are cast. Streams are cast batch by batch and are not
+        clustered. With a `version`, every row gets it in the version column.
+        """
+        column_schema = self._schema(False, dt)
+        names = column_schema.names
+        schema = self._schema(version is not None, dt)
+        if isinstance(data, pa.RecordBatchReader):
+            def _batches() -> Iterator[pa.RecordBatch]:
+                for batch in data:
+                    batch = batch.select(names).cast(column_schema)
+                    if version is not None:
+                        batch = pa.RecordBatch.from_arrays(
+                            [*batch.columns, pa.repeat(pa.scalar(version, pa.int64()), batch.num_rows)],
+                            schema=schema,
+                        )
+                    DELTA_BYTES.inc(batch.nbytes, table=self.table_name, operation=operation)
+                    DELTA_ROWS.inc(batch.num_rows, table=self.table_name, operation=operation)
+                    yield batch
+
+            return pa.RecordBatchReader.from_batches(schema, _batches())
+
+        if isinstance(data, pl.DataFrame):
+            table = self._cluster(data).to_arrow()
+        else:
+            table = pa.Table.from_batches([data]) if isinstance(data, pa.RecordBatch) else data
+            if self.cluster_columns:
+                table = table.sort_by([(column, "ascending") for column in self.cluster_columns])
+        table = table.select(names).cast(column_schema)
+        if version is not None:
+            table = table.append_column(
+                VERSION_COLUMN, pa.repeat(pa.scalar(version, pa.int64()), table.num_rows)
+            )
+        DELTA_BYTES.inc(table.nbytes, table=self.table_name, operation=operation)
+        DELTA_ROWS.inc(table.num_rows, table=self.table_name, operation=operation)
+        return table
+
+    @contextmanager
+    def _table_as_of(self, as_of: AsOf | None = None) -> Iterator[DeltaTable | None]:
+        """
+        The live handle without `as_of`, or one pinned to the version it
+        names, which reads that version's files in place. Versions stay
+        readable until maintenance vacuums their files.
+        """
+        if as_of is None:
+            with table_cache.table(self.s3_path, self.storage_options) as dt:
+                yield dt
+            return
+        version = as_of
+        if isinstance(as_of, datetime):
+            version = table_cache.version_at(self.s3_path, as_of, self.storage_options)
+            if version is None:
+                raise FileNotFoundError(f"Table {self.table_name} has no version as of {as_of}")
+        with table_cache.version(self.s3_path, version, self.storage_options) as dt:
+            yield dt
+
+    def as_of_time(self, as_of: AsOf) -> datetime:
+        """The wall-clock time of `as_of`: itself, or the version's commit time."""
+        if isinstance(as_of, datetime):
+            return as_of
+        committed_at = table_cache.committed_at(self.s3_path, as_of, self.storage_options)
+        if committed_at is None:
+            raise FileNotFoundError(f"Table {self.table_name} has no version {as_of}")
+        return committed_at
+
+    def current_partition_columns(self) -> list[str]:
+        with table_cache.table(self.s3_path, self.storage_options) as dt:
+            if dt is None:
+                raise FileNotFoundError(
+                    f"Table {self.table_name} does not exist at {self.s3_path}"
+                )
+            return dt.metadata().partition_columns
 
     def read(
         self,
@@ -49,19 +301,47 @@ class DeltaRepository(BaseModel):
         filters: Expression | None = None,
         last_n: int | None = None,
         order_by: str | None = None,
+        as_of: AsOf | None = None,
+        partition_hints: PartitionFilters | None = None,
     ) -> pl.DataFrame:
-        if not self._check_table_exists():
-            logger.error(f"Table {self.table_name} does not exist at {self.s3_path}")
-            raise FileNotFoundError(
-                f"Table {self.table_name} does not exist at {self.s3_path}"
-            )
+        """
+        `partition_hints` are partition predicates already implied by
+        `filters`, such as those of `time_range_partitions`; the ones on
+        columns the table is not partitioned by are left out.
+        """
+        with self._table_as_of(as_of) as dt:
+            if dt is None:
+                logger.error(f"Table {self.table_name} does not exist at {self.s3_path}")
+                raise FileNotFoundError(
+                    f"Table {self.table_name} does not exist at {self.s3_path}"
+                )
+            partitions = self._with_hints(dt, partitions, partition_hints)
+            # Only listing the files needs the handle; they are read after releasing it.
+            try:
+                dataset = self._dataset(dt, partitions, filters)
+                versioned = self._is_versioned(dt)
+                keys_dataset = (
+                    dt.to_pyarrow_dataset(partitions=partitions)
+                    if versioned and filters is not None
+                    else None
+                )
+            except Exception as e:
+                logger.error(f"Error reading table {self.table_name}: {e}")
+                raise
 
         try:
-            dt = DeltaTable(self.s3_path, storage_options=self.storage_options)
+            with DELTA_OPERATION_SECONDS.time(table=self.table_name, operation="read"):
+                if versioned:
+                    arrow_table = self._read_latest_versions(dataset, keys_dataset, columns, filters)
+                else:
+                    arrow_table = self._scan(dataset, columns, filters)
+        except Exception as e:
+            logger.error(f"Error reading table {self.table_name}: {e}")
+            raise
 
-            arrow_table = dt.to_pyarrow_table(
-                partitions=partitions, columns=columns, filters=filters
-            )
+        try:
+            DELTA_BYTES.inc(arrow_table.nbytes, table=self.table_name, operation="read")
+            DELTA_ROWS.inc(arrow_table.num_rows, table=self.table_name, operation="read")
             result = pl.from_arrow(arrow_table).sort(order_by)
             if last_n is not None:
                 if order_by is None:
@@ -76,29 +356,244 @@ class DeltaRepository(BaseModel):
             raise
         return result if isinstance(result, pl.DataFrame) else result.to_frame()
 
+    @staticmethod
+    def _with_hints(
+        dt: DeltaTable, partitions: PartitionFilters | None, partition_hints: PartitionFilters | None
+    ) -> PartitionFilters | None:
+        if not partition_hints:
+            return partitions
+        partition_columns = dt.metadata().partition_columns
+        return [
+            *(partitions or []),
+            *(hint for hint in partition_hints if hint[0] in partition_columns),
+        ] or None
+
+    def scan(
+        self,
+        *,
+        filters: Expression | None = None,
+        as_of: AsOf | None = None,
+        partition_hints: PartitionFilters | None = None,
+    ) -> pl.LazyFrame:
+        """
+        The table (as of a version or time) as a LazyFrame to compose before
+        collecting. Columns it selects and filters polars can translate are
+        pushed down to the Parquet reader; `filters` prune files up front and
+        apply to every row read. Reads do not go through the file cache.
+
+        Rows of a table upserted by appending are matched against `filters`
+        in their newest version only, found by a key-only scan of the
+        partitions in `partition_hints`.
+        """
+        with self._table_as_of(as_of) as dt:
+            if dt is None:
+                raise FileNotFoundError(
+                    f"Table {self.table_name} does not exist at {self.s3_path}"
+                )
+            partitions = self._with_hints(dt, None, partition_hints)
+            dataset = self._dataset(dt, partitions, filters)
+            versioned = self._is_versioned(dt)
+            keys_dataset = dt.to_pyarrow_dataset(partitions=partitions) if versioned else None
+
+        lf = pl.scan_pyarrow_dataset(dataset if filters is None else dataset.filter(filters))
+        if not versioned:
+            return lf
+        version = pl.col(VERSION_COLUMN).fill_null(-1)
+        newest = (
+            pl.scan_pyarrow_dataset(keys_dataset)
+            .select([*self.key_columns, VERSION_COLUMN])
+            .group_by(self.key_columns)
+            .agg(version.max().alias("_newest"))
+        )
+        return (
+            lf.join(newest, on=self.key_columns)
+            .filter(version == pl.col("_newest"))
+            .unique(subset=self.key_columns, keep="any")
+            .select(self.table_schema.names)
+        )
+
+    def _dataset(
+        self,
+        dt: DeltaTable,
+        partitions: PartitionFilters | None,
+        filters: Expression | None,
+    ) -> FileSystemDataset:
+        """The files of `dt` in `partitions` whose statistics `filters` can match."""
+        dataset = dt.to_pyarrow_dataset(partitions=partitions)
+        # The statistics of each file are in its partition expression.
+        fragments = list(dataset.get_fragments(filter=filters) if filters is not None else dataset.get_fragments())
+        total_files, listed_files = len(dt.files()), len(dataset.files)
+        DELTA_SCAN_FILES.inc(total_files - listed_files, table=self.table_name, result="pruned_by_partition")
+        DELTA_SCAN_FILES.inc(listed_files - len(fragments), table=self.table_name, result="pruned_by_statistics")
+        DELTA_SCAN_FILES.inc(len(fragments), table=self.table_name, result="scanned")
+        logger.info(
+            f"Table {self.table_name}: scanning {len(fragments)} of {total_files} files, "
+            f"{total_files - listed_files} pruned by partition, {listed_files - len(fragments)} by statistics."
+        )
+        return FileSystemDataset(fragments, dataset.schema, dataset.format, dataset.filesystem)
+
+    def _scan(
+        self,
+        dataset: Dataset,
+        columns: list[str] | None,
+        filters: Expression | None,
+    ) -> pa.Table:
+        if file_cache is None:
+            return dataset.to_table(columns=columns, filter=filters)
+        return file_cache.read(self.s3_path, dataset, columns=columns, filters=filters)
+
+    def _read_latest_versions(
+        self,
+        dataset: Dataset,
+        keys_dataset: Dataset | None,
+        columns: list[str] | None,
+        filters: Expression | None,
+    ) -> pa.Table:
+        """
+        The newest version of every key in a table upserted by appending.
+        Filters are matched against those only: a key whose newest version
+        does not match is dropped even when an older one would, so filtered
+        reads look the newest versions of the matched keys up separately in
+        `keys_dataset`, the unfiltered files of the partitions read.
+        """
+        read_columns = (
+            list(dict.fromkeys([*columns, *self.key_columns, VERSION_COLUMN]))
+            if columns is not None
+            else None
+        )
+        df = pl.from_arrow(self._scan(dataset, read_columns, filters))
+        version = pl.col(VERSION_COLUMN).fill_null(-1)
+        if filters is not None and not df.is_empty():
+            keys_filter = functools.reduce(
+                operator.and_,
+                [
+                    (pc.field(column) >= df[column].min())
+                    & (pc.field(column) <= df[column].max())
+                    & pc.field(column).isin(df[column].unique().to_arrow())
+                    for column in self.key_columns
+                ],
+            )
+            newest_df = (
+                pl.from_arrow(
+                    self._scan(keys_dataset, [*self.key_columns, VERSION_COLUMN], keys_filter)
+                )
+                .group_by(self.key_columns)
+                .agg(version.max().alias("_newest"))
+            )
+            df = (
+                df.join(newest_df, on=self.key_columns)
+                .filter(version == pl.col("_newest"))
+                .drop("_newest")
+            )
+        else:
+            df = df.filter(version == version.max().over(self.key_columns))
+        df = df.unique(subset=self.key_columns, keep="any", maintain_order=True)
+        return df.select(columns if columns is not None else self.table_schema.names).to_arrow()
+
+    def deduplicate(self, dt: DeltaTable, partition: dict[str, Any] | None = None) -> None:
+        """
+        Rewrites a partition of a table upserted by appending (or the whole
+        table) with only the newest version of every key, in one commit.
+        Callers hold the table's cache lock for writing.
+        """
+        partition = partition or {}
+        df = pl.from_arrow(
+            dt.to_pyarrow_table(
+                partitions=[(column, "=", value) for column, value in partition.items()] or None
+            )
+        )
+        version = pl.col(VERSION_COLUMN).fill_null(-1)
+        df = df.filter(version == version.max().over(self.key_columns)).unique(
+            subset=self.key_columns, keep="any"
+        )
+        schema = self._schema(True, dt)
+        write_deltalake(
+            dt,
+            self._cluster(df).to_arrow().select(schema.names).cast(schema),
+            schema=schema,
+            mode="overwrite",
+            predicate=" AND ".join(
+                f"{column} = '{value}'" if isinstance(value, str) else f"{column} = {value}"
+                for column, value in partition.items()
+            ) or None,
+            storage_options=self.storage_options,
+            writer_properties=self.writer_properties(),
+        )
+
     def write(
-        self, df: pl.DataFrame, mode: Literal["append", "overwrite"] = "append"
+        self, df: TableData, mode: Literal["append", "overwrite"] = "append"
     ) -> None:
-        if not self._check_table_exists():
-            logger.info(f"Table {self.table_name} does not exist at {self.s3_path}")
-            logger.info(f"Initializing table {self.table_name} at {self.s3_path}")
-            self._initialize_table()
+        self._write(df, mode, "write")
 
+    def _write(
+        self,
+        df: TableData,
+        mode: Literal["append", "overwrite"],
+        operation: str,
+        add_version: bool = False,
+    ) -> None:
         try:
-            write_deltalake(
-                self.s3_path,
-                df.to_pandas(),
-                schema=self.table_schema,
-                partition_by=self.partition_columns,
-                storage_options=self.storage_options,
-                mode=mode,
-            )
+            with table_cache.table(
+                self.s3_path, self.storage_options, max_staleness=0, writes=True
+            ) as dt:
+                if dt is None:
+                    logger.info(f"Table {self.table_name} does not exist at {self.s3_path}")
+                    logger.info(f"Initializing table {self.table_name} at {self.s3_path}")
+                    self._initialize_table(versioned=add_version)
+                versioned = dt is not None and self._is_versioned(dt)
+
+                with DELTA_OPERATION_SECONDS.time(table=self.table_name, operation=operation):
+                    # Existing tables keep the partitioning they were created
+                    # with until `relayout` rewrites them.
+                    write_deltalake(
+                        dt if dt is not None else self.s3_path,
+                        self._to_arrow(
+                            df, operation, version=self._next_version(dt) if versioned or add_version else None, dt=dt
+                        ),
+                        schema=self._schema(versioned or add_version, dt),
+                        partition_by=self.partition_columns if dt is None else None,
+                        storage_options=self.storage_options,
+                        mode=mode,
+                        writer_properties=self.writer_properties(),
+                        # The first append upsert adds the version column.
+                        schema_mode="merge" if add_version and dt is not None and not versioned else None,
+                    )
             logger.info(f"Data written to table {self.table_name} successfully.")
         except Exception as e:
             logger.error(f"Error writing to table {self.table_name}: {e}")
             raise
 
-    def _initialize_table(self) -> None:
+    def upsert(self, df: TableData) -> None:
+        """
+        Inserts rows, replacing the ones with the same `key_columns`.
+
+        In merge mode this is a Delta MERGE, which scans the target for the
+        keys. In append mode the rows are appended with a new version and
+        the older versions of their keys are dropped on read and by
+        `deduplicate`, so the cost does not grow with the table.
+        """
+        if self.upsert_mode == "merge":
+            self.update(
+                df,
+                predicate=" AND ".join(f"s.{column} == t.{column}" for column in self.key_columns),
+            )
+            return
+
+        if not self.key_columns:
+            raise ValueError(f"Table {self.table_name} has no key columns to upsert by.")
+        if isinstance(df, pa.RecordBatchReader):
+            df = df.read_all()
+        if not isinstance(df, pl.DataFrame):
+            df = pl.from_arrow(df)
+        # Rows of one append share a version, so it holds one row per key.
+        self._write(
+            df.unique(subset=self.key_columns, keep="last", maintain_order=True),
+            "append",
+            "upsert",
+            add_version=True,
+        )
+
+    def _initialize_table(self, versioned: bool = False) -> None:
         logger.info(
             f"Initializing table {self.table_name} at {self.s3_path}."
         )
@@ -106,7 +601,7 @@ class DeltaRepository(BaseModel):
             DeltaTable.create(
                 table_uri=self.s3_path,
                 mode="ignore",
-                schema=self.table_schema,
+                schema=self._schema(versioned),
                 partition_by=self.partition_columns,
                 storage_options=self.storage_options,
             )
@@ -117,34 +612,215 @@ class DeltaRepository(BaseModel):
 
     def update(
         self,
-        df: pl.DataFrame,
+        df: TableData,
         *,
         predicate: str,
         source_alias: str = "s",
         target_alias: str = "t",
     ) -> None:
-        if not self._check_table_exists():
-            self.write(df)
-            return
-
         try:
-            dt = DeltaTable(self.s3_path, storage_options=self.storage_options)
-            (
-                dt.merge(
-                    source=df.to_pandas(),
-                    predicate=predicate,
-                    source_alias=source_alias,
-                    target_alias=target_alias,
-                )
-                .when_matched_update_all()
-                .when_not_matched_insert_all()
-                .execute()
+            with table_cache.table(
+                self.s3_path, self.storage_options, max_staleness=0, writes=True
+            ) as dt:
+                if dt is None:
+                    self.write(df)
+                    return
+
+                version = self._next_version(dt) if self._is_versioned(dt) else None
+                with DELTA_OPERATION_SECONDS.time(table=self.table_name, operation="merge"):
+                    merge_metrics = (
+                        dt.merge(
+                            source=self._to_arrow(df, "merge", version=version, dt=dt),
+                            predicate=predicate,
+                            source_alias=source_alias,
+                            target_alias=target_alias,
+                            writer_properties=self.writer_properties(),
+                        )
+                        .when_matched_update_all()
+                        .when_not_matched_insert_all()
+                        .execute()
+                    )
+            DELTA_MERGE_ROWS.inc(
+                merge_metrics.get("num_target_rows_inserted", 0),
+                table=self.table_name,
+                action="inserted",
+            )
+            DELTA_MERGE_ROWS.inc(
+                merge_metrics.get("num_target_rows_updated", 0),
+                table=self.table_name,
+                action="updated",
+            )
+            logger.info(
+                f"Table {self.table_name} updated successfully with {merge_metrics.get('num_source_rows', 0)} rows."
             )
-            logger.info(f"Table {self.table_name} updated successfully with {df.shape[0]} rows.")
         except Exception as e:
             logger.error(f"Error updating table {self.table_name}: {e}")
             raise
 
+    async def aread(
+        self,
+        *,
+        partitions: list[tuple[str, str, Any]] | None = None,
+        columns: list[str] | None = None,
+        filters: Expression | None = None,
+        last_n: int | None = None,
+        order_by: str | None = None,
+        as_of: AsOf | None = None,
+        partition_hints: PartitionFilters | None = None,
+    ) -> pl.DataFrame:
+        return await run_table_io(
+            self.table_name,
+            self.read,
+            partitions=partitions,
+            columns=columns,
+            filters=filters,
+            last_n=last_n,
+            order_by=order_by,
+            as_of=as_of,
+            partition_hints=partition_hints,
+        )
+
+    async def awrite(
+        self, df: TableData, mode: Literal["append", "overwrite"] = "append"
+    ) -> None:
+        await run_table_io(self.table_name, self.write, df, mode=mode)
+
+    async def aupdate(
+        self,
+        df: TableData,
+        *,
+        predicate: str,
+        source_alias: str = "s",
+        target_alias: str = "t",
+    ) -> None:
+        await run_table_io(
+            self.table_name,
+            self.update,
+            df,
+            predicate=predicate,
+            source_alias=source_alias,
+            target_alias=target_alias,
+        )
+
+    def relayout(self) -> bool:
+        """
+        Rewrites the table into `partition_columns` and the column types of
+        `table_schema`, with rows sorted by `cluster_columns`, one old
+        partition at a time. Returns False when the table already has that
+        layout.
+
+        Delta cannot change partitioning in place, so the table is replaced
+        and refilled from the files of its previous version, which stay in
+        storage until vacuumed. If refilling fails, the old layout is rebuilt
+        the same way. Writers must be stopped while this runs.
+        """
+        with table_cache.table(
+            self.s3_path, self.storage_options, max_staleness=0, writes=True
+        ) as dt:
+            if dt is None:
+                raise FileNotFoundError(
+                    f"Table {self.table_name} does not exist at {self.s3_path}"
+                )
+            old_partition_columns = dt.metadata().partition_columns
+            schema = dt.schema().to_pyarrow()
+            new_schema = pa.schema(
+                [
+                    field.with_type(self.table_schema.field(field.name).type)
+                    if field.name in self.table_schema.names
+                    else field
+                    for field in schema
+                ]
+            )
+            if old_partition_columns == self.partition_columns and new_schema.equals(schema):
+                logger.info(f"Table {self.table_name} is already partitioned by {self.partition_columns}.")
+                return False
+
+            dataset = dt.to_pyarrow_dataset()
+            expected_rows = dataset.count_rows()
+            chunk_column = old_partition_columns[0] if old_partition_columns else None
+            chunks = (
+                sorted(
+                    set(dt.get_add_actions(flatten=True)[f"partition.{chunk_column}"].to_pylist()),
+                    key=lambda value: (value is None, value),
+                )
+                if chunk_column
+                else [None]
+            )
+            logger.info(
+                f"Re-laying out table {self.table_name} (version {dt.version()}, {len(dt.files())} files, "
+                f"{expected_rows} rows) from {old_partition_columns} to {self.partition_columns}."
+            )
+
+            try:
+                self._replace_table(
+                    new_schema,
+                    self.partition_columns,
+                    self._read_chunks(dataset, new_schema, chunk_column, chunks, self.cluster_columns),
+                )
+                new_table = DeltaTable(self.s3_path, storage_options=self.storage_options)
+                written_rows = new_table.to_pyarrow_dataset().count_rows()
+                if written_rows != expected_rows:
+                    raise RuntimeError(f"expected {expected_rows} rows, wrote {written_rows}")
+            except BaseException as e:  # including interrupts and writer panics
+                logger.error(
+                    f"Error re-laying out table {self.table_name}: {e}. Restoring {old_partition_columns}."
+                )
+                self._replace_table(
+                    schema,
+                    old_partition_columns,
+                    self._read_chunks(dataset, schema, chunk_column, chunks, []),
+                )
+                raise
+            finally:
+                table_cache.invalidate(self.s3_path)
+
+        logger.info(
+            f"Table {self.table_name} re-laid out into {len(new_table.files())} files, version {new_table.version()}."
+        )
+        return True
+
+    def _replace_table(
+        self,
+        schema: pa.Schema,
+        partition_columns: list[str],
+        batches: Iterator[pa.RecordBatch],
+    ) -> None:
+        DeltaTable.create(
+            table_uri=self.s3_path,
+            mode="overwrite",
+            schema=schema,
+            partition_by=partition_columns,
+            storage_options=self.storage_options,
+        )
+        write_deltalake(
+            self.s3_path,
+            pa.RecordBatchReader.from_batches(schema, batches),
+            partition_by=partition_columns,
+            storage_options=self.storage_options,
+            mode="append",
+            writer_properties=self.writer_properties(),
+        )
+
+    @staticmethod
+    def _read_chunks(
+        dataset: Dataset,
+        schema: pa.Schema,
+        chunk_column: str | None,
+        chunks: list[Any],
+        cluster_columns: list[str],
+    ) -> Iterator[pa.RecordBatch]:
+        for value in chunks:
+            if chunk_column is None:
+                table = dataset.to_table()
+            elif value is None:
+                table = dataset.to_table(filter=pc.field(chunk_column).is_null())
+            else:
+                table = dataset.to_table(filter=pc.field(chunk_column) == value)
+            table = table.select(schema.names).cast(schema)
+            if cluster_columns:
+                table = table.sort_by([(column, "ascending") for column in cluster_columns])
+            yield from table.to_batches()
+
     def get_records_in_time_range(
             self,
             start: datetime,
@@ -152,10 +828,13 @@ class DeltaRepository(BaseModel):
             filters: Expression | None = None,
             number_of_points: int | None = 50,
             order_by: str = "timestamp",
-            columns: list[str] = None
+            columns: list[str] = None,
+            as_of: AsOf | None = None,
+            partition_hints: PartitionFilters | None = None,
         ) -> pl.DataFrame:
 
-        full_filters = (pc.field("timestamp") >= int((start).timestamp() * 1000)) & (pc.field("timestamp") <= int((end).timestamp() * 1000))
+        start_ms, end_ms = int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+        full_filters = time_range_filter(start_ms, end_ms)
         if filters is not None:
             full_filters = filters & full_filters
 
@@ -163,6 +842,32 @@ class DeltaRepository(BaseModel):
             filters=full_filters,
             columns=columns,
             last_n=number_of_points,
-            order_by=order_by)
+            order_by=order_by,
+            as_of=as_of,
+            partition_hints=[*time_range_partitions(start_ms, end_ms), *(partition_hints or [])])
 
         return df
+
+    async def aget_records_in_time_range(
+            self,
+            start: datetime,
+            end: datetime,
+            filters: Expression | None = None,
+            number_of_points: int | None = 50,
+            order_by: str = "timestamp",
+            columns: list[str] = None,
+            as_of: AsOf | None = None,
+            partition_hints: PartitionFilters | None = None,
+        ) -> pl.DataFrame:
+        return await run_table_io(
+            self.table_name,
+            self.get_records_in_time_range,
+            start,
+            end,
+            filters=filters,
+            number_of_points=number_of_points,
+            order_by=order_by,
+            columns=columns,
+            as_of=as_of,
+            partition_hints=partition_hints,
+        )
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Iterator
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+from pyarrow.compute import Expression
+
+from libs.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+FILE_CACHE_REQUESTS = metrics.counter(
+    "delta_file_cache_requests_total", "Delta data file lookups in the local disk cache by result."
+)
+FILE_CACHE_EVICTIONS = metrics.counter(
+    "delta_file_cache_evictions_total", "Delta data files evicted from the local disk cache."
+)
+FILE_CACHE_BYTES = metrics.counter(
+    "delta_file_cache_bytes_total", "Bytes fetched into or evicted from the local disk cache."
+)
+
+_COPY_CHUNK_SIZE = 8 * 1024 * 1024
+# Downloads write their temporary file continuously; older ones were abandoned.
+_STALE_TMP_SECONDS = 10 * 60
+
+
+class DeltaFileCache:
+    """
+    Size-bounded local copies of Delta data files, evicted least recently
+    used first and scanned through memory maps.
+
+    Data files are never rewritten in place, so a cached copy stays valid for
+    as long as the log references the file; which files a read needs still
+    comes from the (cached) table handle. Copies are keyed by table URI and
+    file path and survive restarts.
+
+    Processes may share the directory without a lock. Each one bounds only
+    the files it indexed, so together they can hold up to `max_bytes` each,
+    and a copy another process evicted is fetched again, or read remotely
+    when it goes missing during a scan.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._files: OrderedDict[str, int] = OrderedDict()
+        self._pinned: Counter[str] = Counter()
+        self._size = 0
+        self._local_fs = fs.LocalFileSystem(use_mmap=True)
+        self._load()
+
+    def _load(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                    if name.endswith(".tmp"):
+                        # Another process may still be downloading into it.
+                        if time.time() - stat.st_mtime > _STALE_TMP_SECONDS:
+                            os.remove(path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_atime, path, stat.st_size))
+        for _, path, size in sorted(files):
+            self._files[path] = size
+            self._size += size
+        logger.info(f"Delta file cache at {self.root}: {len(self._files)} files, {self._size / 1024 / 1024:.1f} MiB.")
+
+    def _local_path(self, table_uri: str, path: str) -> str:
+        table_key = hashlib.sha256(table_uri.encode()).hexdigest()[:16]
+        # Paths of local tables are absolute and would replace the root.
+        return os.path.join(self.root, table_key, path.lstrip("/"))
+
+    def _fetch(self, filesystem: fs.FileSystem, path: str, local_path: str) -> int:
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        tmp_path = f"{local_path}.{uuid.uuid4().hex}.tmp"
+        size = 0
+        try:
+            with filesystem.open_input_stream(path) as source, open(tmp_path, "wb") as target:
+                while chunk := source.read(_COPY_CHUNK_SIZE):
+                    target.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp_path, local_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return size
+
+    def _get(self, table_uri: str, filesystem: fs.FileSystem, path: str) -> str:
+        local_path = self._local_path(table_uri, path)
+        with self._lock:
+            if local_path in self._files and not os.path.exists(local_path):
+                # Evicted by another process sharing the directory.
+                self._size -= self._files.pop(local_path)
+            if local_path in self._files:
+                self._files.move_to_end(local_path)
+                self._pinned[local_path] += 1
+                FILE_CACHE_REQUESTS.inc(result="hit")
+                return local_path
+
+        size = self._fetch(filesystem, path, local_path)
+        FILE_CACHE_REQUESTS.inc(result="miss")
+        FILE_CACHE_BYTES.inc(size, direction="fetched")
+        with self._lock:
+            if local_path not in self._files:
+                self._size += size
+            self._files[local_path] = size
+            self._files.move_to_end(local_path)
+            self._pinned[local_path] += 1
+            self._evict()
+        return local_path
+
+    def _evict(self) -> None:
+        for path in list(self._files):
+            if self._size <= self.max_bytes:
+                return
+            # Files of a scan in flight are evicted after it.
+            if self._pinned[path]:
+                continue
+            size = self._files.pop(path)
+            self._size -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            FILE_CACHE_EVICTIONS.inc()
+            FILE_CACHE_BYTES.inc(size, direction="evicted")
+
+    def _unpin(self, paths: list[str]) -> None:
+        with self._lock:
+            for path in paths:
+                self._pinned[path] -= 1
+                if not self._pinned[path]:
+                    del self._pinned[path]
+            self._evict()
+
+    @contextmanager
+    def dataset(
+        self, table_uri: str, dataset: ds.FileSystemDataset, filters: Expression | None = None
+    ) -> Iterator[ds.FileSystemDataset]:
+        """
+        The files of `dataset` that `filters` can match, as local copies with
+        the same partition and statistics expressions. The copies are not
+        evicted until the context exits.
+        """
+        fragments = list(dataset.get_fragments(filter=filters) if filters is not None else dataset.get_fragments())
+        local_paths: list[str] = []
+        try:
+            for fragment in fragments:
+                local_paths.append(self._get(table_uri, dataset.filesystem, fragment.path))
+            yield ds.FileSystemDataset.from_paths(
+                local_paths,
+                schema=dataset.schema,
+                format=dataset.format,
+                filesystem=self._local_fs,
+                partitions=[fragment.partition_expression for fragment in fragments],
+            )
+        finally:
+            self._unpin(local_paths)
+
+    def read(
+        self,
+        table_uri: str,
+        dataset: ds.FileSystemDataset,
+        columns: list[str] | None = None,
+        filters: Expression | None = None,
+    ) -> pa.Table:
+        try:
+            with self.dataset(table_uri, dataset, filters) as local_dataset:
+                return local_dataset.to_table(columns=columns, filter=filters)
+        except FileNotFoundError as e:
+            logger.warning(f"A file of {table_uri} went missing during the scan, reading it remotely: {e}")
+            FILE_CACHE_REQUESTS.inc(result="evicted")
+            return dataset.to_table(columns=columns, filter=filters)
+
+
+def _initialize_file_cache() -> DeltaFileCache | None:
+    root = os.environ.get("DELTA_FILE_CACHE_DIR")
+    if not root:
+        return None
+    return DeltaFileCache(
+        root, int(os.environ.get("DELTA_FILE_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+    )
+
+
+# Opt-in: set DELTA_FILE_CACHE_DIR to read through the local disk.
+file_cache = _initialize_file_cache()
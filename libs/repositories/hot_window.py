@@ -0,0 +1,109 @@
+import base64
+import io
+import logging
+from datetime import UTC, datetime
+
+import polars as pl
+from pyarrow.compute import Expression
+from pydantic import BaseModel, ConfigDict, Field
+
+from libs.repositories.coins import CoinsRepository
+from libs.repositories.redis import RedisRepository
+
+logger = logging.getLogger(__name__)
+
+
+def encode_frame(df: pl.DataFrame) -> str:
+    """Arrow IPC stream, zstd-compressed, base64 so it fits the decoded Redis pool."""
+    buffer = io.BytesIO()
+    df.write_ipc_stream(buffer, compression="zstd")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def decode_frame(data: str) -> pl.DataFrame:
+    return pl.read_ipc_stream(io.BytesIO(base64.b64decode(data)))
+
+
+class HotWindowSnapshot(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    version: int
+    data: pl.DataFrame
+
+
+class HotWindowRepository(BaseModel):
+    """
+    The last bars and indicator rows per coin of one interval, published by
+    the crones job after every tick into the `hot_window_<interval>` hash.
+
+    The hash holds a `version`, the columnar `data` and the `latest` rows
+    (the two newest of every coin, all one window of `get_the_latest_records`
+    can hold), written together. Latest-row readers fetch only `version` and
+    `latest` in one HMGET; the whole snapshot is one HGETALL.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    interval: str = Field(...)
+    redis_repository: RedisRepository | None = None
+
+    @property
+    def table_name(self) -> str:
+        return f"hot_window_{self.interval}"
+
+    def _repository(self) -> RedisRepository:
+        if self.redis_repository is None:
+            self.redis_repository = RedisRepository(table_name=self.table_name)
+        return self.redis_repository
+
+    async def publish(self, df: pl.DataFrame, version: int) -> None:
+        latest_df = df.sort("coin", "timestamp").group_by("coin", maintain_order=True).tail(2)
+        await self._repository().write_many(
+            {"version": version, "data": encode_frame(df), "latest": encode_frame(latest_df)}
+        )
+
+    async def version(self) -> int | None:
+        return await self._repository().read("version")
+
+    async def read(self) -> HotWindowSnapshot | None:
+        values = dict(await self._repository().all())
+        if "version" not in values or "data" not in values:
+            return None
+        return HotWindowSnapshot(version=values["version"], data=decode_frame(values["data"]))
+
+    async def read_latest(self) -> HotWindowSnapshot | None:
+        """The snapshot with only the `latest` rows of every coin."""
+        version, latest = await self._repository().read_many(["version", "latest"])
+        if version is None or latest is None:
+            return None
+        return HotWindowSnapshot(version=version, data=decode_frame(latest))
+
+    async def get_the_latest_records(
+        self, filters: Expression = None, columns: list[str] = None
+    ) -> pl.DataFrame | None:
+        """
+        Same rows as `CoinsRepository.get_the_latest_records(filters, last_n=True)`,
+        served from the snapshot. None when nothing was published yet or the
+        snapshot has no bar in the current window, e.g. after the crones job
+        stopped, so callers read Delta instead.
+        """
+        snapshot = await self.read_latest()
+        if snapshot is None:
+            return None
+
+        delta = CoinsRepository.model_fields["interval_to_delta"].default[self.interval]
+        now = datetime.now(UTC)
+        end_time = now.replace(minute=30 if now.minute >= 30 else 0, second=0, microsecond=0)
+        start_timestamp = int((end_time - delta).timestamp() * 1000)
+        end_timestamp = int(end_time.timestamp() * 1000)
+
+        df = snapshot.data.filter(pl.col("timestamp").is_between(start_timestamp, end_timestamp))
+        if df.is_empty():
+            logger.warning(f"Snapshot {self.table_name} version {snapshot.version} is stale.")
+            return None
+        if filters is not None:
+            df = pl.from_arrow(df.to_arrow().filter(filters))
+        df = df.group_by("coin").agg(pl.all().sort_by("timestamp").last())
+        if columns is not None:
+            df = df.select(["coin", *[column for column in columns if column != "coin"]])
+        return df
@@ -1,5 +1,31 @@
+import logging
+import os
+from datetime import UTC, datetime, timedelta
+
+import polars as pl
 import pyarrow as pa
+from pyarrow.compute import Expression
+from pydantic import Field
+
 from libs.repositories.coins import CoinsRepository
+from libs.repositories.delta import AsOf
+
+logger = logging.getLogger(__name__)
+
+# Stored at full precision in compact mode too.
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+
+def compact_schema(schema: pa.Schema) -> pa.Schema:
+    """`schema` with the float64 indicator columns narrowed to float32."""
+    return pa.schema(
+        [
+            field.with_type(pa.float32())
+            if pa.types.is_float64(field.type) and field.name not in PRICE_COLUMNS
+            else field
+            for field in schema
+        ]
+    )
 
 
 class IndicatorsRepository(CoinsRepository):
@@ -31,4 +57,80 @@ class IndicatorsRepository(CoinsRepository):
             ("PSARs_0.02_0.2", pa.float64(), True),
         ]
     )
-    partition_columns: list[str] = ["date", "timestamp"]
+    partition_columns: list[str] = ["date"]
+    cluster_columns: list[str] = ["coin", "timestamp"]
+    # Indicators carry no more than ~6 significant digits, so compact tables
+    # store them as float32, with only `coin` and `date` dictionary encoded.
+    # Applies to tables created afterwards; `relayout` converts old ones.
+    compact: bool = Field(
+        default_factory=lambda: os.getenv("DELTA_COMPACT_INDICATORS", "false").lower() == "true"
+    )
+
+    def model_post_init(self, __context) -> None:
+        if self.compact:
+            self.table_schema = compact_schema(self.table_schema)
+            if self.dictionary_columns is None:
+                self.dictionary_columns = ["coin", "date"]
+
+    def latest_snapshot(self) -> "LatestIndicatorsRepository":
+        return LatestIndicatorsRepository(
+            table_name=f"indicators_latest_{self.interval}",
+            table_schema=self.table_schema,
+            storage_root=self.storage_root,
+            storage_options=self.storage_options,
+            parquet_compression=self.parquet_compression,
+            parquet_compression_level=self.parquet_compression_level,
+            parquet_row_group_rows=self.parquet_row_group_rows,
+            dictionary_columns=self.dictionary_columns,
+        )
+
+    def get_the_latest_records(
+        self, filters: Expression = None, columns: list[str] = None, last_n: bool = False, as_of: AsOf | None = None
+    ) -> pl.DataFrame:
+        # Past states come from the history, whose versions are the ones callers know.
+        latest_repository = self.latest_snapshot()
+        if as_of is None and latest_repository._check_table_exists():
+            return latest_repository.get_the_latest_records(filters, columns, last_n)
+        return super().get_the_latest_records(filters, columns, last_n, as_of)
+
+
+class LatestIndicatorsRepository(CoinsRepository):
+    """
+    The newest indicator row of every coin, one small file replaced in a
+    single commit per tick, so readers see either the previous snapshot or
+    the new one. Filters apply to those rows only.
+    """
+
+    table_schema: pa.Schema = IndicatorsRepository.model_fields["table_schema"].default
+    partition_columns: list[str] = []
+    cluster_columns: list[str] = ["coin"]
+
+    def read_latest(
+        self,
+        k: int = 1,
+        filters: Expression | None = None,
+        columns: list[str] | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        as_of: AsOf | None = None,
+    ) -> pl.DataFrame:
+        if k != 1:
+            raise ValueError(f"Table {self.table_name} only holds the latest row of every coin, got k={k}.")
+        read_columns = list(dict.fromkeys(["coin", "timestamp", *columns])) if columns else None
+        return self.read(
+            filters=self._time_filter(since, until, filters), columns=read_columns, order_by="coin", as_of=as_of
+        )
+
+    def replace(self, df: pl.DataFrame) -> None:
+        current_df = self.read(order_by="coin") if self._check_table_exists() else df.clear()
+        latest_df = (
+            pl.concat([current_df, df], how="diagonal_relaxed")
+            .sort("timestamp", maintain_order=True)
+            .unique(subset=["coin"], keep="last", maintain_order=True)
+        )
+        self.write(latest_df, mode="overwrite")
+        logger.info(f"Table {self.table_name} now holds the latest rows of {latest_df.shape[0]} coins.")
+
+    def rebuild(self, source: CoinsRepository, lookback: timedelta = timedelta(days=30)) -> None:
+        """Coins without rows in `source` within `lookback` keep their current row, if any."""
+        self.replace(source.read_latest(1, since=datetime.now(UTC) - lookback))
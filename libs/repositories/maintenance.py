@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import time
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from deltalake import DeltaTable
+from deltalake.fs import DeltaStorageHandler
+from pydantic import BaseModel, Field
+
+from libs.repositories.delta import DeltaRepository, time_range_filter, time_range_partitions
+from libs.repositories.table_cache import table_cache
+from libs.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_SECONDS = metrics.histogram(
+    "delta_maintenance_duration_seconds", "Delta table maintenance operation latency."
+)
+MAINTENANCE_FILES = metrics.counter(
+    "delta_maintenance_files_total", "Files added or removed by Delta table maintenance."
+)
+MAINTENANCE_SCAN_SECONDS = metrics.histogram(
+    "delta_maintenance_scan_duration_seconds",
+    "Latency of a representative scan before and after maintenance.",
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+class MaintenancePolicy(BaseModel):
+    # A table is optimized once it has more files than this...
+    max_files: int = Field(default_factory=lambda: _env_int("DELTA_MAINTENANCE_MAX_FILES", 64))
+    # ...or its files are smaller than this on average...
+    min_average_file_size: int = Field(
+        default_factory=lambda: _env_int("DELTA_MAINTENANCE_MIN_AVERAGE_FILE_SIZE", 8 * 1024 * 1024)
+    )
+    # ...and only its partitions holding more files than this are rewritten.
+    max_files_per_partition: int = 1
+    z_order_columns: list[str] = ["coin", "timestamp"]
+    target_file_size: int | None = None
+    max_log_entries_since_checkpoint: int = Field(
+        default_factory=lambda: _env_int("DELTA_MAINTENANCE_MAX_LOG_ENTRIES", 50)
+    )
+    # Old files stay readable for time travel and relayout rollbacks until then.
+    vacuum_retention_hours: int = Field(
+        default_factory=lambda: _env_int("DELTA_MAINTENANCE_VACUUM_RETENTION_HOURS", 168)
+    )
+    scan_window: timedelta = timedelta(days=3)
+
+
+class TableHealth(BaseModel):
+    version: int
+    file_count: int
+    average_file_size: float
+    log_entries_since_checkpoint: int
+    crowded_partitions: list[dict[str, Any]]
+
+    def needs_optimize(self, policy: MaintenancePolicy) -> bool:
+        return bool(self.crowded_partitions) and (
+            self.file_count > policy.max_files
+            or self.average_file_size < policy.min_average_file_size
+        )
+
+    def needs_checkpoint(self, policy: MaintenancePolicy) -> bool:
+        return self.log_entries_since_checkpoint > policy.max_log_entries_since_checkpoint
+
+
+class MaintenanceReport(BaseModel):
+    table_name: str
+    health: TableHealth
+    files_removed: int = 0
+    files_added: int = 0
+    files_vacuumed: int = 0
+    checkpointed: bool = False
+    scan_seconds_before: float | None = None
+    scan_seconds_after: float | None = None
+
+
+def _log_entries_since_checkpoint(dt: DeltaTable, storage_options: dict[str, str]) -> int:
+    storage = DeltaStorageHandler(dt.table_uri, options=storage_options)
+    try:
+        last_checkpoint = json.loads(
+            storage.open_input_file("_delta_log/_last_checkpoint").read()
+        )
+    except FileNotFoundError:
+        return dt.version() + 1
+    return dt.version() - last_checkpoint["version"]
+
+
+def _partition_file_count(dt: DeltaTable, partition: dict[str, Any]) -> int:
+    actions = dt.get_add_actions(flatten=True)
+    matches = [True] * actions.num_rows
+    for column, value in partition.items():
+        matches = [
+            match and partition_value == value
+            for match, partition_value in zip(matches, actions[f"partition.{column}"].to_pylist())
+        ]
+    return sum(matches)
+
+
+class DeltaMaintenance(BaseModel):
+    """
+    Compacts and Z-orders crowded partitions, vacuums files that are no longer
+    referenced and checkpoints the log, each only when the table crosses the
+    thresholds of its policy.
+
+    Runs under the table's cache lock, so in the crones process it interleaves
+    with merges instead of conflicting with them.
+    """
+
+    default_policy: MaintenancePolicy = Field(default_factory=MaintenancePolicy)
+    policies: dict[str, MaintenancePolicy] = {}
+
+    def policy_for(self, table_name: str) -> MaintenancePolicy:
+        return self.policies.get(table_name, self.default_policy)
+
+    def inspect(self, repository: DeltaRepository) -> TableHealth:
+        with table_cache.table(repository.s3_path, repository.storage_options, max_staleness=0) as dt:
+            if dt is None:
+                raise FileNotFoundError(
+                    f"Table {repository.table_name} does not exist at {repository.s3_path}"
+                )
+            return self._inspect(dt, repository, self.policy_for(repository.table_name))
+
+    def _inspect(
+        self, dt: DeltaTable, repository: DeltaRepository, policy: MaintenancePolicy
+    ) -> TableHealth:
+        actions = dt.get_add_actions(flatten=True)
+        partition_columns = dt.metadata().partition_columns
+        partitions = Counter(
+            zip(*[actions[f"partition.{column}"].to_pylist() for column in partition_columns])
+            if partition_columns
+            else [()] * actions.num_rows
+        )
+        sizes = actions["size_bytes"].to_pylist()
+        return TableHealth(
+            version=dt.version(),
+            file_count=len(sizes),
+            average_file_size=sum(sizes) / len(sizes) if sizes else 0.0,
+            log_entries_since_checkpoint=_log_entries_since_checkpoint(dt, repository.storage_options),
+            crowded_partitions=[
+                dict(zip(partition_columns, values))
+                for values, file_count in sorted(partitions.items(), key=lambda item: str(item[0]))
+                if file_count > policy.max_files_per_partition
+            ],
+        )
+
+    def run(self, repository: DeltaRepository) -> MaintenanceReport:
+        policy = self.policy_for(repository.table_name)
+        table_name = repository.table_name
+        with table_cache.table(
+            repository.s3_path, repository.storage_options, max_staleness=0, writes=True
+        ) as dt:
+            if dt is None:
+                raise FileNotFoundError(
+                    f"Table {table_name} does not exist at {repository.s3_path}"
+                )
+            health = self._inspect(dt, repository, policy)
+            report = MaintenanceReport(table_name=table_name, health=health)
+            logger.info(
+                f"Table {table_name}: version {health.version}, {health.file_count} files, "
+                f"{health.average_file_size / 1024:.0f} KiB on average, {len(health.crowded_partitions)} crowded "
+                f"partitions, {health.log_entries_since_checkpoint} log entries since the last checkpoint."
+            )
+
+            if health.needs_optimize(policy):
+                report.scan_seconds_before = self._timed_scan(repository, policy, "before")
+                with MAINTENANCE_SECONDS.time(table=table_name, operation="optimize"):
+                    for partition in health.crowded_partitions:
+                        if repository._is_versioned(dt):
+                            # Appended upserts: keep only the newest version of
+                            # every key, rewritten clustered.
+                            files_before = _partition_file_count(dt, partition)
+                            repository.deduplicate(dt, partition)
+                            report.files_removed += files_before
+                            report.files_added += _partition_file_count(dt, partition)
+                            continue
+                        result = dt.optimize.z_order(
+                            policy.z_order_columns,
+                            partition_filters=[
+                                (column, "=", value) for column, value in partition.items()
+                            ] or None,
+                            target_size=policy.target_file_size,
+                            writer_properties=repository.writer_properties(),
+                        )
+                        report.files_removed += result["numFilesRemoved"]
+                        report.files_added += result["numFilesAdded"]
+                MAINTENANCE_FILES.inc(report.files_removed, table=table_name, action="removed")
+                MAINTENANCE_FILES.inc(report.files_added, table=table_name, action="added")
+                report.scan_seconds_after = self._timed_scan(repository, policy, "after")
+
+            with MAINTENANCE_SECONDS.time(table=table_name, operation="vacuum"):
+                vacuumed = dt.vacuum(
+                    retention_hours=policy.vacuum_retention_hours,
+                    dry_run=False,
+                    enforce_retention_duration=False,
+                )
+                # Vacuum commits to the log without advancing the handle.
+                dt.update_incremental()
+            report.files_vacuumed = len(vacuumed)
+            MAINTENANCE_FILES.inc(report.files_vacuumed, table=table_name, action="vacuumed")
+
+            if health.needs_checkpoint(policy) or report.files_added or report.files_vacuumed:
+                with MAINTENANCE_SECONDS.time(table=table_name, operation="checkpoint"):
+                    dt.create_checkpoint()
+                    dt.cleanup_metadata()
+                report.checkpointed = True
+
+        summary = (
+            f"Maintained table {table_name}: {report.files_removed} files compacted into {report.files_added}, "
+            f"{report.files_vacuumed} vacuumed, checkpointed: {report.checkpointed}."
+        )
+        if report.scan_seconds_before is not None:
+            summary += f" Scan took {report.scan_seconds_before:.3f}s before, {report.scan_seconds_after:.3f}s after."
+        logger.info(summary)
+        return report
+
+    def _timed_scan(
+        self, repository: DeltaRepository, policy: MaintenancePolicy, phase: str
+    ) -> float:
+        scan_start = int((datetime.now(UTC) - policy.scan_window).timestamp() * 1000)
+        start = time.perf_counter()
+        repository.read(
+            filters=time_range_filter(scan_start),
+            partition_hints=time_range_partitions(scan_start),
+            order_by="timestamp",
+        )
+        elapsed = time.perf_counter() - start
+        MAINTENANCE_SCAN_SECONDS.observe(elapsed, table=repository.table_name, phase=phase)
+        return elapsed
+
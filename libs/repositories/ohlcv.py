@@ -15,4 +15,5 @@ class OhlcvRepository(CoinsRepository):
             ("volume", pa.float64()),
         ]
     )
-    partition_columns: list[str] = ["date", "timestamp"]
+    partition_columns: list[str] = ["date"]
+    cluster_columns: list[str] = ["coin", "timestamp"]
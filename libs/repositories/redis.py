@@ -6,6 +6,19 @@ from libs.utils.redis.pool import init_redis_pool
 from settings import settings
 
 
+_redis: Redis | None = None
+
+
+async def shared_redis() -> Redis:
+    """One connection pool per process, shared by every repository."""
+    global _redis
+    if _redis is None:
+        host = settings.REDIS_HOST
+        password = None  # TODO change to settings.REDIS_PASSWORD
+        _redis = await anext(init_redis_pool(host=host, password=password))
+    return _redis
+
+
 class RedisRepository(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
@@ -14,9 +27,7 @@ class RedisRepository(BaseModel):
 
     async def initialize(self):
         if self.redis is None:
-            host = settings.REDIS_HOST
-            password = None  # TODO change to settings.REDIS_PASSWORD
-            self.redis = await anext(init_redis_pool(host=host, password=password))
+            self.redis = await shared_redis()
 
     async def read(self, key: str) -> Any:
         await self.initialize()
@@ -25,6 +36,11 @@ class RedisRepository(BaseModel):
             return None
         return json.loads(json_str)
 
+    async def read_many(self, keys: list[str]) -> list[Any]:
+        await self.initialize()
+        json_strs = await self.redis.hmget(self.table_name, keys)
+        return [None if json_str is None else json.loads(json_str) for json_str in json_strs]
+
     async def all(self) -> list[Any]:
         await self.initialize()
         all_records = await self.redis.hgetall(self.table_name)
@@ -35,3 +51,12 @@ class RedisRepository(BaseModel):
     async def write(self, key: str, value: Any) -> None:
         await self.initialize()
         await self.redis.hset(self.table_name, key, json.dumps(value))
+
+    async def write_many(self, values: dict[str, Any]) -> None:
+        await self.initialize()
+        if not values:
+            return
+        await self.redis.hset(
+            self.table_name,
+            mapping={key: json.dumps(value) for key, value in values.items()},
+        )
@@ -0,0 +1,209 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from typing import Iterator
+
+from deltalake import DeltaTable
+from deltalake.exceptions import TableNotFoundError
+
+from libs.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LOG_REPLAY_SECONDS = metrics.histogram(
+    "delta_log_replay_duration_seconds",
+    "Time spent loading or incrementally refreshing Delta transaction logs.",
+)
+TABLE_CACHE_REQUESTS = metrics.counter(
+    "delta_table_cache_requests_total", "Delta table handle lookups by result."
+)
+
+
+class _CachedTable:
+    def __init__(self, table: DeltaTable):
+        self.table = table
+        self.refreshed_at = time.monotonic()
+
+
+class _CommitIndex:
+    """Commit timestamps (ms) of a table's versions, both ascending."""
+
+    def __init__(self):
+        self.versions: list[int] = []
+        self.timestamps: list[int] = []
+
+    def extend(self, commits: list[dict]) -> None:
+        for commit in sorted(commits, key=lambda commit: commit["version"]):
+            if self.versions and commit["version"] <= self.versions[-1]:
+                continue
+            self.versions.append(commit["version"])
+            # Clock skew between writers must not unsort the index.
+            self.timestamps.append(max(commit["timestamp"], self.timestamps[-1] if self.timestamps else 0))
+
+
+class DeltaTableCache:
+    """
+    Process-wide DeltaTable handles keyed by table URI.
+
+    A handle is loaded once and afterwards only replays the log entries
+    committed since, via `update_incremental()`, and only when it is older
+    than the staleness bound. Writes made through a handle advance it in
+    place. Handles are not safe for concurrent use, so callers hold the
+    per-table lock for the duration of an operation.
+
+    Handles pinned to an older version never change, so up to
+    DELTA_VERSION_CACHE_SIZE of them are kept, least recently used first
+    out, along with an index from commit time to version per table.
+    """
+
+    def __init__(self, max_staleness: float | None = None):
+        self.max_staleness = (
+            max_staleness
+            if max_staleness is not None
+            else float(os.environ.get("DELTA_TABLE_MAX_STALENESS_SECONDS", 5))
+        )
+        self.max_versions = int(os.environ.get("DELTA_VERSION_CACHE_SIZE", 16))
+        self._lock = threading.Lock()
+        self._tables: dict[str, _CachedTable] = {}
+        self._uri_locks: dict[str, threading.RLock] = {}
+        self._versions: OrderedDict[tuple[str, int], DeltaTable] = OrderedDict()
+        self._commit_indexes: dict[str, _CommitIndex] = {}
+
+    def _uri_lock(self, uri: str) -> threading.RLock:
+        with self._lock:
+            return self._uri_locks.setdefault(uri, threading.RLock())
+
+    @contextmanager
+    def table(
+        self,
+        uri: str,
+        storage_options: dict[str, str] | None = None,
+        max_staleness: float | None = None,
+        writes: bool = False,
+    ) -> Iterator[DeltaTable | None]:
+        """
+        Yields the refreshed handle, or None when no table exists at `uri`.
+        Writers pass `writes=True`; the handle they committed through counts
+        as fresh afterwards.
+        """
+        max_staleness = self.max_staleness if max_staleness is None else max_staleness
+        with self._uri_lock(uri):
+            cached = self._tables.get(uri)
+            if cached is None:
+                try:
+                    with LOG_REPLAY_SECONDS.time(uri=uri, kind="load"):
+                        table = DeltaTable(uri, storage_options=storage_options)
+                except TableNotFoundError:
+                    TABLE_CACHE_REQUESTS.inc(result="missing")
+                    yield None
+                    return
+                cached = self._tables[uri] = _CachedTable(table)
+                TABLE_CACHE_REQUESTS.inc(result="load")
+            elif time.monotonic() - cached.refreshed_at > max_staleness:
+                try:
+                    with LOG_REPLAY_SECONDS.time(uri=uri, kind="incremental"):
+                        cached.table.update_incremental()
+                except Exception:
+                    self.invalidate(uri)
+                    raise
+                cached.refreshed_at = time.monotonic()
+                TABLE_CACHE_REQUESTS.inc(result="refresh")
+            else:
+                TABLE_CACHE_REQUESTS.inc(result="hit")
+
+            try:
+                yield cached.table
+            except Exception:
+                if writes:
+                    self.invalidate(uri)
+                raise
+            if writes:
+                cached.refreshed_at = time.monotonic()
+
+    @contextmanager
+    def version(
+        self, uri: str, version: int, storage_options: dict[str, str] | None = None
+    ) -> Iterator[DeltaTable | None]:
+        """
+        Yields a handle pinned to `version`, or None when no table exists at
+        `uri`. Versions whose log or data files were cleaned up or vacuumed
+        fail to load or read.
+        """
+        key = (uri, version)
+        with self._uri_lock(f"{uri}@{version}"):
+            with self._lock:
+                table = self._versions.get(key)
+                if table is not None:
+                    self._versions.move_to_end(key)
+            if table is None:
+                try:
+                    with LOG_REPLAY_SECONDS.time(uri=uri, kind="version"):
+                        table = DeltaTable(uri, version=version, storage_options=storage_options)
+                except TableNotFoundError:
+                    TABLE_CACHE_REQUESTS.inc(result="missing")
+                    yield None
+                    return
+                TABLE_CACHE_REQUESTS.inc(result="version_load")
+                with self._lock:
+                    self._versions[key] = table
+                    while len(self._versions) > self.max_versions:
+                        self._versions.popitem(last=False)
+            else:
+                TABLE_CACHE_REQUESTS.inc(result="version_hit")
+            yield table
+
+    def _commit_index(self, uri: str, storage_options: dict[str, str] | None) -> _CommitIndex | None:
+        with self.table(uri, storage_options) as dt:
+            if dt is None:
+                return None
+            index = self._commit_indexes.get(uri)
+            if index is None or (index.versions and dt.version() < index.versions[-1]):
+                # New, or the table was deleted and created again.
+                index = self._commit_indexes[uri] = _CommitIndex()
+                with self._lock:
+                    for key in [key for key in self._versions if key[0] == uri]:
+                        self._versions.pop(key)
+            indexed = index.versions[-1] if index.versions else -1
+            if dt.version() > indexed:
+                # Only the commits since the last lookup are read.
+                index.extend(dt.history(dt.version() - indexed))
+            return index
+
+    def version_at(
+        self, uri: str, when: datetime, storage_options: dict[str, str] | None = None
+    ) -> int | None:
+        """The newest version committed at or before `when`, None if none is."""
+        index = self._commit_index(uri, storage_options)
+        if index is None:
+            return None
+        position = bisect.bisect_right(index.timestamps, int(when.timestamp() * 1000))
+        return index.versions[position - 1] if position else None
+
+    def committed_at(
+        self, uri: str, version: int, storage_options: dict[str, str] | None = None
+    ) -> datetime | None:
+        index = self._commit_index(uri, storage_options)
+        if index is None:
+            return None
+        position = bisect.bisect_left(index.versions, version)
+        if position == len(index.versions) or index.versions[position] != version:
+            return None
+        return datetime.fromtimestamp(index.timestamps[position] / 1000, UTC)
+
+    def invalidate(self, uri: str | None = None) -> None:
+        with self._lock:
+            if uri is None:
+                self._tables.clear()
+                self._versions.clear()
+                self._commit_indexes.clear()
+            else:
+                # Pinned versions and the commit index stay valid.
+                self._tables.pop(uri, None)
+
+
+table_cache = DeltaTableCache()
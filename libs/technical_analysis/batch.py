@@ -0,0 +1,310 @@
+import sys
+
+import numpy as np
+import polars as pl
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+INDICATOR_COLUMNS = [
+    "MACD_12_26_9",
+    "MACD_histogram_12_26_9",
+    "RSI_14",
+    "BBL_5_2.0",
+    "BBM_5_2.0",
+    "BBU_5_2.0",
+    "SMA_20",
+    "EMA_50",
+    "OBV_in_million",
+    "STOCHk_14_3_3",
+    "STOCHd_14_3_3",
+    "ADX_14",
+    "WILLR_14",
+    "CMF_20",
+    "PSARl_0.02_0.2",
+    "PSARs_0.02_0.2",
+]
+
+OUTPUT_COLUMNS = ["coin", "timestamp", "date", *OHLCV_COLUMNS, *INDICATOR_COLUMNS]
+
+_EPSILON = sys.float_info.epsilon
+
+
+def _over(expr: pl.Expr) -> pl.Expr:
+    return expr.over("coin")
+
+
+def _non_zero_range(high: pl.Expr, low: pl.Expr) -> pl.Expr:
+    diff = high - low
+    return pl.when(diff == 0).then(diff + _EPSILON).otherwise(diff)
+
+
+def _rma(expr: pl.Expr, length: int) -> pl.Expr:
+    # pandas_ta rma: ewm(alpha=1/length, min_periods=length), adjusted.
+    return _over(
+        expr.ewm_mean(alpha=1.0 / length, adjust=True, min_periods=length)
+    )
+
+
+def _sma_seeded(column: str, length: int) -> pl.Expr:
+    # pandas_ta ema seeds the recursion with the SMA of the first `length`
+    # valid values and blanks everything before it.
+    valid_count = _over(pl.col(column).is_not_null().cum_sum())
+    return (
+        pl.when(valid_count < length)
+        .then(None)
+        .when(valid_count == length)
+        .then(_over(pl.col(column).rolling_mean(length)))
+        .otherwise(pl.col(column))
+    )
+
+
+def _ema(column: str, length: int) -> pl.Expr:
+    return _over(pl.col(column).ewm_mean(span=length, adjust=False, min_periods=1))
+
+
+def _zero(expr: pl.Expr) -> pl.Expr:
+    return pl.when(expr.abs() < _EPSILON).then(0.0).otherwise(expr)
+
+
+def _psar(
+    coins: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    af0: float = 0.02,
+    max_af: float = 0.2,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Parabolic SAR over rows sorted by (coin, timestamp), restarted per coin."""
+    long = np.full(high.shape[0], np.nan)
+    short = np.full(high.shape[0], np.nan)
+
+    boundaries = np.flatnonzero(coins[1:] != coins[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [high.shape[0]]))
+
+    for start, end in zip(starts, ends):
+        if end - start < 2:
+            continue
+        h = high[start:end]
+        l = low[start:end]
+
+        up = h[1] - h[0]
+        dn = l[0] - l[1]
+        falling = dn > up and dn > 0 and abs(dn) >= _EPSILON
+        sar, ep = (h[0], l[0]) if falling else (l[0], h[0])
+        af = af0
+
+        for row in range(1, end - start):
+            # pandas_ta reads iloc[row - 2], which is the last bar of the frame
+            # on row 1, so every value would depend on the newest bar. The
+            # first bar is used instead, as `PsarState` does when streaming.
+            prev_2 = max(row - 2, 0)
+            _sar = sar + af * (ep - sar)
+            if falling:
+                reverse = h[row] > _sar
+                if l[row] < ep:
+                    ep = l[row]
+                    af = min(af + af0, max_af)
+                _sar = max(h[row - 1], h[prev_2], _sar)
+            else:
+                reverse = l[row] < _sar
+                if h[row] > ep:
+                    ep = h[row]
+                    af = min(af + af0, max_af)
+                _sar = min(l[row - 1], l[prev_2], _sar)
+
+            if reverse:
+                _sar = ep
+                af = af0
+                falling = not falling
+                ep = l[row] if falling else h[row]
+
+            sar = _sar
+            if falling:
+                short[start + row] = sar
+            else:
+                long[start + row] = sar
+
+    return long, short
+
+
+def calculate_ta_indicators_batch(
+    df: pl.DataFrame, return_last_one: bool = True
+) -> pl.DataFrame:
+    """
+    Vectorized multi-coin counterpart of `calculate_ta_indicators`.
+
+    Takes OHLCV rows for any number of coins and computes every indicator in
+    one grouped pass, returning rows in the `IndicatorsRepository` schema.
+    Indicators without enough history are null instead of dropping the coin.
+    """
+    if df.is_empty():
+        return pl.DataFrame(
+            schema={
+                "coin": pl.String,
+                "timestamp": pl.Int64,
+                "date": pl.String,
+                **{column: pl.Float64 for column in OHLCV_COLUMNS + INDICATOR_COLUMNS},
+            }
+        )
+
+    df = (
+        df.select(
+            pl.col("coin").cast(pl.String),
+            pl.col("timestamp").cast(pl.Int64),
+            *[pl.col(column).cast(pl.Float64) for column in OHLCV_COLUMNS],
+        )
+        .unique(subset=["coin", "timestamp"], keep="last", maintain_order=True)
+        .sort("coin", "timestamp")
+    )
+
+    close, high, low, volume = (
+        pl.col("close"),
+        pl.col("high"),
+        pl.col("low"),
+        pl.col("volume"),
+    )
+    prev_close = _over(close.shift(1))
+
+    df = df.with_columns(
+        _over(close.diff()).alias("_close_diff"),
+        _over(high.diff()).alias("_up"),
+        (_over(low.shift(1)) - low).alias("_dn"),
+        _over(low.rolling_min(14)).alias("_lowest_low"),
+        _over(high.rolling_max(14)).alias("_highest_high"),
+        pl.max_horizontal(
+            _non_zero_range(high, low).abs(),
+            (high - prev_close).abs(),
+            (prev_close - low).abs(),
+        )
+        .alias("_true_range"),
+        prev_close.is_null().alias("_first_row"),
+    )
+
+    df = df.with_columns(
+        pl.when(pl.col("_first_row"))
+        .then(None)
+        .otherwise(pl.col("_true_range"))
+        .alias("_true_range"),
+        pl.when(pl.col("_close_diff") < 0)
+        .then(0.0)
+        .otherwise(pl.col("_close_diff"))
+        .alias("_gain"),
+        pl.when(pl.col("_close_diff") > 0)
+        .then(0.0)
+        .otherwise(pl.col("_close_diff"))
+        .alias("_loss"),
+        pl.when(pl.col("_up").is_null())
+        .then(None)
+        .when((pl.col("_up") > pl.col("_dn")) & (pl.col("_up") > 0))
+        .then(_zero(pl.col("_up")))
+        .otherwise(0.0)
+        .alias("_dm_plus"),
+        pl.when(pl.col("_dn").is_null())
+        .then(None)
+        .when((pl.col("_dn") > pl.col("_up")) & (pl.col("_dn") > 0))
+        .then(_zero(pl.col("_dn")))
+        .otherwise(0.0)
+        .alias("_dm_minus"),
+        _sma_seeded("close", 12).alias("_ema_fast"),
+        _sma_seeded("close", 26).alias("_ema_slow"),
+        _sma_seeded("close", 50).alias("EMA_50"),
+        (
+            100
+            * (close - pl.col("_lowest_low"))
+            / _non_zero_range(pl.col("_highest_high"), pl.col("_lowest_low"))
+        ).alias("_stoch"),
+        (
+            100
+            * (
+                (close - pl.col("_lowest_low"))
+                / (pl.col("_highest_high") - pl.col("_lowest_low"))
+                - 1
+            )
+        ).alias("WILLR_14"),
+        (
+            (2 * close - (high + low)) * (volume / _non_zero_range(high, low))
+        ).alias("_money_flow"),
+        _over((close.diff().sign().fill_null(1.0) * volume).cum_sum()).alias("_obv"),
+        _over(close.rolling_mean(5)).alias("BBM_5_2.0"),
+        _over(close.rolling_std(5, ddof=0)).alias("_bb_std"),
+        _over(close.rolling_mean(20)).alias("SMA_20"),
+    )
+
+    df = df.with_columns(
+        _ema("_ema_fast", 12).alias("_ema_fast"),
+        _ema("_ema_slow", 26).alias("_ema_slow"),
+        _ema("EMA_50", 50).alias("EMA_50"),
+        _rma(pl.col("_gain"), 14).alias("_avg_gain"),
+        _rma(pl.col("_loss"), 14).alias("_avg_loss"),
+        _rma(pl.col("_true_range"), 14).alias("_atr"),
+        _rma(pl.col("_dm_plus"), 14).alias("_dm_plus"),
+        _rma(pl.col("_dm_minus"), 14).alias("_dm_minus"),
+        _over(pl.col("_stoch").rolling_mean(3)).alias("STOCHk_14_3_3"),
+        (
+            _over(pl.col("_money_flow").rolling_sum(20))
+            / _over(volume.rolling_sum(20))
+        ).alias("CMF_20"),
+        (pl.col("_obv") / 1e7).alias("OBV_in_million"),
+        (pl.col("BBM_5_2.0") - 2.0 * pl.col("_bb_std")).alias("BBL_5_2.0"),
+        (pl.col("BBM_5_2.0") + 2.0 * pl.col("_bb_std")).alias("BBU_5_2.0"),
+    )
+
+    df = df.with_columns(
+        (pl.col("_ema_fast") - pl.col("_ema_slow")).alias("MACD_12_26_9"),
+        (
+            100
+            * pl.col("_avg_gain")
+            / (pl.col("_avg_gain") + pl.col("_avg_loss").abs())
+        )
+        .fill_nan(None)
+        .alias("RSI_14"),
+        (100 / pl.col("_atr") * pl.col("_dm_plus")).alias("_di_plus"),
+        (100 / pl.col("_atr") * pl.col("_dm_minus")).alias("_di_minus"),
+        _over(pl.col("STOCHk_14_3_3").rolling_mean(3)).alias("STOCHd_14_3_3"),
+    )
+
+    df = df.with_columns(
+        _sma_seeded("MACD_12_26_9", 9).alias("_macd_signal"),
+        (
+            100
+            * (pl.col("_di_plus") - pl.col("_di_minus")).abs()
+            / (pl.col("_di_plus") + pl.col("_di_minus"))
+        )
+        .fill_nan(None)
+        .alias("_dx"),
+    )
+
+    df = df.with_columns(
+        _ema("_macd_signal", 9).alias("_macd_signal"),
+        _rma(pl.col("_dx"), 14).alias("ADX_14"),
+    )
+
+    df = df.with_columns(
+        (pl.col("MACD_12_26_9") - pl.col("_macd_signal")).alias(
+            "MACD_histogram_12_26_9"
+        ),
+    )
+
+    psar_long, psar_short = _psar(
+        df["coin"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy()
+    )
+    df = df.with_columns(
+        pl.Series("PSARl_0.02_0.2", psar_long).fill_nan(None),
+        pl.Series("PSARs_0.02_0.2", psar_short).fill_nan(None),
+        pl.from_epoch("timestamp", time_unit="ms").dt.strftime("%Y-%m-%d").alias("date"),
+    )
+
+    df = df.select(
+        "coin",
+        "timestamp",
+        "date",
+        *OHLCV_COLUMNS,
+        *[pl.col(column).fill_nan(None) for column in INDICATOR_COLUMNS],
+    )
+
+    if return_last_one:
+        return df.group_by("coin", maintain_order=True).last()
+
+    # Mirrors `calculate_ta_indicators`: long histories drop their warm-up bars.
+    row_index = _over(pl.int_range(pl.len()))
+    return df.filter((_over(pl.len()) <= 80) | (row_index >= 49))
@@ -0,0 +1,378 @@
+import math
+import sys
+from datetime import UTC, datetime
+from typing import Any
+
+import polars as pl
+from pydantic import BaseModel, Field
+
+from libs.technical_analysis.batch import INDICATOR_COLUMNS, OHLCV_COLUMNS
+
+_EPSILON = sys.float_info.epsilon
+
+
+def _is_valid(value: float | None) -> bool:
+    return value is not None and not math.isnan(value)
+
+
+def _non_zero_range(high: float, low: float) -> float:
+    diff = high - low
+    return diff + _EPSILON if diff == 0 else diff
+
+
+def _zero(value: float) -> float:
+    return 0.0 if abs(value) < _EPSILON else value
+
+
+class EwmState(BaseModel):
+    """Exponentially weighted mean, step by step, with pandas `ewm` semantics."""
+
+    alpha: float
+    adjust: bool
+    min_periods: int = 1
+    weighted: float | None = None
+    old_wt: float = 1.0
+    nobs: int = 0
+
+    def update(self, value: float | None) -> float | None:
+        is_observation = _is_valid(value)
+        self.nobs += int(is_observation)
+
+        if self.weighted is not None:
+            self.old_wt *= 1.0 - self.alpha
+            if is_observation:
+                new_wt = 1.0 if self.adjust else self.alpha
+                if self.weighted != value:
+                    self.weighted = (self.old_wt * self.weighted + new_wt * value) / (
+                        self.old_wt + new_wt
+                    )
+                self.old_wt = self.old_wt + new_wt if self.adjust else 1.0
+        elif is_observation:
+            self.weighted = value
+
+        return self.weighted if self.nobs >= max(self.min_periods, 1) else None
+
+
+class EmaState(BaseModel):
+    """pandas_ta `ema`: SMA of the first `length` values, then recursive EMA."""
+
+    length: int
+    count: int = 0
+    seed_sum: float = 0.0
+    ewm: EwmState
+
+    @classmethod
+    def create(cls, length: int) -> "EmaState":
+        return cls(length=length, ewm=EwmState(alpha=2 / (length + 1), adjust=False))
+
+    def update(self, value: float | None) -> float | None:
+        if not _is_valid(value):
+            return self.ewm.update(None) if self.count >= self.length else None
+
+        self.count += 1
+        if self.count < self.length:
+            self.seed_sum += value
+            return None
+        if self.count == self.length:
+            self.seed_sum += value
+            return self.ewm.update(self.seed_sum / self.length)
+        return self.ewm.update(value)
+
+
+class RollingWindow(BaseModel):
+    size: int
+    values: list[float] = Field(default_factory=list)
+
+    def push(self, value: float | None) -> None:
+        self.values.append(value if _is_valid(value) else math.nan)
+        if len(self.values) > self.size:
+            del self.values[0]
+
+    @property
+    def is_full(self) -> bool:
+        return len(self.values) == self.size and all(
+            not math.isnan(value) for value in self.values
+        )
+
+    def sum(self) -> float | None:
+        return math.fsum(self.values) if self.is_full else None
+
+    def mean(self) -> float | None:
+        return math.fsum(self.values) / self.size if self.is_full else None
+
+    def std(self) -> float | None:
+        if not self.is_full:
+            return None
+        mean = math.fsum(self.values) / self.size
+        return math.sqrt(
+            math.fsum((value - mean) ** 2 for value in self.values) / self.size
+        )
+
+    def min(self) -> float | None:
+        return min(self.values) if self.is_full else None
+
+    def max(self) -> float | None:
+        return max(self.values) if self.is_full else None
+
+
+def _rma(length: int = 14) -> EwmState:
+    return EwmState(alpha=1.0 / length, adjust=True, min_periods=length)
+
+
+class PsarState(BaseModel):
+    af0: float = 0.02
+    max_af: float = 0.2
+    falling: bool | None = None
+    sar: float | None = None
+    ep: float | None = None
+    af: float = 0.02
+    prev_highs: list[float] = Field(default_factory=list)
+    prev_lows: list[float] = Field(default_factory=list)
+
+    def update(self, high: float, low: float) -> tuple[float | None, float | None]:
+        if not self.prev_highs:
+            self.prev_highs, self.prev_lows = [high], [low]
+            return None, None
+
+        if self.falling is None:
+            up = high - self.prev_highs[-1]
+            dn = self.prev_lows[-1] - low
+            self.falling = dn > up and dn > 0 and abs(dn) >= _EPSILON
+            first_high, first_low = self.prev_highs[-1], self.prev_lows[-1]
+            self.sar, self.ep = (
+                (first_high, first_low) if self.falling else (first_low, first_high)
+            )
+
+        # On the second bar this is the first one, as in the batch engine.
+        prev_high_2 = self.prev_highs[0]
+        prev_low_2 = self.prev_lows[0]
+
+        _sar = self.sar + self.af * (self.ep - self.sar)
+        if self.falling:
+            reverse = high > _sar
+            if low < self.ep:
+                self.ep = low
+                self.af = min(self.af + self.af0, self.max_af)
+            _sar = max(self.prev_highs[-1], prev_high_2, _sar)
+        else:
+            reverse = low < _sar
+            if high > self.ep:
+                self.ep = high
+                self.af = min(self.af + self.af0, self.max_af)
+            _sar = min(self.prev_lows[-1], prev_low_2, _sar)
+
+        if reverse:
+            _sar = self.ep
+            self.af = self.af0
+            self.falling = not self.falling
+            self.ep = low if self.falling else high
+
+        self.sar = _sar
+        self.prev_highs = [*self.prev_highs, high][-2:]
+        self.prev_lows = [*self.prev_lows, low][-2:]
+        return (None, self.sar) if self.falling else (self.sar, None)
+
+
+class IndicatorState(BaseModel):
+    """
+    Streaming state for every indicator of `calculate_ta_indicators` for one
+    (coin, interval) series.
+
+    `update` advances all indicators by one bar in constant time. Re-sending
+    the latest timestamp (a still-open candle) rewinds to the state before
+    that bar first, so a bar can be revised any number of times. Values match
+    `calculate_ta_indicators_batch(..., return_last_one=False)` over every bar
+    the state has seen.
+    """
+
+    coin: str
+    timestamp: int | None = None
+    previous: dict[str, Any] | None = None
+
+    prev_close: float | None = None
+    obv: float = 0.0
+
+    ema_fast: EmaState = Field(default_factory=lambda: EmaState.create(12))
+    ema_slow: EmaState = Field(default_factory=lambda: EmaState.create(26))
+    macd_signal: EmaState = Field(default_factory=lambda: EmaState.create(9))
+    ema_50: EmaState = Field(default_factory=lambda: EmaState.create(50))
+
+    rsi_gain: EwmState = Field(default_factory=_rma)
+    rsi_loss: EwmState = Field(default_factory=_rma)
+    atr: EwmState = Field(default_factory=_rma)
+    dm_plus: EwmState = Field(default_factory=_rma)
+    dm_minus: EwmState = Field(default_factory=_rma)
+    adx: EwmState = Field(default_factory=_rma)
+
+    closes_5: RollingWindow = Field(default_factory=lambda: RollingWindow(size=5))
+    closes_20: RollingWindow = Field(default_factory=lambda: RollingWindow(size=20))
+    highs_14: RollingWindow = Field(default_factory=lambda: RollingWindow(size=14))
+    lows_14: RollingWindow = Field(default_factory=lambda: RollingWindow(size=14))
+    stoch_raw: RollingWindow = Field(default_factory=lambda: RollingWindow(size=3))
+    stoch_k: RollingWindow = Field(default_factory=lambda: RollingWindow(size=3))
+    money_flow_20: RollingWindow = Field(default_factory=lambda: RollingWindow(size=20))
+    volumes_20: RollingWindow = Field(default_factory=lambda: RollingWindow(size=20))
+
+    psar: PsarState = Field(default_factory=PsarState)
+
+    def update(self, bar: dict[str, Any]) -> dict[str, Any] | None:
+        timestamp = int(bar["timestamp"])
+        if self.timestamp is not None and timestamp < self.timestamp:
+            return None
+
+        if self.timestamp is not None and timestamp == self.timestamp:
+            previous = self.previous
+            if previous is None:
+                return None
+            restored = IndicatorState.model_validate(previous)
+            for name in type(self).model_fields:
+                setattr(self, name, getattr(restored, name))
+        self.previous = self.model_dump(exclude={"previous"})
+        self.timestamp = timestamp
+
+        open_, high, low, close, volume = (float(bar[column]) for column in OHLCV_COLUMNS)
+        prev_close = self.prev_close
+        self.prev_close = close
+
+        fast = self.ema_fast.update(close)
+        slow = self.ema_slow.update(close)
+        macd = fast - slow if fast is not None and slow is not None else None
+        signal = self.macd_signal.update(macd) if macd is not None else None
+
+        close_diff = close - prev_close if prev_close is not None else None
+        avg_gain = self.rsi_gain.update(
+            None if close_diff is None else max(close_diff, 0.0)
+        )
+        avg_loss = self.rsi_loss.update(
+            None if close_diff is None else min(close_diff, 0.0)
+        )
+
+        self.closes_5.push(close)
+        self.closes_20.push(close)
+        bb_mid = self.closes_5.mean()
+        bb_std = self.closes_5.std()
+
+        if close_diff is None or close_diff > 0:
+            self.obv += volume
+        elif close_diff < 0:
+            self.obv -= volume
+
+        prev_high = self.psar.prev_highs[-1] if self.psar.prev_highs else None
+        prev_low = self.psar.prev_lows[-1] if self.psar.prev_lows else None
+
+        self.highs_14.push(high)
+        self.lows_14.push(low)
+        highest_high = self.highs_14.max()
+        lowest_low = self.lows_14.min()
+        if highest_high is not None:
+            self.stoch_raw.push(
+                100 * (close - lowest_low) / _non_zero_range(highest_high, lowest_low)
+            )
+            stoch_k = self.stoch_raw.mean()
+            if stoch_k is not None:
+                self.stoch_k.push(stoch_k)
+        else:
+            stoch_k = None
+        willr = (
+            100 * ((close - lowest_low) / (highest_high - lowest_low) - 1)
+            if highest_high is not None and highest_high != lowest_low
+            else None
+        )
+
+        if prev_close is None:
+            true_range = dm_plus = dm_minus = None
+        else:
+            true_range = max(
+                abs(_non_zero_range(high, low)),
+                abs(high - prev_close),
+                abs(prev_close - low),
+            )
+            up = high - prev_high
+            dn = prev_low - low
+            dm_plus = _zero(up) if up > dn and up > 0 else 0.0
+            dm_minus = _zero(dn) if dn > up and dn > 0 else 0.0
+        atr = self.atr.update(true_range)
+        smoothed_plus = self.dm_plus.update(dm_plus)
+        smoothed_minus = self.dm_minus.update(dm_minus)
+        dx = None
+        if atr is not None and smoothed_plus is not None and smoothed_minus is not None:
+            di_plus = 100 / atr * smoothed_plus
+            di_minus = 100 / atr * smoothed_minus
+            if di_plus + di_minus != 0:
+                dx = 100 * abs(di_plus - di_minus) / (di_plus + di_minus)
+        adx = self.adx.update(dx) if atr is not None else None
+
+        self.money_flow_20.push(
+            (2 * close - (high + low)) * (volume / _non_zero_range(high, low))
+        )
+        self.volumes_20.push(volume)
+        money_flow_sum = self.money_flow_20.sum()
+        volume_sum = self.volumes_20.sum()
+
+        psar_long, psar_short = self.psar.update(high, low)
+
+        values = {
+            "MACD_12_26_9": macd,
+            "MACD_histogram_12_26_9": macd - signal if signal is not None else None,
+            "RSI_14": (
+                100 * avg_gain / (avg_gain + abs(avg_loss))
+                if avg_gain is not None and avg_gain + abs(avg_loss) != 0
+                else None
+            ),
+            "BBL_5_2.0": bb_mid - 2.0 * bb_std if bb_mid is not None else None,
+            "BBM_5_2.0": bb_mid,
+            "BBU_5_2.0": bb_mid + 2.0 * bb_std if bb_mid is not None else None,
+            "SMA_20": self.closes_20.mean(),
+            "EMA_50": self.ema_50.update(close),
+            "OBV_in_million": self.obv / 1e7,
+            "STOCHk_14_3_3": stoch_k,
+            "STOCHd_14_3_3": self.stoch_k.mean() if stoch_k is not None else None,
+            "ADX_14": adx,
+            "WILLR_14": willr,
+            "CMF_20": (
+                money_flow_sum / volume_sum
+                if money_flow_sum is not None and volume_sum
+                else None
+            ),
+            "PSARl_0.02_0.2": psar_long,
+            "PSARs_0.02_0.2": psar_short,
+        }
+
+        return {
+            "coin": self.coin,
+            "timestamp": timestamp,
+            "date": datetime.fromtimestamp(timestamp / 1000, UTC).strftime("%Y-%m-%d"),
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+            **{column: values[column] for column in INDICATOR_COLUMNS},
+        }
+
+
+def advance_indicator_states(
+    states: dict[str, IndicatorState], df: pl.DataFrame
+) -> pl.DataFrame:
+    """
+    Feeds OHLCV rows through the per-coin states, creating states for unseen
+    coins, and returns the indicator rows produced by the last bar of each coin.
+    """
+    latest_rows = {}
+    for bar in df.sort("coin", "timestamp").iter_rows(named=True):
+        state = states.get(bar["coin"])
+        if state is None:
+            state = states[bar["coin"]] = IndicatorState(coin=bar["coin"])
+        row = state.update(bar)
+        if row is not None:
+            latest_rows[bar["coin"]] = row
+
+    return pl.DataFrame(
+        list(latest_rows.values()),
+        schema={
+            "coin": pl.String,
+            "timestamp": pl.Int64,
+            "date": pl.String,
+            **{column: pl.Float64 for column in OHLCV_COLUMNS + INDICATOR_COLUMNS},
+        },
+    )
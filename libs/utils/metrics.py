@@ -0,0 +1,175 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: dict[str, str] | None = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Counter:
+    type_name = "counter"
+
+    def __init__(self, name: str, description: str, lock: threading.Lock):
+        self.name = name
+        self.description = description
+        self._lock = lock
+        self.values: dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+    def snapshot(self) -> dict[str, float]:
+        return {_format_labels(key) or "{}": value for key, value in self.values.items()}
+
+
+class Histogram:
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        lock: threading.Lock,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._lock = lock
+        self.counts: dict[LabelKey, list[int]] = {}
+        self.sums: dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self.sums[key] = self.sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, counts in sorted(self.counts.items()):
+            for bound, count in zip(self.buckets, counts):
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, {'le': _format_value(bound)})} {count}"
+                )
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {counts[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(self.sums[key])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {counts[-1]}")
+        return lines
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        return {
+            _format_labels(key) or "{}": {"count": counts[-1], "sum": self.sums[key]}
+            for key, counts in self.counts.items()
+        }
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms, rendered in the Prometheus text
+    format. Metrics are created on first use, so modules can declare what
+    they record without a central list.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, description: str) -> Counter:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Counter(name, description, self._lock)
+        return metric
+
+    def histogram(
+        self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(
+                    name, description, self._lock, buckets
+                )
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            for name, metric in sorted(self._metrics.items()):
+                lines.append(f"# HELP {name} {metric.description}")
+                lines.append(f"# TYPE {name} {metric.type_name}")
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+
+def diff_snapshots(before: dict[str, dict], after: dict[str, dict]) -> dict[str, dict]:
+    """What changed between two snapshots, leaving out series that did not move."""
+    diff = {}
+    for name, series in after.items():
+        previous = before.get(name, {})
+        changed = {}
+        for labels, value in series.items():
+            old = previous.get(labels)
+            if isinstance(value, dict):
+                old = old or {"count": 0, "sum": 0.0}
+                if value["count"] != old["count"]:
+                    changed[labels] = {
+                        "count": value["count"] - old["count"],
+                        "sum": value["sum"] - old["sum"],
+                    }
+            elif value != (old or 0.0):
+                changed[labels] = value - (old or 0.0)
+        if changed:
+            diff[name] = changed
+    return diff
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,150 @@
+import json
+import os
+import time
+
+import pytest
+
+# Settings are read at import time; the values only need to exist.
+for name in [
+    "OPENAI_API_KEY",
+    "ANTHROPIC_API_KEY",
+    "TOGETHER_API_KEY",
+    "DEEPSEEK_API_KEY",
+    "GPT_MODEL",
+    "POSTGRES_DB",
+    "POSTGRES_USER",
+    "POSTGRES_PASSWORD",
+    "POSTGRES_HOST",
+    "POSTGRES_PORT",
+    "POSTGRES_DB_URL",
+    "API_URL",
+    "BIRDEYE_API_KEY",
+    "COINALYZE_API_KEY",
+    "REDIS_HOST",
+    "QUICKNODE_URL",
+    "LANGCHAIN_TRACING_V2",
+    "LANGCHAIN_ENDPOINT",
+    "LANGCHAIN_API_KEY",
+    "LANGCHAIN_PROJECT",
+    "LITERAL_API_KEY",
+]:
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("ENV", "test")
+
+HOUR_MS = 3_600_000
+
+
+@pytest.fixture
+def delta_root(tmp_path, monkeypatch) -> str:
+    """Repositories created in the test store their tables under it."""
+    root = str(tmp_path / "delta")
+    monkeypatch.setenv("DELTA_STORAGE_ROOT", root)
+    return root
+
+
+@pytest.fixture
+def redis_store(monkeypatch) -> dict[str, dict[str, str]]:
+    """In-memory hashes behind RedisRepository, keyed by table name."""
+    from libs.repositories.redis import RedisRepository
+
+    store: dict[str, dict[str, str]] = {}
+
+    async def initialize(self):
+        pass
+
+    async def read(self, key):
+        value = store.get(self.table_name, {}).get(key)
+        return None if value is None else json.loads(value)
+
+    async def read_many(self, keys):
+        return [await read(self, key) for key in keys]
+
+    async def all(self):
+        return [(key, json.loads(value)) for key, value in store.get(self.table_name, {}).items()]
+
+    async def write(self, key, value):
+        store.setdefault(self.table_name, {})[key] = json.dumps(value)
+
+    async def write_many(self, values):
+        store.setdefault(self.table_name, {}).update(
+            {key: json.dumps(value) for key, value in values.items()}
+        )
+
+    for name, method in [
+        ("initialize", initialize),
+        ("read", read),
+        ("read_many", read_many),
+        ("all", all),
+        ("write", write),
+        ("write_many", write_many),
+    ]:
+        monkeypatch.setattr(RedisRepository, name, method)
+    return store
+
+
+INTERVAL_MS = {"30m": HOUR_MS // 2, "1h": HOUR_MS, "4h": 4 * HOUR_MS, "1d": 24 * HOUR_MS}
+
+
+def ohlcv_record(coin: str, timestamp: int) -> dict:
+    """A bar whose prices depend only on the coin and timestamp."""
+    base = 100.0 + sum(map(ord, coin)) % 50 + (timestamp // (HOUR_MS // 2)) % 17
+    return {
+        "coin": coin,
+        "timestamp": timestamp,
+        "open": base,
+        "high": base + 2.0,
+        "low": base - 1.0,
+        "close": base + 1.0,
+        "volume": 10.0 + timestamp % 7,
+    }
+
+
+class FakeOHLCVProvider:
+    """Serves `ohlcv_record` bars; coins in `failing_coins` raise."""
+
+    def __init__(self, now: int):
+        self.now = now
+        self.failing_coins: set[str] = set()
+        self.calls: list[tuple[str, list[str]]] = []
+
+    def _records(self, symbols, interval, start: int, end: int) -> list[dict]:
+        if self.failing_coins.intersection(symbols):
+            raise RuntimeError(f"provider failed for {sorted(self.failing_coins)}")
+        step = INTERVAL_MS[interval]
+        first = -(-start // step) * step
+        return [
+            ohlcv_record(coin, timestamp)
+            for coin in symbols
+            for timestamp in range(first, min(end, self.now), step)
+        ]
+
+    async def get_historical_ohlcv(self, symbols, interval, days=30, output_format="dict", category="spot"):
+        self.calls.append(("get_historical_ohlcv", list(symbols)))
+        return self._records(symbols, interval, self.now - days * 24 * HOUR_MS, self.now)
+
+    async def get_historical_ohlcv_by_start_end(
+        self, symbols, interval, start_time, end_time, output_format="dict", category="spot"
+    ):
+        self.calls.append(("get_historical_ohlcv_by_start_end", list(symbols)))
+        return self._records(
+            symbols, interval, int(start_time.timestamp() * 1000), int(end_time.timestamp() * 1000)
+        )
+
+    async def get_current_ohlcv(self, symbols, interval, category="spot"):
+        self.calls.append(("get_current_ohlcv", list(symbols)))
+        step = INTERVAL_MS[interval]
+        return self._records(symbols, interval, self.now // step * step, self.now + 1)
+
+
+@pytest.fixture
+def executor():
+    from apps.fridon_crones.pipeline import IngestionExecutor
+
+    executor = IngestionExecutor(io_workers=2, cpu_workers=1)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def provider() -> FakeOHLCVProvider:
+    return FakeOHLCVProvider(now=int(time.time() * 1000) // HOUR_MS * HOUR_MS)
@@ -0,0 +1,82 @@
+import asyncio
+
+import polars as pl
+
+from apps.fridon_crones.backfill import Backfill
+from libs.repositories import IndicatorsRepository, OhlcvRepository
+
+COINS = ["BTC", "ETH", "SOL"]
+
+
+def _backfill(provider, executor, coins=COINS) -> Backfill:
+    return Backfill(
+        data_provider=provider,
+        executor=executor,
+        coins=coins,
+        interval_to_days={"1h": 5},
+        fetch_chunk_size=2,
+        write_batch_rows=100,
+    )
+
+
+def test_backfill_writes_bars_indicators_and_checkpoints(delta_root, redis_store, provider, executor):
+    asyncio.run(_backfill(provider, executor).run(["1h"]))
+
+    ohlcv_df = OhlcvRepository(table_name="ohlcv_1h").read(order_by="timestamp")
+    indicators_df = IndicatorsRepository(table_name="indicators_1h").read(order_by="timestamp")
+    assert ohlcv_df.group_by("coin").len().sort("coin")["len"].to_list() == [120, 120, 120]
+    assert sorted(indicators_df["coin"].unique()) == COINS
+    assert indicators_df.filter(pl.col("timestamp") == ohlcv_df["timestamp"].max())["RSI_14"].is_not_null().all()
+
+    checkpoints = asyncio.run(_checkpoints())
+    assert {coin: checkpoint["status"] for coin, checkpoint in checkpoints.items()} == dict.fromkeys(COINS, "done")
+    assert checkpoints["BTC"]["last_timestamp"] == ohlcv_df["timestamp"].max()
+
+
+def test_seeded_coins_are_skipped(delta_root, redis_store, provider, executor):
+    asyncio.run(_backfill(provider, executor, ["BTC"]).run(["1h"]))
+    provider.calls.clear()
+
+    asyncio.run(_backfill(provider, executor).run(["1h"]))
+
+    assert [coins for _, coins in provider.calls] == [["ETH", "SOL"]]
+    ohlcv_df = OhlcvRepository(table_name="ohlcv_1h").read(order_by="timestamp")
+    assert ohlcv_df.shape[0] == ohlcv_df.unique(subset=["coin", "timestamp"]).shape[0] == 360
+
+
+def test_interrupted_coins_are_merged_without_duplicates(delta_root, redis_store, provider, executor):
+    asyncio.run(_backfill(provider, executor).run(["1h"]))
+    # The write went through, but the run died before marking the coins done.
+    asyncio.run(_mark_started(["BTC", "ETH"]))
+    provider.calls.clear()
+
+    asyncio.run(_backfill(provider, executor).run(["1h"]))
+
+    assert [coins for _, coins in provider.calls] == [["BTC", "ETH"]]
+    for repository in [OhlcvRepository(table_name="ohlcv_1h"), IndicatorsRepository(table_name="indicators_1h")]:
+        df = repository.read(order_by="timestamp", columns=["coin", "timestamp"])
+        assert df.shape[0] == df.unique().shape[0]
+
+
+def test_failed_fetches_leave_the_coins_pending(delta_root, redis_store, provider, executor):
+    provider.failing_coins = {"SOL"}
+
+    asyncio.run(_backfill(provider, executor).run(["1h"]))
+
+    checkpoints = asyncio.run(_checkpoints())
+    assert sorted(checkpoints) == ["BTC", "ETH"]
+    assert sorted(OhlcvRepository(table_name="ohlcv_1h").read(order_by="coin")["coin"].unique()) == ["BTC", "ETH"]
+
+
+async def _checkpoints() -> dict[str, dict]:
+    from libs.repositories.redis import RedisRepository
+
+    return dict(await RedisRepository(table_name="backfill_checkpoint_1h").all())
+
+
+async def _mark_started(coins: list[str]) -> None:
+    from libs.repositories.redis import RedisRepository
+
+    await RedisRepository(table_name="backfill_checkpoint_1h").write_many(
+        {coin: {"status": "started"} for coin in coins}
+    )
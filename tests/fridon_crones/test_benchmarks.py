@@ -0,0 +1,24 @@
+import pytest
+
+from apps.fridon_crones.benchmarks.common import generate_tables
+from apps.fridon_crones.benchmarks.repositories import LAYOUTS, _run_layout
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory) -> tuple[str, str]:
+    workdir = tmp_path_factory.mktemp("benchmarks")
+    ohlcv_df, indicators_df = generate_tables(coins=2, days=3)
+    ohlcv_df.write_ipc(workdir / "ohlcv.arrow")
+    indicators_df.write_ipc(workdir / "indicators.arrow")
+    return str(workdir / "ohlcv.arrow"), str(workdir / "indicators.arrow")
+
+
+@pytest.mark.parametrize("layout", list(LAYOUTS))
+def test_repository_benchmark_runs_on_a_local_root(tmp_path, tables, layout):
+    ohlcv_path, indicators_path = tables
+
+    result = _run_layout(layout, ohlcv_path, indicators_path, str(tmp_path / layout), repeats=1, compact=False)
+
+    assert result["rows"] > 0 and result["files"] > 0
+    assert all(seconds >= 0 for seconds, _ in result["results"].values())
+    assert "get_the_latest_records snapshot" in result["results"]
@@ -0,0 +1,81 @@
+import asyncio
+
+import polars as pl
+
+from apps.fridon_crones.gaps import GapScanner, collapse_gaps, find_missing_buckets
+from apps.fridon_crones.rollups import ohlcv_frame, with_date_column
+from libs.repositories import IndicatorsRepository, OhlcvRepository
+
+HOUR_MS = 3_600_000
+
+
+def _scanner(provider, executor, coins=("BTC", "ETH")) -> GapScanner:
+    return GapScanner(
+        data_provider=provider,
+        executor=executor,
+        coins=list(coins),
+        interval_to_days={"1h": 2},
+        warmup_points=20,
+    )
+
+
+def _store(provider, coins: list[str], skip: range) -> None:
+    records = asyncio.run(provider.get_historical_ohlcv(coins, "1h", days=2))
+    df = ohlcv_frame(records).filter(
+        ~((pl.col("coin") == "BTC") & ((provider.now - pl.col("timestamp")) // HOUR_MS).is_in(list(skip)))
+    )
+    OhlcvRepository(table_name="ohlcv_1h").upsert(with_date_column(df))
+    provider.calls.clear()
+
+
+def test_missing_buckets_collapse_into_ranges():
+    stored_df = pl.DataFrame({"coin": ["BTC", "BTC", "ETH"], "timestamp": [0, 3 * HOUR_MS, 0]})
+
+    missing_df = find_missing_buckets(stored_df, ["BTC", "ETH", "SOL"], "1h", 0, 5 * HOUR_MS)
+    gaps_df = collapse_gaps(missing_df, "1h")
+
+    assert gaps_df.rows() == [
+        ("BTC", HOUR_MS, 2 * HOUR_MS, 2),
+        ("BTC", 4 * HOUR_MS, 4 * HOUR_MS, 1),
+        ("ETH", HOUR_MS, 4 * HOUR_MS, 4),
+        ("SOL", 0, 4 * HOUR_MS, 5),
+    ]
+
+
+def test_catch_up_fills_holes_and_recomputes_indicators(delta_root, provider, executor):
+    _store(provider, ["BTC", "ETH"], skip=range(5, 9))
+    scanner = _scanner(provider, executor)
+
+    filled = asyncio.run(scanner.catch_up(["1h"], provider.now))
+
+    assert filled["1h"].shape[0] == 4
+    assert provider.calls == [("get_historical_ohlcv_by_start_end", ["BTC"])]
+    stored_df = OhlcvRepository(table_name="ohlcv_1h").read(order_by="timestamp")
+    assert stored_df.group_by("coin").len().sort("coin")["len"].to_list() == [48, 48]
+    indicators_df = IndicatorsRepository(table_name="indicators_1h").read(order_by="timestamp")
+    # From the first filled bar of each coin onwards.
+    assert indicators_df["coin"].unique().to_list() == ["BTC"]
+    assert indicators_df["timestamp"].to_list() == list(range(provider.now - 8 * HOUR_MS, provider.now, HOUR_MS))
+    assert indicators_df["RSI_14"].is_not_null().all()
+    assert scanner.verified_until["1h"] == provider.now
+
+    # Nothing is rescanned once verified.
+    assert asyncio.run(scanner.catch_up(["1h"], provider.now))["1h"].is_empty()
+    assert provider.calls == [("get_historical_ohlcv_by_start_end", ["BTC"])]
+
+
+def test_failed_fetches_are_retried_on_the_next_catch_up(delta_root, provider, executor):
+    _store(provider, ["BTC", "ETH"], skip=range(5, 9))
+    scanner = _scanner(provider, executor)
+    provider.failing_coins = {"BTC"}
+
+    filled = asyncio.run(scanner.catch_up(["1h"], provider.now))
+
+    assert filled["1h"].is_empty()
+    assert scanner.verified_until["1h"] == provider.now - 8 * HOUR_MS
+
+    provider.failing_coins = set()
+    filled = asyncio.run(scanner.catch_up(["1h"], provider.now))
+
+    assert filled["1h"].shape[0] == 4
+    assert scanner.verified_until["1h"] == provider.now
@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+import polars as pl
+
+from apps.fridon_crones.hot_window import HotWindow
+from libs.repositories.hot_window import decode_frame
+
+
+def _rows(coin: str, timestamps: list[int], close: float = 1.0) -> pl.DataFrame:
+    return pl.DataFrame({"coin": coin, "timestamp": timestamps, "close": close})
+
+
+def test_window_keeps_the_newest_rows_of_every_coin():
+    hot_window = HotWindow(size=3)
+    assert hot_window.needs_bootstrap("1h")
+
+    hot_window.bootstrap("1h", pl.concat([_rows("BTC", [1, 2, 3, 4]), _rows("ETH", [2, 1])]))
+    window = hot_window.update("1h", pl.concat([_rows("BTC", [5]), _rows("ETH", [2], close=9.0)]))
+
+    assert window.rows() == [
+        ("BTC", 3, 1.0),
+        ("BTC", 4, 1.0),
+        ("BTC", 5, 1.0),
+        ("ETH", 1, 1.0),
+        ("ETH", 2, 9.0),
+    ]
+
+    hot_window.reset("1h")
+    assert hot_window.needs_bootstrap("1h")
+
+
+def test_publish_writes_the_window_with_one_repository(redis_store):
+    hot_window = HotWindow(size=3)
+    hot_window.bootstrap("1h", _rows("BTC", [1, 2, 3]))
+
+    asyncio.run(hot_window.publish("1h"))
+    repository = hot_window.repositories["1h"]
+    asyncio.run(hot_window.publish("1h"))
+
+    assert hot_window.repositories["1h"] is repository
+    assert decode_frame(json.loads(redis_store["hot_window_1h"]["data"])).shape == (3, 3)
+    assert decode_frame(json.loads(redis_store["hot_window_1h"]["latest"]))["timestamp"].to_list() == [2, 3]
+    # Nothing is published before the window has rows.
+    asyncio.run(hot_window.publish("4h"))
+    assert "hot_window_4h" not in redis_store
@@ -0,0 +1,60 @@
+import asyncio
+import socket
+
+import aiohttp
+import polars as pl
+
+from apps.fridon_crones.metrics import (
+    PROVIDER_REQUESTS,
+    TickReport,
+    count_rows,
+    provider_request,
+    start_metrics_server,
+)
+
+
+def test_count_rows_sums_nested_frames():
+    df = pl.DataFrame({"coin": ["BTC", "ETH"]})
+
+    assert count_rows({"raw": df, "1h": {"a": df, "b": None}}) == 4
+    assert count_rows(None) == 0
+
+
+def test_tick_report_summarizes_the_metrics_of_the_tick(tmp_path, monkeypatch):
+    summary_path = tmp_path / "ticks.jsonl"
+    monkeypatch.setenv("CRONES_METRICS_SUMMARY_PATH", str(summary_path))
+    report = TickReport("ingestion")
+
+    with provider_request("get_current_ohlcv", 3):
+        pass
+    summary = report.finish()
+
+    assert summary["metrics"]["crones_provider_requests_total"] == {'{method="get_current_ohlcv"}': 1.0}
+    assert summary["metrics"]["crones_provider_symbols_total"] == {'{method="get_current_ohlcv"}': 3.0}
+    assert TickReport.last_summary is summary
+    assert summary_path.read_text().count("\n") == 1
+
+
+def test_metrics_server_serves_the_registry(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    monkeypatch.setenv("CRONES_METRICS_PORT", str(port))
+    PROVIDER_REQUESTS.inc(method="served")
+
+    async def _scrape() -> tuple[str, dict]:
+        runner = await start_metrics_server()
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    text = await response.text()
+                async with session.get(f"http://127.0.0.1:{port}/metrics/summary") as response:
+                    summary = await response.json()
+        finally:
+            await runner.cleanup()
+        return text, summary
+
+    text, summary = asyncio.run(_scrape())
+
+    assert 'crones_provider_requests_total{method="served"}' in text
+    assert summary == TickReport.last_summary
@@ -0,0 +1,99 @@
+import asyncio
+import datetime
+
+import polars as pl
+import pytest
+
+from apps.fridon_crones.pipeline import IngestionExecutor, Stage, run_stages
+
+
+def _stage(name: str, result=None, depends_on: list[str] | None = None, delay: float = 0.0, log=None, **kwargs):
+    async def _run(dependencies):
+        if log is not None:
+            log.append((name, "start", dict(dependencies)))
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        if log is not None:
+            log.append((name, "end"))
+        return result
+
+    return Stage(name=name, run=_run, depends_on=depends_on or [], **kwargs)
+
+
+def test_stages_receive_their_dependencies_results():
+    log = []
+    results = asyncio.run(
+        run_stages(
+            [
+                _stage("write", "written", depends_on=["fetch", "compute"], log=log),
+                _stage("compute", 2, depends_on=["fetch"], log=log),
+                _stage("fetch", 1, log=log),
+            ]
+        )
+    )
+
+    assert results == {"fetch": 1, "compute": 2, "write": "written"}
+    assert ("compute", "start", {"fetch": 1}) in log
+    assert ("write", "start", {"fetch": 1, "compute": 2}) in log
+
+
+def test_independent_stages_run_concurrently():
+    log = []
+    asyncio.run(
+        run_stages([_stage("raw", 1, delay=0.05, log=log), _stage("1h", 2, delay=0.05, log=log)])
+    )
+
+    assert [entry[:2] for entry in log[:2]] == [("raw", "start"), ("1h", "start")]
+
+
+def test_a_failed_stage_skips_only_its_dependents():
+    results = asyncio.run(
+        run_stages(
+            [
+                _stage("fetch", RuntimeError("provider down")),
+                _stage("write", "written", depends_on=["fetch"]),
+                _stage("other", "ok"),
+            ]
+        )
+    )
+
+    assert results == {"other": "ok"}
+
+
+def test_stages_are_cancelled_at_their_timeout_or_the_deadline():
+    deadline = datetime.datetime.now(datetime.UTC) + datetime.timedelta(seconds=0.2)
+    results = asyncio.run(
+        run_stages(
+            [
+                _stage("slow", 1, delay=1.0, timeout=0.05),
+                _stage("late", 2, delay=1.0),
+                _stage("fast", 3),
+            ],
+            deadline=deadline,
+        )
+    )
+
+    assert results == {"fast": 3}
+
+
+def test_invalid_dependencies_are_rejected():
+    with pytest.raises(ValueError, match="unknown"):
+        asyncio.run(run_stages([_stage("write", depends_on=["fetch"])]))
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(run_stages([_stage("a", depends_on=["b"]), _stage("b", depends_on=["a"])]))
+
+
+def test_executor_offloads_io_and_cpu_work():
+    executor = IngestionExecutor(io_workers=2, cpu_workers=1)
+
+    async def _go():
+        df = pl.DataFrame({"value": [1, 2, 3]})
+        io_result = await executor.run_io(df.select, pl.col("value").sum())
+        cpu_result = await executor.run_cpu(sum, [1, 2, 3])
+        return io_result.item(), cpu_result
+
+    try:
+        assert asyncio.run(_go()) == (6, 6)
+    finally:
+        executor.shutdown()
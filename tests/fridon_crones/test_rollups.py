@@ -0,0 +1,96 @@
+import datetime
+
+import polars as pl
+
+from apps.fridon_crones.rollups import RollupEngine, bucket_start
+
+HALF_HOUR_MS = 30 * 60 * 1000
+# Monday 2024-01-01 00:00 UTC.
+MONDAY = int(datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC).timestamp() * 1000)
+
+
+def _raw(rows: list[tuple[str, int, float]]) -> pl.DataFrame:
+    return pl.DataFrame(
+        [
+            {
+                "coin": coin,
+                "timestamp": MONDAY + step * HALF_HOUR_MS,
+                "open": price,
+                "high": price + 1,
+                "low": price - 1,
+                "close": price + 0.5,
+                "volume": 1.0,
+            }
+            for coin, step, price in rows
+        ]
+    )
+
+
+def test_bucket_start_aligns_to_utc_boundaries():
+    timestamp = MONDAY + 3 * 24 * 3_600_000 + 5 * 3_600_000 + 1
+    assert bucket_start(timestamp, "raw") == MONDAY + 3 * 24 * 3_600_000 + 5 * 3_600_000
+    assert bucket_start(timestamp, "4h") == MONDAY + 3 * 24 * 3_600_000 + 4 * 3_600_000
+    assert bucket_start(timestamp, "1d") == MONDAY + 3 * 24 * 3_600_000
+    # Weekly candles open on Monday.
+    assert bucket_start(timestamp, "1w") == MONDAY
+
+
+def test_update_aggregates_the_touched_buckets():
+    engine = RollupEngine(["1h", "4h"])
+    # Out of order within the update.
+    rollups = engine.update(_raw([("BTC", 1, 20.0), ("BTC", 0, 10.0), ("BTC", 2, 30.0), ("ETH", 0, 5.0)]))
+
+    hourly = rollups["1h"].filter(pl.col("coin") == "BTC")
+    assert hourly.select("timestamp", "open", "high", "low", "close", "volume").rows() == [
+        (MONDAY, 10.0, 21.0, 9.0, 20.5, 2.0),
+        (MONDAY + 2 * HALF_HOUR_MS, 30.0, 31.0, 29.0, 30.5, 1.0),
+    ]
+    four_hourly = rollups["4h"].filter(pl.col("coin") == "BTC")
+    assert four_hourly.select("timestamp", "open", "close", "volume").rows() == [(MONDAY, 10.0, 30.5, 3.0)]
+    assert rollups["1h"]["date"].unique().to_list() == ["2024-01-01"]
+
+    # Only the buckets of the new bars come back.
+    rollups = engine.update(_raw([("BTC", 3, 40.0)]))
+    assert rollups["1h"].select("coin", "timestamp", "open", "close", "volume").rows() == [
+        ("BTC", MONDAY + 2 * HALF_HOUR_MS, 30.0, 40.5, 2.0)
+    ]
+    assert rollups["4h"].select("coin", "open", "close", "volume").rows() == [("BTC", 10.0, 40.5, 4.0)]
+
+
+def test_resent_bars_replace_the_earlier_ones():
+    engine = RollupEngine(["1h"])
+    engine.update(_raw([("BTC", 0, 10.0), ("BTC", 1, 20.0)]))
+
+    rollups = engine.update(_raw([("BTC", 1, 50.0)]))
+
+    assert rollups["1h"].select("open", "high", "close", "volume").rows() == [(10.0, 51.0, 50.5, 2.0)]
+
+
+def test_finished_buckets_are_evicted():
+    engine = RollupEngine(["1h", "4h"])
+    engine.update(_raw([("BTC", step, 10.0) for step in range(8)]))
+    assert engine.buffer.shape[0] == 8
+
+    engine.update(_raw([("BTC", 8, 10.0)]))
+
+    assert engine.buffer["timestamp"].to_list() == [MONDAY + 8 * HALF_HOUR_MS]
+
+
+def test_history_is_needed_for_uncovered_buckets():
+    engine = RollupEngine(["1h", "4h"])
+    raw_df = _raw([("BTC", 5, 10.0)])
+    assert engine.needs_history(raw_df) == MONDAY
+
+    engine.hydrate(_raw([("BTC", step, 10.0) for step in range(5)]), MONDAY)
+    assert engine.needs_history(raw_df) is None
+
+    rollups = engine.update(raw_df)
+    assert rollups["4h"].select("open", "volume").rows() == [(10.0, 6.0)]
+    assert engine.needs_history(_raw([("BTC", -1, 10.0)])) == MONDAY - 4 * 3_600_000
+
+
+def test_empty_updates_return_empty_frames():
+    rollups = RollupEngine(["1h", "1d"]).update(pl.DataFrame())
+
+    assert set(rollups) == {"1h", "1d"}
+    assert all(df.is_empty() for df in rollups.values())
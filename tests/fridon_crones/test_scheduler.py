@@ -0,0 +1,116 @@
+import asyncio
+import datetime
+import threading
+import time
+
+from apps.fridon_crones.pipeline import IngestionExecutor
+from apps.fridon_crones.scheduler import OverrunSafeScheduler, TickContext
+
+
+def _scheduler(job, **kwargs) -> OverrunSafeScheduler:
+    scheduler = OverrunSafeScheduler(
+        job,
+        period=datetime.timedelta(seconds=1),
+        deadline_margin=datetime.timedelta(seconds=0.5),
+        **kwargs,
+    )
+    # Ticks count from when they fire, not from the start of the second.
+    scheduler._scheduled_time = lambda now: now
+    return scheduler
+
+
+def test_ticks_during_a_run_are_coalesced_into_one_more_run():
+    runs = []
+
+    async def job(context: TickContext) -> None:
+        runs.append(context)
+        await asyncio.sleep(0.1)
+
+    scheduler = _scheduler(job, overlap_policy="coalesce")
+
+    async def _go():
+        first = asyncio.create_task(scheduler.fire())
+        await asyncio.sleep(0.02)
+        await scheduler.fire()
+        await scheduler.fire()
+        await first
+
+    asyncio.run(_go())
+    assert len(runs) == 2
+
+
+def test_ticks_during_a_run_are_skipped():
+    runs = []
+
+    async def job(context: TickContext) -> None:
+        runs.append(context)
+        await asyncio.sleep(0.1)
+
+    scheduler = _scheduler(job, overlap_policy="skip")
+
+    async def _go():
+        first = asyncio.create_task(scheduler.fire())
+        await asyncio.sleep(0.02)
+        await scheduler.fire()
+        await first
+
+    asyncio.run(_go())
+    assert len(runs) == 1
+
+
+def test_a_run_past_its_deadline_is_cancelled_and_the_next_one_is_behind():
+    runs = []
+
+    async def job(context: TickContext) -> None:
+        runs.append(context)
+        if len(runs) == 1:
+            await asyncio.sleep(5)
+
+    scheduler = _scheduler(job)
+    scheduled_at = datetime.datetime.now(datetime.UTC)
+
+    async def _go():
+        started = time.perf_counter()
+        await scheduler._run(scheduled_at)
+        elapsed = time.perf_counter() - started
+        await scheduler._run(datetime.datetime.now(datetime.UTC))
+        return elapsed
+
+    assert asyncio.run(_go()) < 1
+    assert [context.behind for context in runs] == [False, True]
+
+
+def test_a_run_waits_for_table_io_left_behind_by_a_cancelled_run():
+    executor = IngestionExecutor(io_workers=2, cpu_workers=1)
+    release = threading.Event()
+    log = []
+
+    def write() -> None:
+        release.wait(timeout=5)
+        log.append("write committed")
+
+    async def job(context: TickContext) -> None:
+        if not log:
+            log.append("first run")
+            await executor.run_io(write)
+        else:
+            log.append("second run")
+
+    scheduler = _scheduler(job, drain=executor.wait_for_io)
+
+    async def _go():
+        await scheduler._run(datetime.datetime.now(datetime.UTC))
+        # The first run timed out, but its write is still going in the pool.
+        assert log == ["first run"]
+        second = asyncio.create_task(scheduler._run(datetime.datetime.now(datetime.UTC)))
+        await asyncio.sleep(0.1)
+        assert log == ["first run"]
+        release.set()
+        await second
+
+    try:
+        asyncio.run(_go())
+    finally:
+        release.set()
+        executor.shutdown()
+    assert log == ["first run", "write committed", "second run"]
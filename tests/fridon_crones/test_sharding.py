@@ -0,0 +1,53 @@
+import asyncio
+
+import polars as pl
+
+from apps.fridon_crones.sharding import ShardCoordinator, shard_of
+
+COINS = ["BTC", "ETH", "SOL", "BNB", "XRP", "DOGE", "ADA", "AVAX"]
+
+
+def test_shard_count_comes_from_the_environment(monkeypatch):
+    monkeypatch.setenv("CRONES_CPU_WORKERS", "3")
+    monkeypatch.delenv("CRONES_SHARDS", raising=False)
+    assert ShardCoordinator().shard_count == 3
+
+    monkeypatch.setenv("CRONES_SHARDS", "5")
+    assert ShardCoordinator().shard_count == 5
+    assert ShardCoordinator(2).shard_count == 2
+
+
+def test_coins_are_assigned_to_stable_shards():
+    coordinator = ShardCoordinator(3)
+    shards = coordinator.assign(COINS)
+
+    assert sorted(coin for shard in shards for coin in shard) == sorted(COINS)
+    for shard in shards:
+        assert len({shard_of(coin, 3) for coin in shard}) == 1
+    # crc32, so the same in every process.
+    assert shard_of("BTC", 3) == 2
+
+
+def test_split_keeps_the_rows_of_a_coin_together():
+    df = pl.DataFrame({"coin": COINS * 2, "timestamp": list(range(16))})
+
+    shard_dfs = ShardCoordinator(3).split(df)
+
+    assert sum(shard_df.shape[0] for shard_df in shard_dfs) == 16
+    coins_per_shard = [set(shard_df["coin"]) for shard_df in shard_dfs]
+    assert all(a.isdisjoint(b) for i, a in enumerate(coins_per_shard) for b in coins_per_shard[i + 1 :])
+    assert ShardCoordinator(3).split(df.clear()) == []
+
+
+def test_failed_shards_are_left_out():
+    coordinator = ShardCoordinator(3)
+    failing_shard = coordinator.assign(COINS)[0]
+
+    async def _fetch(coins: list[str]) -> list[str]:
+        if coins == failing_shard:
+            raise RuntimeError("provider down")
+        return coins
+
+    fetched = asyncio.run(coordinator.gather_coins(_fetch, COINS))
+
+    assert sorted(fetched) == sorted(set(COINS) - set(failing_shard))
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+
+import polars as pl
+import pyarrow.compute as pc
+
+from libs.repositories import OhlcvRepository, aio
+
+
+def _bars(repository: OhlcvRepository) -> pl.DataFrame:
+    end = repository._window_end()
+    bar_times = [end - timedelta(minutes=10) - i * timedelta(hours=1) for i in range(3)]
+    return pl.DataFrame(
+        {
+            "coin": [coin for coin in ["BTC", "ETH"] for _ in bar_times],
+            "timestamp": [int(bar_time.timestamp() * 1000) for _ in ["BTC", "ETH"] for bar_time in bar_times],
+            "date": [bar_time.strftime("%Y-%m-%d") for _ in ["BTC", "ETH"] for bar_time in bar_times],
+            "open": [1.0] * 6,
+            "high": [1.0] * 6,
+            "low": [1.0] * 6,
+            "close": [float(i) for i in range(6)],
+            "volume": [1.0] * 6,
+        }
+    )
+
+
+def test_async_calls_return_what_the_blocking_ones_do(tmp_path):
+    repository = OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path))
+
+    async def _go():
+        await repository.awrite(_bars(repository))
+        return await asyncio.gather(
+            repository.aread(order_by="timestamp"),
+            repository.aget_the_latest_records(last_n=True),
+            repository.aget_last_records(pc.field("coin") == "ETH", number_of_points=5, last_n=True),
+            repository.aread_latest(2, columns=["close"]),
+        )
+
+    aread, latest, last, read_latest = asyncio.run(_go())
+    assert aread.equals(repository.read(order_by="timestamp"))
+    assert latest.equals(repository.get_the_latest_records(last_n=True))
+    assert last.equals(
+        repository.get_last_records(pc.field("coin") == "ETH", number_of_points=5, last_n=True)
+    )
+    assert read_latest.equals(repository.read_latest(2, columns=["close"]))
+
+
+def test_table_io_is_limited_per_table(monkeypatch):
+    monkeypatch.setattr(aio, "_table_concurrency", 2)
+    lock = threading.Lock()
+    running = {"ohlcv_1h": 0, "ohlcv_4h": 0}
+    peaks = {"ohlcv_1h": 0, "ohlcv_4h": 0}
+
+    def _call(table_name: str) -> str:
+        with lock:
+            running[table_name] += 1
+            peaks[table_name] = max(peaks[table_name], running[table_name])
+        time.sleep(0.05)
+        with lock:
+            running[table_name] -= 1
+        return table_name
+
+    async def _go():
+        return await asyncio.gather(
+            *[aio.run_table_io(table_name, _call, table_name) for table_name in ["ohlcv_1h", "ohlcv_4h"] * 4]
+        )
+
+    assert asyncio.run(_go()) == ["ohlcv_1h", "ohlcv_4h"] * 4
+    assert peaks == {"ohlcv_1h": 2, "ohlcv_4h": 2}
+
+
+def test_a_cancelled_call_keeps_its_slot_until_the_thread_finishes(monkeypatch):
+    monkeypatch.setattr(aio, "_table_concurrency", 1)
+    release = threading.Event()
+    log = []
+
+    def _slow() -> None:
+        release.wait(timeout=5)
+        log.append("slow finished")
+
+    def _next() -> None:
+        log.append("next started")
+
+    async def _go():
+        slow = asyncio.create_task(aio.run_table_io("ohlcv_1h", _slow))
+        await asyncio.sleep(0.05)
+        slow.cancel()
+        following = asyncio.create_task(aio.run_table_io("ohlcv_1h", _next))
+        await asyncio.sleep(0.05)
+        assert log == []
+        release.set()
+        await following
+
+    try:
+        asyncio.run(_go())
+    finally:
+        release.set()
+    assert log == ["slow finished", "next started"]
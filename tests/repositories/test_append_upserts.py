@@ -0,0 +1,77 @@
+import polars as pl
+import pyarrow.compute as pc
+import pytest
+from deltalake import DeltaTable
+
+from libs.repositories import OhlcvRepository
+from libs.repositories.delta import VERSION_COLUMN
+
+HOUR_MS = 3_600_000
+START_MS = 1_735_689_600_000  # 2025-01-01
+
+
+def _bars(rows: list[tuple[str, int, float]]) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "coin": [coin for coin, _, _ in rows],
+            "timestamp": [START_MS + hour * HOUR_MS for _, hour, _ in rows],
+            "date": ["2025-01-01"] * len(rows),
+            "open": [close for _, _, close in rows],
+            "high": [close for _, _, close in rows],
+            "low": [close for _, _, close in rows],
+            "close": [close for _, _, close in rows],
+            "volume": [1.0] * len(rows),
+        }
+    )
+
+
+@pytest.fixture
+def repository(tmp_path) -> OhlcvRepository:
+    repository = OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path), upsert_mode="append")
+    repository.upsert(_bars([("BTC", 0, 1.0), ("BTC", 1, 2.0), ("ETH", 0, 10.0)]))
+    # Revises BTC hour 1; within one upsert the last row of a key wins.
+    repository.upsert(_bars([("BTC", 1, 3.0), ("BTC", 1, 4.0), ("ETH", 1, 20.0)]))
+    return repository
+
+
+def test_the_newest_version_of_every_key_is_read(repository):
+    assert repository.read(order_by="timestamp").sort("coin", "timestamp").select("coin", "close").rows() == [
+        ("BTC", 1.0),
+        ("BTC", 4.0),
+        ("ETH", 10.0),
+        ("ETH", 20.0),
+    ]
+    # Older versions stay in the files until maintenance deduplicates them.
+    assert DeltaTable(repository.s3_path).to_pyarrow_dataset().count_rows() == 5
+
+
+def test_filters_match_the_newest_version_only(repository):
+    # BTC hour 1 was 2.0 once, but its newest version is 4.0.
+    assert repository.read(filters=pc.field("close") == 2.0, order_by="timestamp").is_empty()
+    matched = repository.read(filters=pc.field("close") >= 4.0, columns=["coin", "close"], order_by="close")
+    assert matched.rows() == [("BTC", 4.0), ("ETH", 10.0), ("ETH", 20.0)]
+
+
+def test_versions_follow_the_delta_commits(repository):
+    stored = pl.from_arrow(DeltaTable(repository.s3_path).to_pyarrow_table())
+    first, second = (
+        stored.group_by(VERSION_COLUMN).len().sort(VERSION_COLUMN)[VERSION_COLUMN].to_list()
+    )
+    assert first < second <= DeltaTable(repository.s3_path).version()
+
+    dt = DeltaTable(repository.s3_path)
+    repository.deduplicate(dt)
+    repository.upsert(_bars([("ETH", 2, 30.0)]))
+
+    # The new rows outrank every version stored before the rewrite.
+    versions = pl.from_arrow(DeltaTable(repository.s3_path).to_pyarrow_table())[VERSION_COLUMN]
+    assert versions.max() == DeltaTable(repository.s3_path).version()
+    assert versions.max() > second
+
+
+def test_append_requires_key_columns(tmp_path):
+    repository = OhlcvRepository(
+        table_name="ohlcv_1h", storage_root=str(tmp_path), upsert_mode="append", key_columns=[]
+    )
+    with pytest.raises(ValueError, match="no key columns"):
+        repository.upsert(_bars([("BTC", 0, 1.0)]))
@@ -0,0 +1,73 @@
+import time
+from datetime import UTC, datetime, timedelta
+
+import polars as pl
+import pytest
+from deltalake import DeltaTable
+from deltalake.exceptions import DeltaError
+
+from libs.repositories import OhlcvRepository
+
+
+def _bars(repository: OhlcvRepository, close: float, hours_ago: int = 0) -> pl.DataFrame:
+    bar_time = repository._window_end() - timedelta(minutes=10) - timedelta(hours=hours_ago)
+    return pl.DataFrame(
+        {
+            "coin": ["BTC"],
+            "timestamp": [int(bar_time.timestamp() * 1000)],
+            "date": [bar_time.strftime("%Y-%m-%d")],
+            "open": [close],
+            "high": [close],
+            "low": [close],
+            "close": [close],
+            "volume": [1.0],
+        }
+    )
+
+
+def _commit_times(repository: OhlcvRepository) -> dict[int, datetime]:
+    return {
+        commit["version"]: datetime.fromtimestamp(commit["timestamp"] / 1000, UTC)
+        for commit in DeltaTable(repository.s3_path).history()
+    }
+
+
+@pytest.fixture(params=["merge", "append"])
+def repository(tmp_path, request) -> OhlcvRepository:
+    repository = OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path), upsert_mode=request.param)
+    # Version 1 holds close 1.0, version 2 revises it to 2.0 and adds an older bar.
+    repository.upsert(_bars(repository, 1.0))
+    time.sleep(0.01)
+    repository.upsert(pl.concat([_bars(repository, 2.0), _bars(repository, 0.5, hours_ago=2)]))
+    return repository
+
+
+def test_reads_as_of_a_version(repository):
+    assert repository.read(order_by="timestamp", as_of=1)["close"].to_list() == [1.0]
+    assert repository.read(order_by="timestamp", as_of=2)["close"].to_list() == [0.5, 2.0]
+    assert repository.read(order_by="timestamp")["close"].to_list() == [0.5, 2.0]
+
+    assert repository.read_latest(1, columns=["close"], as_of=1)["close"].to_list() == [1.0]
+    assert repository.get_the_latest_records(columns=["close"], as_of=1).rows() == [("BTC", 1.0)]
+    assert repository.get_last_records(number_of_points=5, last_n=True, as_of=1)["close"].to_list() == [1.0]
+
+
+def test_reads_as_of_a_time(repository):
+    commits = _commit_times(repository)
+
+    assert repository.read(order_by="timestamp", as_of=commits[1])["close"].to_list() == [1.0]
+    assert repository.read(order_by="timestamp", as_of=commits[2] + timedelta(seconds=1))["close"].to_list() == [
+        0.5,
+        2.0,
+    ]
+    assert repository.as_of_time(1) == commits[1]
+
+    with pytest.raises(FileNotFoundError):
+        repository.read(order_by="timestamp", as_of=commits[0] - timedelta(days=1))
+
+
+def test_unknown_versions_are_rejected(repository):
+    with pytest.raises(FileNotFoundError):
+        repository.as_of_time(42)
+    with pytest.raises(DeltaError):
+        repository.read(order_by="timestamp", as_of=42)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import polars as pl
+import pytest
+
+from libs.repositories import OhlcvRepository
+
+
+def _bars(rows: list[tuple[str, datetime, float]]) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "coin": [coin for coin, _, _ in rows],
+            "timestamp": [int(time.timestamp() * 1000) for _, time, _ in rows],
+            "date": [time.strftime("%Y-%m-%d") for _, time, _ in rows],
+            "open": [close for _, _, close in rows],
+            "high": [close for _, _, close in rows],
+            "low": [close for _, _, close in rows],
+            "close": [close for _, _, close in rows],
+            "volume": [1.0 for _ in rows],
+        }
+    )
+
+
+@pytest.mark.parametrize("upsert_mode", ["merge", "append"])
+def test_get_the_latest_records_picks_the_newest_bar(tmp_path, upsert_mode):
+    repository = OhlcvRepository(
+        table_name="ohlcv_1h", storage_root=str(tmp_path), upsert_mode=upsert_mode
+    )
+    # Both bars stay in the one hour window even if a half hour boundary passes.
+    end = repository._window_end()
+    older, newer = end - timedelta(minutes=50), end - timedelta(minutes=10)
+
+    # Bars arrive out of order, within one write and across writes.
+    repository.upsert(_bars([("BTC", newer, 2.0), ("BTC", older, 1.0), ("ETH", newer, 20.0)]))
+    repository.upsert(_bars([("ETH", older, 10.0)]))
+    # The newest bar is re-upserted with its final close.
+    repository.upsert(_bars([("BTC", newer, 3.0)]))
+
+    latest = repository.get_the_latest_records(last_n=True)
+    assert latest.select("coin", "timestamp", "close").rows() == [
+        ("BTC", int(newer.timestamp() * 1000), 3.0),
+        ("ETH", int(newer.timestamp() * 1000), 20.0),
+    ]
+    assert latest.columns == repository.table_schema.names
+
+    # Ties on the newest timestamp go to the last coin.
+    assert repository.get_the_latest_records(columns=["close"]).rows() == [("ETH", 20.0)]
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+import polars as pl
+import pyarrow.compute as pc
+import pytest
+
+from libs.repositories import OhlcvRepository
+
+COINS = ["BTC", "ETH", "SOL"]
+
+
+@pytest.fixture
+def repository(tmp_path) -> OhlcvRepository:
+    repository = OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path))
+    end = repository._window_end()
+    bar_times = [end - timedelta(minutes=10) - i * timedelta(hours=1) for i in range(8)]
+    repository.write(
+        pl.DataFrame(
+            [
+                {
+                    "coin": coin,
+                    "timestamp": int(bar_time.timestamp() * 1000),
+                    "date": bar_time.strftime("%Y-%m-%d"),
+                    "open": 1.0,
+                    "high": 1.0,
+                    "low": 1.0,
+                    "close": float(c * 100 + i),
+                    "volume": 1.0,
+                }
+                for c, coin in enumerate(COINS)
+                for i, bar_time in enumerate(bar_times)
+            ]
+        )
+    )
+    return repository
+
+
+def test_last_records_of_several_coins_match_the_single_coin_queries(repository):
+    batch = repository.get_coins_last_records(["SOL", "BTC"], number_of_points=5)
+
+    expected = pl.concat(
+        [repository.get_coin_last_records(coin, number_of_points=5) for coin in ["BTC", "SOL"]]
+    ).sort("coin", "timestamp")
+    assert batch.equals(expected.select(batch.columns))
+    assert batch.group_by("coin").len().sort("coin").rows() == [("BTC", 5), ("SOL", 5)]
+
+
+def test_time_range_of_several_coins_matches_the_single_coin_queries(repository):
+    end = repository._window_end()
+    start = end - timedelta(hours=4)
+
+    batch = repository.get_coins_records_in_time_range(COINS, start, end, columns=["close"])
+
+    assert batch.columns == ["coin", "timestamp", "close"]
+    for coin in COINS:
+        single = repository.get_coin_records_in_time_range(coin, start, end, columns=["coin", "timestamp", "close"])
+        assert batch.filter(pl.col("coin") == coin).equals(single.sort("timestamp").select(batch.columns))
+
+
+def test_results_split_by_coin(repository):
+    frames = repository.get_coins_last_records(
+        ["ETH", "DOGE"], number_of_points=3, filters=pc.field("close") <= 101, as_dict=True
+    )
+
+    assert list(frames) == ["ETH", "DOGE"]
+    # Newest bars have the lowest closes; oldest first.
+    assert frames["ETH"]["close"].to_list() == [101.0, 100.0]
+    assert frames["DOGE"].is_empty()
+    assert frames["DOGE"].columns == frames["ETH"].columns
@@ -0,0 +1,87 @@
+import numpy as np
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from deltalake import DeltaTable
+
+from libs.repositories import IndicatorsRepository
+
+START_MS = 1_735_689_600_000  # 2025-01-01
+HOUR_MS = 3_600_000
+
+
+def _indicators(repository: IndicatorsRepository, rows: int = 24) -> pl.DataFrame:
+    rng = np.random.default_rng(3)
+    return pl.DataFrame(
+        {
+            name: (
+                ["BTC"] * rows
+                if name == "coin"
+                else [START_MS + i * HOUR_MS for i in range(rows)]
+                if name == "timestamp"
+                else ["2025-01-01"] * rows
+                if name == "date"
+                else rng.uniform(0, 100_000, rows)
+            )
+            for name in repository.table_schema.names
+        }
+    )
+
+
+def _stored_schema(repository: IndicatorsRepository) -> pa.Schema:
+    return DeltaTable(repository.s3_path).schema().to_pyarrow()
+
+
+def test_compact_tables_store_indicators_as_float32(tmp_path):
+    repository = IndicatorsRepository(table_name="indicators_1h", storage_root=str(tmp_path), compact=True)
+    df = _indicators(repository)
+    repository.write(df)
+
+    schema = _stored_schema(repository)
+    assert schema.field("RSI_14").type == pa.float32()
+    assert schema.field("close").type == pa.float64()
+
+    stored = repository.read(order_by="timestamp")
+    assert stored["close"].equals(df["close"])
+    assert np.allclose(stored["RSI_14"].to_numpy(), df["RSI_14"].to_numpy(), rtol=1e-6)
+
+    # Only coin and date are dictionary encoded.
+    metadata = pq.ParquetFile(DeltaTable(repository.s3_path).file_uris()[0]).metadata.row_group(0)
+    encodings = {metadata.column(i).path_in_schema: metadata.column(i).encodings for i in range(metadata.num_columns)}
+    assert any("DICTIONARY" in encoding for encoding in encodings["coin"])
+    assert not any("DICTIONARY" in encoding for encoding in encodings["RSI_14"])
+
+
+def test_compact_mode_follows_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("DELTA_COMPACT_INDICATORS", "true")
+    repository = IndicatorsRepository(table_name="indicators_1h", storage_root=str(tmp_path))
+
+    assert repository.compact
+    assert repository.dictionary_columns == ["coin", "date"]
+    assert repository.latest_snapshot().table_schema.field("MACD_12_26_9").type == pa.float32()
+
+
+def test_existing_float64_tables_keep_their_types_until_relaid_out(tmp_path):
+    IndicatorsRepository(table_name="indicators_1h", storage_root=str(tmp_path)).write(
+        _indicators(IndicatorsRepository(table_name="indicators_1h", storage_root=str(tmp_path)))
+    )
+    repository = IndicatorsRepository(table_name="indicators_1h", storage_root=str(tmp_path), compact=True)
+
+    repository.upsert(_indicators(repository).with_columns(pl.col("timestamp") + 24 * HOUR_MS))
+    assert _stored_schema(repository).field("RSI_14").type == pa.float64()
+    assert repository.read(order_by="timestamp").height == 48
+
+    assert repository.relayout()
+    assert _stored_schema(repository).field("RSI_14").type == pa.float32()
+    assert repository.read(order_by="timestamp").height == 48
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_reads_return_the_stored_precision(tmp_path, compact):
+    repository = IndicatorsRepository(table_name="indicators_1h", storage_root=str(tmp_path), compact=compact)
+    repository.write(_indicators(repository))
+
+    latest = repository.read_latest(1, columns=["RSI_14"])
+    assert latest.height == 1
+    assert latest.schema["RSI_14"] == (pl.Float32 if compact else pl.Float64)
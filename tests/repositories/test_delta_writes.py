@@ -0,0 +1,64 @@
+import polars as pl
+import pyarrow as pa
+import pytest
+from deltalake import DeltaTable
+
+from libs.repositories import OhlcvRepository
+
+HOUR_MS = 3_600_000
+START_MS = 1_735_689_600_000  # 2025-01-01
+
+
+def _bars(closes: list[float], coin: str = "BTC") -> pl.DataFrame:
+    timestamps = [START_MS + i * HOUR_MS for i in range(len(closes))]
+    return pl.DataFrame(
+        {
+            # Not in table_schema order, and volume is an integer column.
+            "close": closes,
+            "volume": [1] * len(closes),
+            "coin": [coin] * len(closes),
+            "timestamp": timestamps,
+            "date": ["2025-01-01"] * len(closes),
+            "open": closes,
+            "high": closes,
+            "low": closes,
+        }
+    )
+
+
+def _stored(repository: OhlcvRepository) -> pl.DataFrame:
+    return pl.from_arrow(DeltaTable(repository.s3_path).to_pyarrow_table()).sort("coin", "timestamp")
+
+
+@pytest.mark.parametrize(
+    "convert",
+    [
+        lambda df: df,
+        lambda df: df.to_arrow(),
+        lambda df: df.to_arrow().to_batches()[0],
+        lambda df: pa.RecordBatchReader.from_batches(df.to_arrow().schema, df.to_arrow().to_batches()),
+    ],
+    ids=["polars", "table", "batch", "reader"],
+)
+def test_write_accepts_polars_and_arrow_data(tmp_path, convert):
+    repository = OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path))
+    repository.write(convert(_bars([1.0, 2.0])))
+
+    stored = _stored(repository)
+    assert stored.columns == repository.table_schema.names
+    assert DeltaTable(repository.s3_path).schema().to_pyarrow().field("volume").type == pa.float64()
+    assert stored["close"].to_list() == [1.0, 2.0]
+
+
+@pytest.mark.parametrize("convert", [lambda df: df, lambda df: df.to_arrow()], ids=["polars", "table"])
+def test_merge_updates_and_inserts_arrow_rows(tmp_path, convert):
+    repository = OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path), upsert_mode="merge")
+    repository.upsert(_bars([1.0, 2.0]))
+
+    repository.upsert(convert(pl.concat([_bars([1.0, 3.0]), _bars([5.0], coin="ETH")])))
+
+    assert _stored(repository).select("coin", "close").rows() == [
+        ("BTC", 1.0),
+        ("BTC", 3.0),
+        ("ETH", 5.0),
+    ]
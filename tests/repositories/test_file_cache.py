@@ -0,0 +1,113 @@
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+from pyarrow import fs
+
+from libs.repositories import file_cache as file_cache_module
+from libs.repositories.file_cache import DeltaFileCache
+
+TABLE_URI = "s3://bucket/ohlcv_1h"
+
+
+@pytest.fixture
+def remote(tmp_path) -> ds.FileSystemDataset:
+    # Stands in for the table's object store files.
+    directory = tmp_path / "remote"
+    directory.mkdir()
+    paths = []
+    for value in range(4):
+        paths.append(str(directory / f"part-{value}.parquet"))
+        pq.write_table(pa.table({"value": [value] * 100}), paths[-1])
+    # Each file carries an expression of its values, as Delta statistics do.
+    return ds.FileSystemDataset.from_paths(
+        paths,
+        schema=pa.schema([("value", pa.int64())]),
+        format=ds.ParquetFileFormat(),
+        filesystem=fs.LocalFileSystem(),
+        partitions=[pc.field("value") == value for value in range(4)],
+    )
+
+
+def _cached_files(cache: DeltaFileCache) -> list[str]:
+    return sorted(os.path.basename(path) for path in cache._files)
+
+
+def test_reads_go_through_local_copies(tmp_path, remote):
+    cache = DeltaFileCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024)
+
+    table = cache.read(TABLE_URI, remote, filters=pc.field("value") >= 2)
+
+    assert sorted(set(table["value"].to_pylist())) == [2, 3]
+    assert _cached_files(cache) == ["part-2.parquet", "part-3.parquet"]
+    # Copies survive a restart.
+    assert _cached_files(DeltaFileCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024)) == [
+        "part-2.parquet",
+        "part-3.parquet",
+    ]
+
+
+def test_least_recently_used_copies_are_evicted_after_the_scan(tmp_path, remote):
+    file_size = os.path.getsize(remote.files[0])
+    cache = DeltaFileCache(str(tmp_path / "cache"), max_bytes=2 * file_size)
+
+    # All four are pinned while the scan runs, then trimmed to the budget.
+    assert cache.read(TABLE_URI, remote).num_rows == 400
+    assert len(cache._files) == 2
+    assert cache._size <= cache.max_bytes
+    assert len(os.listdir(os.path.dirname(next(iter(cache._files))))) == 2
+
+
+def test_only_stale_temporary_files_are_removed(tmp_path):
+    root = tmp_path / "cache"
+    root.mkdir()
+    in_flight, abandoned = root / "part-0.parquet.a.tmp", root / "part-1.parquet.b.tmp"
+    in_flight.write_bytes(b"downloading")
+    abandoned.write_bytes(b"abandoned")
+    old = time.time() - 3600
+    os.utime(abandoned, (old, old))
+
+    cache = DeltaFileCache(str(root), max_bytes=1024)
+
+    assert in_flight.exists()
+    assert not abandoned.exists()
+    assert cache._files == {}
+
+
+def test_a_copy_evicted_by_another_process_is_fetched_again(tmp_path, remote):
+    cache = DeltaFileCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024)
+    cache.read(TABLE_URI, remote)
+    for path in list(cache._files)[:2]:
+        os.remove(path)
+
+    assert cache.read(TABLE_URI, remote).num_rows == 400
+    assert all(os.path.exists(path) for path in cache._files)
+    assert all(os.path.exists(path) for path in remote.files)
+    assert cache._size == sum(os.path.getsize(path) for path in cache._files)
+
+
+def test_a_copy_evicted_during_a_scan_is_read_remotely(tmp_path, remote, monkeypatch):
+    cache = DeltaFileCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024)
+    get = cache._get
+
+    def _get_then_evict(table_uri, filesystem, path):
+        local_path = get(table_uri, filesystem, path)
+        os.remove(local_path)
+        return local_path
+
+    monkeypatch.setattr(cache, "_get", _get_then_evict)
+
+    assert cache.read(TABLE_URI, remote, columns=["value"]).num_rows == 400
+
+
+def test_the_cache_is_off_unless_configured(monkeypatch, tmp_path):
+    monkeypatch.delenv("DELTA_FILE_CACHE_DIR", raising=False)
+    assert file_cache_module._initialize_file_cache() is None
+
+    monkeypatch.setenv("DELTA_FILE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("DELTA_FILE_CACHE_MAX_BYTES", "1024")
+    assert file_cache_module._initialize_file_cache().max_bytes == 1024
@@ -0,0 +1,99 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import polars as pl
+import pyarrow.compute as pc
+import pytest
+from polars.testing import assert_frame_equal
+
+from libs.repositories import OhlcvRepository
+from libs.repositories import redis as redis_module
+from libs.repositories.hot_window import HotWindowRepository, decode_frame
+
+HOUR_MS = 3_600_000
+
+
+def _bars(end_ms: int, coins: list[str], count: int) -> pl.DataFrame:
+    return pl.DataFrame(
+        [
+            {
+                "coin": coin,
+                "timestamp": end_ms - i * HOUR_MS,
+                "date": "",
+                "open": 1.0 + i,
+                "high": 2.0 + i,
+                "low": 0.5 + i,
+                "close": 1.5 + i + c,
+                "volume": 10.0,
+            }
+            for c, coin in enumerate(coins)
+            for i in range(count)
+        ]
+    ).with_columns(pl.from_epoch("timestamp", time_unit="ms").dt.strftime("%Y-%m-%d").alias("date"))
+
+
+@pytest.fixture
+def ohlcv_repository(delta_root) -> OhlcvRepository:
+    return OhlcvRepository(table_name="ohlcv_1h")
+
+
+def test_snapshot_serves_the_same_rows_as_delta(redis_store, ohlcv_repository):
+    end_ms = int(ohlcv_repository._window_end().timestamp() * 1000)
+    df = _bars(end_ms, ["BTC", "ETH", "SOL"], 50)
+    ohlcv_repository.upsert(df)
+    hot_window = HotWindowRepository(interval="1h")
+    asyncio.run(hot_window.publish(df, version=1))
+
+    for filters in [None, pc.field("close") > 2.0]:
+        expected = ohlcv_repository.get_the_latest_records(filters, last_n=True)
+        actual = asyncio.run(hot_window.get_the_latest_records(filters))
+        assert_frame_equal(actual.sort("coin"), expected.sort("coin"))
+
+
+def test_latest_readers_fetch_only_the_newest_rows(redis_store, ohlcv_repository, monkeypatch):
+    end_ms = int(ohlcv_repository._window_end().timestamp() * 1000)
+    hot_window = HotWindowRepository(interval="1h")
+    asyncio.run(hot_window.publish(_bars(end_ms, ["BTC", "ETH"], 50), version=7))
+
+    async def _all(self):
+        raise AssertionError("the whole window was read")
+
+    monkeypatch.setattr(redis_module.RedisRepository, "all", _all)
+    snapshot = asyncio.run(hot_window.read_latest())
+
+    assert snapshot.version == 7
+    assert snapshot.data.group_by("coin").len()["len"].to_list() == [2, 2]
+    assert decode_frame(json.loads(redis_store["hot_window_1h"]["data"])).shape[0] == 100
+    assert asyncio.run(hot_window.get_the_latest_records(columns=["coin", "close"])).shape == (2, 2)
+
+
+def test_missing_or_stale_snapshots_fall_back_to_delta(redis_store, ohlcv_repository):
+    hot_window = HotWindowRepository(interval="1h")
+    assert asyncio.run(hot_window.get_the_latest_records()) is None
+
+    stale_end = ohlcv_repository._window_end() - timedelta(hours=3)
+    asyncio.run(hot_window.publish(_bars(int(stale_end.timestamp() * 1000), ["BTC"], 5), version=1))
+
+    assert asyncio.run(hot_window.get_the_latest_records()) is None
+
+
+def test_repositories_share_one_connection_pool(monkeypatch):
+    created = []
+
+    async def _pool(host, password):
+        created.append(host)
+        yield object()
+
+    monkeypatch.setattr(redis_module, "init_redis_pool", _pool)
+    monkeypatch.setattr(redis_module, "_redis", None)
+
+    async def _initialize() -> list:
+        repositories = [redis_module.RedisRepository(table_name=f"hot_window_{i}") for i in ["1h", "4h"]]
+        for repository in repositories:
+            await repository.initialize()
+        return [repository.redis for repository in repositories]
+
+    first, second = asyncio.run(_initialize())
+    assert first is second
+    assert len(created) == 1
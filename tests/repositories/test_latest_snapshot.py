@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import polars as pl
+import pytest
+from deltalake import DeltaTable
+
+from libs.repositories import IndicatorsRepository
+
+
+def _rows(repository: IndicatorsRepository, rows: list[tuple[str, datetime, float]]) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            name: (
+                [coin for coin, _, _ in rows]
+                if name == "coin"
+                else [int(time.timestamp() * 1000) for _, time, _ in rows]
+                if name == "timestamp"
+                else [time.strftime("%Y-%m-%d") for _, time, _ in rows]
+                if name == "date"
+                else [value for _, _, value in rows]
+            )
+            for name in repository.table_schema.names
+        }
+    )
+
+
+@pytest.fixture
+def history(tmp_path) -> IndicatorsRepository:
+    return IndicatorsRepository(table_name="indicators_1h", storage_root=str(tmp_path))
+
+
+@pytest.fixture
+def times(history) -> tuple[datetime, datetime]:
+    end = history._window_end()
+    return end - timedelta(minutes=50), end - timedelta(minutes=10)
+
+
+def test_replace_keeps_the_newest_row_of_every_coin(history, times):
+    older, newer = times
+    snapshot = history.latest_snapshot()
+
+    snapshot.replace(_rows(history, [("BTC", newer, 2.0), ("ETH", older, 10.0)]))
+    # A late, older BTC row does not replace the newer one; SOL is added.
+    snapshot.replace(_rows(history, [("BTC", older, 1.0), ("ETH", newer, 20.0), ("SOL", newer, 30.0)]))
+
+    assert snapshot.read(order_by="coin").select("coin", "close").rows() == [
+        ("BTC", 2.0),
+        ("ETH", 20.0),
+        ("SOL", 30.0),
+    ]
+    dt = DeltaTable(snapshot.s3_path)
+    assert len(dt.files()) == 1
+    assert snapshot.table_name == "indicators_latest_1h"
+
+
+def test_rebuild_takes_the_latest_rows_within_the_lookback(history, times):
+    older, newer = times
+    history.upsert(_rows(history, [("BTC", older, 1.0), ("BTC", newer, 2.0), ("ETH", newer - timedelta(days=3), 5.0)]))
+    snapshot = history.latest_snapshot()
+    snapshot.replace(_rows(history, [("XRP", older - timedelta(days=10), 7.0)]))
+
+    snapshot.rebuild(history, lookback=timedelta(days=1))
+
+    # ETH is outside the lookback; XRP is not in the history and keeps its row.
+    assert snapshot.read(order_by="coin").select("coin", "close").rows() == [("BTC", 2.0), ("XRP", 7.0)]
+
+
+def test_the_snapshot_only_serves_the_latest_row(history):
+    with pytest.raises(ValueError, match="k=2"):
+        history.latest_snapshot().read_latest(2)
+
+
+def test_latest_records_come_from_the_snapshot_and_fall_back_to_the_history(history, times):
+    older, newer = times
+    history.upsert(_rows(history, [("BTC", older, 1.0), ("ETH", older, 10.0)]))
+
+    # No snapshot yet: the history answers.
+    assert history.get_the_latest_records(last_n=True, columns=["close"]).rows() == [
+        ("BTC", 1.0),
+        ("ETH", 10.0),
+    ]
+
+    history.latest_snapshot().replace(_rows(history, [("BTC", newer, 2.0)]))
+    assert history.get_the_latest_records(last_n=True, columns=["close"]).rows() == [("BTC", 2.0)]
+    # Past versions are read from the history.
+    assert history.get_the_latest_records(last_n=True, columns=["close"], as_of=1).rows() == [
+        ("BTC", 1.0),
+        ("ETH", 10.0),
+    ]
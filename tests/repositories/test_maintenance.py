@@ -0,0 +1,113 @@
+from datetime import UTC, datetime, timedelta
+
+import polars as pl
+import pytest
+from deltalake import DeltaTable
+
+from libs.repositories import OhlcvRepository
+from libs.repositories.delta import VERSION_COLUMN
+from libs.repositories.maintenance import DeltaMaintenance, MaintenancePolicy
+
+HOUR = timedelta(hours=1)
+
+
+def _bars(coin: str, times: list[datetime], close: float) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "coin": [coin] * len(times),
+            "timestamp": [int(time.timestamp() * 1000) for time in times],
+            "date": [time.strftime("%Y-%m-%d") for time in times],
+            "open": [close] * len(times),
+            "high": [close] * len(times),
+            "low": [close] * len(times),
+            "close": [close] * len(times),
+            "volume": [1.0] * len(times),
+        }
+    )
+
+
+def _fill(repository: OhlcvRepository) -> list[datetime]:
+    # One day, written coin by coin and bar by bar like the ingestion ticks.
+    start = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    times = [start + i * HOUR for i in range(3)]
+    for time in times:
+        for coin in ["SOL", "BTC"]:
+            repository.upsert(_bars(coin, [time], 1.0))
+    return times
+
+
+def _maintenance(**policy) -> DeltaMaintenance:
+    return DeltaMaintenance(
+        default_policy=MaintenancePolicy(
+            max_files=0, vacuum_retention_hours=0, max_log_entries_since_checkpoint=100, **policy
+        )
+    )
+
+
+@pytest.fixture
+def repository(tmp_path) -> OhlcvRepository:
+    return OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path), upsert_mode="merge")
+
+
+def test_inspect_reports_crowded_partitions(repository):
+    _fill(repository)
+    health = _maintenance().inspect(repository)
+
+    assert health.file_count == 6
+    assert health.crowded_partitions == [{"date": datetime.now(UTC).strftime("%Y-%m-%d")}]
+    assert health.log_entries_since_checkpoint == health.version + 1
+    assert health.needs_optimize(_maintenance().default_policy)
+    assert not health.needs_optimize(MaintenancePolicy(max_files=100, min_average_file_size=0))
+
+
+def test_run_compacts_vacuums_and_checkpoints(repository):
+    _fill(repository)
+    before = repository.read(order_by="timestamp").sort("coin", "timestamp")
+
+    report = _maintenance().run(repository)
+
+    assert (report.files_removed, report.files_added) == (6, 1)
+    assert report.files_vacuumed == 6
+    assert report.checkpointed
+    assert report.scan_seconds_before is not None and report.scan_seconds_after is not None
+
+    dt = DeltaTable(repository.s3_path)
+    assert len(dt.files()) == 1
+    # Z-ordered on coin and timestamp, rows unchanged.
+    assert repository.read(order_by="timestamp").sort("coin", "timestamp").equals(before)
+    assert _maintenance().inspect(repository).log_entries_since_checkpoint == 0
+
+
+def test_run_leaves_a_healthy_table_alone(repository):
+    _fill(repository)
+    version = DeltaTable(repository.s3_path).version()
+    maintenance = DeltaMaintenance(
+        default_policy=MaintenancePolicy(max_files=100, min_average_file_size=0)
+    )
+
+    report = maintenance.run(repository)
+
+    assert (report.files_removed, report.files_added, report.files_vacuumed) == (0, 0, 0)
+    assert not report.checkpointed
+    assert DeltaTable(repository.s3_path).version() == version
+
+
+def test_run_deduplicates_a_table_upserted_by_appending(tmp_path):
+    repository = OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path), upsert_mode="append")
+    times = _fill(repository)
+    repository.upsert(_bars("BTC", times[-1:], 2.0))
+
+    report = _maintenance().run(repository)
+
+    assert (report.files_removed, report.files_added) == (7, 1)
+    stored = pl.from_arrow(DeltaTable(repository.s3_path).to_pyarrow_table())
+    assert stored.height == 6
+    assert stored.filter(
+        (pl.col("coin") == "BTC") & (pl.col("timestamp") == int(times[-1].timestamp() * 1000))
+    )["close"].to_list() == [2.0]
+    assert stored[VERSION_COLUMN].max() == 7
+
+
+def test_a_missing_table_cannot_be_maintained(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        _maintenance().run(OhlcvRepository(table_name="ohlcv_4h", storage_root=str(tmp_path)))
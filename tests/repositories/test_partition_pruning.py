@@ -0,0 +1,98 @@
+import logging
+from datetime import UTC, datetime
+
+import polars as pl
+import pyarrow.compute as pc
+import pytest
+
+from libs.repositories import OhlcvRepository, time_range_filter, time_range_partitions
+
+HOUR_MS = 3_600_000
+START_MS = 1_735_689_600_000  # 2025-01-01
+
+
+def _ms(*args) -> int:
+    return int(datetime(*args, tzinfo=UTC).timestamp() * 1000)
+
+
+def test_time_range_partitions_mirror_the_filter():
+    assert time_range_partitions(_ms(2025, 1, 1, 12), _ms(2025, 1, 3), closed="left", coins=["BTC"]) == [
+        ("date", ">=", "2025-01-01"),
+        ("timestamp", ">=", str(_ms(2025, 1, 1, 12))),
+        ("date", "<=", "2025-01-03"),
+        ("timestamp", "<", str(_ms(2025, 1, 3))),
+        ("coin", "in", ["BTC"]),
+    ]
+    assert time_range_partitions() == []
+
+
+def _fill(repository: OhlcvRepository) -> None:
+    # Five days, one commit per day and coin.
+    for day in range(5):
+        for coin in ["BTC", "ETH"]:
+            timestamps = [START_MS + (day * 24 + hour) * HOUR_MS for hour in range(0, 24, 6)]
+            repository.write(
+                pl.DataFrame(
+                    {
+                        "coin": [coin] * 4,
+                        "timestamp": timestamps,
+                        "open": [1.0] * 4,
+                        "high": [1.0] * 4,
+                        "low": [1.0] * 4,
+                        "close": [float(day)] * 4,
+                        "volume": [1.0] * 4,
+                    }
+                ).with_columns(pl.from_epoch("timestamp", time_unit="ms").dt.strftime("%Y-%m-%d").alias("date"))
+            )
+
+
+def _pruned(caplog) -> list[str]:
+    return [record.getMessage() for record in caplog.records if "pruned by partition" in record.getMessage()]
+
+
+@pytest.mark.parametrize(
+    "partition_columns, cluster_columns, expected",
+    [
+        (["date"], ["coin", "timestamp"], "scanning 4 of 10 files, 6 pruned by partition, 0 by statistics."),
+        (["date", "timestamp"], [], "scanning 16 of 40 files, 24 pruned by partition, 0 by statistics."),
+        ([], ["coin", "timestamp"], "scanning 4 of 10 files, 0 pruned by partition, 6 by statistics."),
+    ],
+    ids=["date", "legacy", "unpartitioned"],
+)
+def test_time_ranges_prune_whichever_partitions_the_table_has(
+    tmp_path, caplog, partition_columns, cluster_columns, expected
+):
+    repository = OhlcvRepository(
+        table_name="ohlcv_1h",
+        storage_root=str(tmp_path),
+        partition_columns=partition_columns,
+        cluster_columns=cluster_columns,
+    )
+    _fill(repository)
+    start, end = _ms(2025, 1, 2), _ms(2025, 1, 3, 23)
+    caplog.set_level(logging.INFO, logger="libs.repositories.delta")
+
+    df = repository.read(
+        filters=time_range_filter(start, end),
+        partition_hints=time_range_partitions(start, end),
+        order_by="timestamp",
+    )
+
+    assert df["close"].unique().sort().to_list() == [1.0, 2.0]
+    assert df.height == 16
+    assert _pruned(caplog) == [f"Table ohlcv_1h: {expected}"]
+
+
+def test_hints_on_columns_the_table_is_not_partitioned_by_are_ignored(tmp_path, caplog):
+    repository = OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path))
+    _fill(repository)
+    caplog.set_level(logging.INFO, logger="libs.repositories.delta")
+
+    df = repository.read(
+        filters=pc.field("coin") == "ETH",
+        partition_hints=time_range_partitions(coins=["ETH"]),
+        order_by="timestamp",
+    )
+
+    assert df["coin"].unique().to_list() == ["ETH"]
+    assert _pruned(caplog) == ["Table ohlcv_1h: scanning 5 of 10 files, 0 pruned by partition, 5 by statistics."]
@@ -0,0 +1,119 @@
+import logging
+import re
+from datetime import UTC, datetime
+
+import polars as pl
+import pyarrow.compute as pc
+import pytest
+
+from libs.repositories import OhlcvRepository
+
+HOUR_MS = 3_600_000
+START_MS = 1_735_689_600_000  # 2025-01-01
+
+
+def _bars(coins: list[str], hours: range) -> pl.DataFrame:
+    return pl.DataFrame(
+        [
+            {
+                "coin": coin,
+                "timestamp": START_MS + hour * HOUR_MS,
+                "open": float(hour),
+                "high": float(hour),
+                "low": float(hour),
+                "close": float(hour),
+                "volume": 1.0,
+            }
+            for coin in coins
+            for hour in hours
+        ]
+    ).with_columns(pl.from_epoch("timestamp", time_unit="ms").dt.strftime("%Y-%m-%d").alias("date"))
+
+
+def _reference(df: pl.DataFrame, k: int) -> pl.DataFrame:
+    return df.sort("coin", "timestamp").group_by("coin", maintain_order=True).tail(k)
+
+
+def _scanned_files(caplog) -> int:
+    return sum(
+        int(match.group(1))
+        for record in caplog.records
+        if (match := re.search(r"scanning (\d+) of", record.getMessage()))
+    )
+
+
+@pytest.fixture
+def repository(tmp_path) -> OhlcvRepository:
+    return OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path), upsert_mode="merge")
+
+
+@pytest.fixture
+def single_coin_files(repository) -> pl.DataFrame:
+    # A file per coin and tick; DOGE only traded at hour 14.
+    frames = []
+    for hour in range(24):
+        for coin in ["BTC", "ETH", "DOGE"] if hour == 14 else ["BTC", "ETH"]:
+            frames.append(_bars([coin], range(hour, hour + 1)))
+            repository.write(frames[-1])
+    return pl.concat(frames)
+
+
+@pytest.mark.parametrize("k", [1, 3])
+def test_read_latest_reaches_coins_whose_rows_are_older(repository, single_coin_files, k):
+    latest = repository.read_latest(k, columns=["close"])
+
+    assert latest.equals(_reference(single_coin_files, k).select("coin", "timestamp", "close"))
+
+
+def test_read_latest_stops_once_no_file_holds_a_short_coin(repository, single_coin_files, caplog):
+    caplog.set_level(logging.INFO, logger="libs.repositories")
+
+    # DOGE stays short of 2 rows, but no file older than its bar holds it.
+    latest = repository.read_latest(2)
+
+    assert latest.equals(_reference(single_coin_files, 2).select(latest.columns))
+    assert "read from 31 of 49 files" in caplog.text
+
+
+def test_read_latest_does_not_scan_mixed_files_for_coins(repository, caplog):
+    for hour in range(24):
+        repository.write(_bars(["BTC", "ETH", "SOL"], range(hour, hour + 1)))
+    caplog.set_level(logging.INFO, logger="libs.repositories")
+
+    latest = repository.read_latest(2)
+
+    assert latest["timestamp"].unique().sort().to_list() == [
+        START_MS + 22 * HOUR_MS,
+        START_MS + 23 * HOUR_MS,
+    ]
+    assert latest.height == 6
+    assert "read from 3 of 24 files" in caplog.text
+    # Only the newest window is opened, no coin listing scan before it.
+    assert _scanned_files(caplog) == 3
+
+
+def test_read_latest_applies_filters_and_bounds(repository, single_coin_files):
+    latest = repository.read_latest(2, filters=pc.field("coin") == "DOGE")
+    assert latest["close"].to_list() == [14.0]
+
+    latest = repository.read_latest(
+        1,
+        filters=pc.field("close") < 10,
+        until=datetime(2025, 1, 1, 8, tzinfo=UTC),
+    )
+    assert latest.select("coin", "close").rows() == [("BTC", 8.0), ("ETH", 8.0)]
+
+
+def test_get_the_latest_records_goes_through_read_latest(repository, single_coin_files, monkeypatch):
+    calls = []
+    read_latest = OhlcvRepository.read_latest
+
+    def _read_latest(self, k, **kwargs):
+        calls.append((k, kwargs["since"], kwargs["until"]))
+        return read_latest(self, k, **kwargs)
+
+    monkeypatch.setattr(OhlcvRepository, "read_latest", _read_latest)
+    repository.get_the_latest_records(last_n=True)
+
+    end = repository._window_end()
+    assert calls == [(1, end - repository.interval_to_delta["1h"], end)]
@@ -0,0 +1,92 @@
+import polars as pl
+import pytest
+from deltalake import DeltaTable, write_deltalake
+
+from libs.repositories import OhlcvRepository
+
+HOUR_MS = 3_600_000
+START_MS = 1_735_689_600_000  # 2025-01-01
+
+
+def _legacy_bars() -> pl.DataFrame:
+    # Rows arrive newest first and coins interleaved, as the old job wrote them.
+    rows = [
+        {
+            "coin": coin,
+            "timestamp": START_MS + i * 6 * HOUR_MS,
+            "open": float(i),
+            "high": float(i),
+            "low": float(i),
+            "close": float(i),
+            "volume": 1.0,
+        }
+        for i in reversed(range(8))
+        for coin in ["SOL", "BTC"]
+    ]
+    return pl.DataFrame(rows).with_columns(
+        pl.from_epoch("timestamp", time_unit="ms").dt.strftime("%Y-%m-%d").alias("date")
+    )
+
+
+@pytest.fixture
+def repository(tmp_path) -> OhlcvRepository:
+    repository = OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path))
+    # The layout of the original job: a partition per date and timestamp.
+    write_deltalake(
+        repository.s3_path,
+        _legacy_bars().to_arrow(),
+        partition_by=["date", "timestamp"],
+    )
+    return repository
+
+
+def test_relayout_rewrites_the_table_into_date_partitions(repository):
+    before = DeltaTable(repository.s3_path)
+    assert len(before.files()) == 8
+
+    assert repository.relayout()
+
+    after = DeltaTable(repository.s3_path)
+    assert after.metadata().partition_columns == ["date"]
+    assert len(after.files()) == 2
+    df = pl.from_arrow(after.to_pyarrow_table())
+    assert df.height == 16
+    # Each file is clustered by coin and timestamp.
+    for file in after.file_uris():
+        part = pl.read_parquet(file)
+        assert part.equals(part.sort("coin", "timestamp"))
+
+    assert repository.read(columns=["coin", "timestamp", "close"], order_by="timestamp").sort("coin", "timestamp").equals(
+        _legacy_bars().select("coin", "timestamp", "close").sort("coin", "timestamp")
+    )
+    assert repository.current_partition_columns() == ["date"]
+
+
+def test_relayout_is_a_no_op_on_the_target_layout(repository):
+    assert repository.relayout()
+    version = DeltaTable(repository.s3_path).version()
+
+    assert not repository.relayout()
+    assert DeltaTable(repository.s3_path).version() == version
+
+
+def test_a_failed_relayout_restores_the_old_layout(repository, monkeypatch):
+    read_chunks = OhlcvRepository._read_chunks
+
+    def _failing_read_chunks(dataset, schema, chunk_column, chunks, cluster_columns):
+        if cluster_columns:
+            raise RuntimeError("writer panicked")
+        return read_chunks(dataset, schema, chunk_column, chunks, cluster_columns)
+
+    monkeypatch.setattr(OhlcvRepository, "_read_chunks", staticmethod(_failing_read_chunks))
+    with pytest.raises(RuntimeError, match="writer panicked"):
+        repository.relayout()
+
+    restored = DeltaTable(repository.s3_path)
+    assert restored.metadata().partition_columns == ["date", "timestamp"]
+    assert restored.to_pyarrow_dataset().count_rows() == 16
+
+
+def test_a_missing_table_cannot_be_relaid_out(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        OhlcvRepository(table_name="ohlcv_4h", storage_root=str(tmp_path)).relayout()
@@ -0,0 +1,66 @@
+import polars as pl
+import pyarrow.compute as pc
+import pytest
+
+from libs.repositories import OhlcvRepository, time_range_filter, time_range_partitions
+
+HOUR_MS = 3_600_000
+START_MS = 1_735_689_600_000  # 2025-01-01
+
+
+def _bars(rows: list[tuple[str, int, float]]) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "coin": [coin for coin, _, _ in rows],
+            "timestamp": [START_MS + hour * HOUR_MS for _, hour, _ in rows],
+            "open": [close for _, _, close in rows],
+            "high": [close for _, _, close in rows],
+            "low": [close for _, _, close in rows],
+            "close": [close for _, _, close in rows],
+            "volume": [1.0] * len(rows),
+        }
+    ).with_columns(pl.from_epoch("timestamp", time_unit="ms").dt.strftime("%Y-%m-%d").alias("date"))
+
+
+@pytest.fixture(params=["merge", "append"])
+def repository(tmp_path, request) -> OhlcvRepository:
+    repository = OhlcvRepository(table_name="ohlcv_1h", storage_root=str(tmp_path), upsert_mode=request.param)
+    repository.upsert(_bars([(coin, hour, float(hour)) for coin in ["BTC", "ETH"] for hour in range(48)]))
+    # Revisions: BTC hour 40 rises above 100, ETH hour 47 falls below 40.
+    repository.upsert(_bars([("BTC", 40, 140.0), ("ETH", 47, 7.0)]))
+    return repository
+
+
+def test_scan_matches_read(repository):
+    lf = repository.scan()
+
+    assert isinstance(lf, pl.LazyFrame)
+    assert lf.collect().sort("coin", "timestamp").equals(
+        repository.read(order_by="timestamp").sort("coin", "timestamp")
+    )
+
+
+def test_scan_composes_with_filters_and_hints(repository):
+    start = START_MS + 24 * HOUR_MS
+    per_coin = (
+        repository.scan(
+            filters=time_range_filter(start) & (pc.field("close") >= 40),
+            partition_hints=time_range_partitions(start),
+        )
+        .group_by("coin")
+        .agg(pl.len().alias("bars"), pl.col("close").max())
+        .sort("coin")
+        .collect()
+    )
+
+    # Filters see the newest version of every bar only.
+    assert per_coin.rows() == [("BTC", 8, 140.0), ("ETH", 7, 46.0)]
+
+
+def test_scan_as_of_a_version(repository):
+    assert repository.scan(as_of=1).filter(pl.col("coin") == "BTC").select(pl.col("close").max()).collect().item() == 47.0
+
+
+def test_scan_of_a_missing_table_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        OhlcvRepository(table_name="ohlcv_4h", storage_root=str(tmp_path)).scan()
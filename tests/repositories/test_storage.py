@@ -0,0 +1,30 @@
+from libs.repositories import IndicatorsRepository, OhlcvRepository
+
+
+def test_tables_live_under_the_configured_root(monkeypatch, tmp_path):
+    monkeypatch.setenv("DELTA_STORAGE_ROOT", f"{tmp_path}/")
+    assert OhlcvRepository(table_name="ohlcv_1h").s3_path == f"{tmp_path}/ohlcv_1h"
+
+    monkeypatch.delenv("DELTA_STORAGE_ROOT")
+    monkeypatch.setenv("S3_BUCKET_NAME", "coin-data")
+    assert OhlcvRepository(table_name="ohlcv_1h").s3_path == "s3://coin-data/ohlcv_1h"
+
+
+def test_an_s3_endpoint_points_the_storage_options_at_it(monkeypatch):
+    monkeypatch.delenv("DELTA_S3_ENDPOINT_URL", raising=False)
+    assert "AWS_ENDPOINT_URL" not in OhlcvRepository(table_name="ohlcv_1h").storage_options
+
+    monkeypatch.setenv("DELTA_S3_ENDPOINT_URL", "http://minio:9000")
+    storage_options = OhlcvRepository(table_name="ohlcv_1h").storage_options
+    assert storage_options["AWS_ENDPOINT_URL"] == "http://minio:9000"
+    assert storage_options["AWS_ALLOW_HTTP"] == "true"
+
+
+def test_the_latest_snapshot_shares_the_root_of_its_history(tmp_path):
+    history = IndicatorsRepository(
+        table_name="indicators_4h", storage_root=str(tmp_path), storage_options={"AWS_REGION": "eu-west-1"}
+    )
+    snapshot = history.latest_snapshot()
+
+    assert snapshot.s3_path == f"{tmp_path}/indicators_latest_4h"
+    assert snapshot.storage_options == history.storage_options
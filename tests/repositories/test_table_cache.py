@@ -0,0 +1,111 @@
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+
+import pyarrow as pa
+import pytest
+from deltalake import DeltaTable, write_deltalake
+
+from libs.repositories.table_cache import DeltaTableCache
+
+
+def _write(uri: str, value: int) -> None:
+    write_deltalake(uri, pa.table({"value": [value]}), mode="append")
+
+
+@pytest.fixture
+def uri(tmp_path) -> str:
+    uri = str(tmp_path / "table")
+    _write(uri, 0)
+    return uri
+
+
+def test_handles_are_reused_until_they_go_stale(uri):
+    cache = DeltaTableCache(max_staleness=60)
+    with cache.table(uri) as dt:
+        first = dt
+    _write(uri, 1)
+
+    with cache.table(uri) as dt:
+        assert dt is first
+        assert dt.version() == 0
+    with cache.table(uri, max_staleness=0) as dt:
+        # Refreshed in place from the log entries committed since.
+        assert dt is first
+        assert dt.version() == 1
+
+
+def test_a_missing_table_yields_none(tmp_path):
+    with DeltaTableCache().table(str(tmp_path / "missing")) as dt:
+        assert dt is None
+
+
+def test_a_failed_write_drops_the_handle(uri):
+    cache = DeltaTableCache(max_staleness=60)
+    with cache.table(uri) as dt:
+        first = dt
+
+    with pytest.raises(RuntimeError), cache.table(uri, writes=True):
+        raise RuntimeError("commit conflict")
+    with cache.table(uri) as dt:
+        assert dt is not first
+
+
+def test_pinned_versions_are_kept_least_recently_used_first_out(uri, monkeypatch):
+    monkeypatch.setenv("DELTA_VERSION_CACHE_SIZE", "2")
+    cache = DeltaTableCache()
+    for value in range(1, 3):
+        _write(uri, value)
+
+    handles = {}
+    for version in [0, 1, 0, 2]:
+        with cache.version(uri, version) as dt:
+            assert dt.version() == version
+            handles.setdefault(version, dt)
+
+    # Version 0 was used after 1, so 1 is the one evicted.
+    assert [key[1] for key in cache._versions] == [0, 2]
+    with cache.version(uri, 0) as dt:
+        assert dt is handles[0]
+    with cache.version(uri, 1) as dt:
+        assert dt is not handles[1]
+
+
+def test_version_at_maps_commit_times_to_versions(uri):
+    cache = DeltaTableCache(max_staleness=0)
+    time.sleep(0.01)
+    _write(uri, 1)
+    commits = {
+        commit["version"]: datetime.fromtimestamp(commit["timestamp"] / 1000, UTC)
+        for commit in DeltaTable(uri).history()
+    }
+
+    assert cache.version_at(uri, commits[0] - timedelta(seconds=1)) is None
+    assert cache.version_at(uri, commits[0]) == 0
+    assert cache.version_at(uri, commits[1]) == 1
+    assert cache.committed_at(uri, 1) == commits[1]
+    assert cache.committed_at(uri, 5) is None
+
+    # Later commits are picked up incrementally.
+    _write(uri, 2)
+    assert cache.version_at(uri, datetime.now(UTC) + timedelta(seconds=1)) == 2
+
+
+def test_a_table_is_used_by_one_operation_at_a_time(uri):
+    cache = DeltaTableCache()
+    entered = []
+
+    def _other() -> None:
+        with cache.table(uri):
+            entered.append(time.monotonic())
+
+    with cache.table(uri):
+        # The lock is reentrant for the holding thread.
+        with cache.table(uri) as dt:
+            assert dt is not None
+        thread = threading.Thread(target=_other)
+        thread.start()
+        time.sleep(0.1)
+        assert entered == []
+    thread.join()
+    assert len(entered) == 1
@@ -0,0 +1,26 @@
+import numpy as np
+import polars as pl
+import pytest
+
+
+@pytest.fixture
+def ohlcv_df() -> pl.DataFrame:
+    """Random-walk hourly bars for three coins, long enough for every indicator."""
+    rng = np.random.default_rng(7)
+    frames = []
+    for coin in ["BTC", "ETH", "SOL"]:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 80)))
+        frames.append(
+            pl.DataFrame(
+                {
+                    "coin": coin,
+                    "timestamp": 1_700_000_000_000 + np.arange(80) * 3_600_000,
+                    "open": np.roll(close, 1),
+                    "high": close * (1 + rng.uniform(0, 0.02, 80)),
+                    "low": close * (1 - rng.uniform(0, 0.02, 80)),
+                    "close": close,
+                    "volume": rng.uniform(1, 100, 80),
+                }
+            )
+        )
+    return pl.concat(frames)
@@ -0,0 +1,57 @@
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from libs.technical_analysis.batch import (
+    INDICATOR_COLUMNS,
+    OUTPUT_COLUMNS,
+    calculate_ta_indicators_batch,
+)
+
+
+def test_coins_are_computed_independently(ohlcv_df):
+    batch_df = calculate_ta_indicators_batch(ohlcv_df.sample(fraction=1.0, shuffle=True, seed=1), return_last_one=False)
+    assert batch_df.columns == OUTPUT_COLUMNS
+
+    for coin in ["BTC", "ETH", "SOL"]:
+        single_df = calculate_ta_indicators_batch(ohlcv_df.filter(pl.col("coin") == coin), return_last_one=False)
+        assert_frame_equal(batch_df.filter(pl.col("coin") == coin), single_df)
+
+
+def test_short_history_keeps_the_coin(ohlcv_df):
+    latest_df = calculate_ta_indicators_batch(ohlcv_df.group_by("coin", maintain_order=True).head(10))
+
+    assert latest_df["coin"].to_list() == ["BTC", "ETH", "SOL"]
+    assert latest_df["RSI_14"].is_null().all()
+    assert latest_df["BBM_5_2.0"].is_not_null().all()
+
+
+def test_return_last_one_is_the_newest_row_of_every_coin(ohlcv_df):
+    all_df = calculate_ta_indicators_batch(ohlcv_df, return_last_one=False)
+    latest_df = calculate_ta_indicators_batch(ohlcv_df)
+
+    assert_frame_equal(latest_df, all_df.group_by("coin", maintain_order=True).last())
+    trend_columns = ["PSARl_0.02_0.2", "PSARs_0.02_0.2"]
+    assert latest_df.select(pl.exclude(trend_columns)).null_count().sum_horizontal().item() == 0
+    # Only the side of the current trend has a SAR.
+    assert latest_df.select(pl.sum_horizontal(pl.col(trend_columns).is_not_null())).to_series().to_list() == [1, 1, 1]
+
+
+def test_revised_bars_replace_earlier_ones(ohlcv_df):
+    revised_df = ohlcv_df.tail(1).with_columns(pl.col("close") * 2)
+    latest_df = calculate_ta_indicators_batch(pl.concat([ohlcv_df, revised_df]))
+
+    assert latest_df.filter(pl.col("coin") == "SOL")["close"].item() == revised_df["close"].item()
+
+
+def test_matches_calculate_ta_indicators(ohlcv_df):
+    pytest.importorskip("pandas_ta")
+    from libs.technical_analysis.ta import calculate_ta_indicators
+
+    for coin in ["BTC", "ETH", "SOL"]:
+        coin_df = ohlcv_df.filter(pl.col("coin") == coin)
+        # pandas_ta's PSAR looks at the newest bar of the frame on its second row.
+        columns = [column for column in INDICATOR_COLUMNS if not column.startswith("PSAR")]
+        expected = calculate_ta_indicators(coin_df, return_last_one=False).select(columns)
+        actual = calculate_ta_indicators_batch(coin_df, return_last_one=False).select(columns)
+        assert_frame_equal(actual, expected.cast(pl.Float64), check_exact=False, rtol=1e-9)
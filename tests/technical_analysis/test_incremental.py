@@ -0,0 +1,68 @@
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from libs.technical_analysis.batch import OUTPUT_COLUMNS, calculate_ta_indicators_batch
+from libs.technical_analysis.incremental import IndicatorState, advance_indicator_states
+
+
+def _stream(ohlcv_df: pl.DataFrame) -> pl.DataFrame:
+    states: dict[str, IndicatorState] = {}
+    rows = [
+        advance_indicator_states(states, bar_df)
+        for bar_df in ohlcv_df.sort("timestamp").iter_slices(n_rows=3)
+    ]
+    return pl.concat(rows).sort("coin", "timestamp")
+
+
+def test_matches_the_batch_engine_on_every_bar(ohlcv_df):
+    batch_df = calculate_ta_indicators_batch(ohlcv_df, return_last_one=False)
+    # One bar per coin per tick.
+    incremental_df = _stream(ohlcv_df)
+
+    assert_frame_equal(
+        incremental_df.select(OUTPUT_COLUMNS),
+        batch_df.select(OUTPUT_COLUMNS),
+        check_exact=False,
+        rtol=1e-9,
+    )
+
+
+def test_revising_the_latest_bar_rewinds_it(ohlcv_df):
+    coin_df = ohlcv_df.filter(pl.col("coin") == "ETH")
+    state = IndicatorState(coin="ETH")
+    for bar in coin_df.head(60).iter_rows(named=True):
+        state.update(bar)
+
+    open_bar = coin_df.row(60, named=True)
+    state.update({**open_bar, "close": open_bar["close"] * 1.5, "high": open_bar["high"] * 1.5})
+    revised = state.update(open_bar)
+
+    expected = calculate_ta_indicators_batch(coin_df.head(61))
+    assert_frame_equal(
+        pl.DataFrame([revised]).select(OUTPUT_COLUMNS),
+        expected.select(OUTPUT_COLUMNS),
+        check_exact=False,
+        rtol=1e-9,
+        check_dtypes=False,
+    )
+
+
+def test_older_bars_are_ignored(ohlcv_df):
+    state = IndicatorState(coin="BTC")
+    bars = list(ohlcv_df.filter(pl.col("coin") == "BTC").head(30).iter_rows(named=True))
+    for bar in bars:
+        state.update(bar)
+
+    assert state.update(bars[10]) is None
+    assert state.timestamp == bars[-1]["timestamp"]
+
+
+def test_states_survive_serialization(ohlcv_df):
+    coin_df = ohlcv_df.filter(pl.col("coin") == "SOL")
+    state = IndicatorState(coin="SOL")
+    for bar in coin_df.head(70).iter_rows(named=True):
+        state.update(bar)
+
+    restored = IndicatorState.model_validate(state.model_dump())
+    next_bar = coin_df.row(70, named=True)
+    assert restored.update(next_bar) == state.update(next_bar)
@@ -0,0 +1,47 @@
+from libs.utils.metrics import MetricsRegistry, diff_snapshots
+
+
+def test_render_uses_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    counter = registry.counter("rows_total", "Rows written.")
+    histogram = registry.histogram("write_seconds", "Write latency.", buckets=(0.1, 1.0))
+
+    counter.inc(3, table="ohlcv_1h")
+    histogram.observe(0.5, table="ohlcv_1h")
+
+    assert registry.render().splitlines() == [
+        "# HELP rows_total Rows written.",
+        "# TYPE rows_total counter",
+        'rows_total{table="ohlcv_1h"} 3.0',
+        "# HELP write_seconds Write latency.",
+        "# TYPE write_seconds histogram",
+        'write_seconds_bucket{table="ohlcv_1h",le="0.1"} 0',
+        'write_seconds_bucket{table="ohlcv_1h",le="1.0"} 1',
+        'write_seconds_bucket{table="ohlcv_1h",le="+Inf"} 1',
+        'write_seconds_sum{table="ohlcv_1h"} 0.5',
+        'write_seconds_count{table="ohlcv_1h"} 1',
+    ]
+
+
+def test_metrics_are_created_once_per_name():
+    registry = MetricsRegistry()
+
+    assert registry.counter("rows_total", "Rows.") is registry.counter("rows_total", "Rows.")
+
+
+def test_diff_snapshots_keeps_only_what_moved():
+    registry = MetricsRegistry()
+    counter = registry.counter("rows_total", "Rows.")
+    histogram = registry.histogram("write_seconds", "Latency.")
+    counter.inc(2, table="a")
+    counter.inc(1, table="b")
+    histogram.observe(1.0)
+    before = registry.snapshot()
+
+    counter.inc(5, table="a")
+    histogram.observe(2.0)
+
+    assert diff_snapshots(before, registry.snapshot()) == {
+        "rows_total": {'{table="a"}': 5.0},
+        "write_seconds": {"{}": {"count": 1, "sum": 2.0}},
+    }